@@ -1,80 +1,119 @@
 # app.py - Streamlit Resume Optimizer App
 import streamlit as st
-import google.generativeai as genai
-import markdown
-from weasyprint import HTML
-import PyPDF2
 import io
 import re
 import tempfile
 import os
+import time
 from datetime import datetime
 
-# Configure page
-st.set_page_config(
-    page_title="AI Resume Optimizer",
-    page_icon="📄",
-    layout="wide",
-    initial_sidebar_state="expanded"
-)
-
-# Custom CSS for better styling
-st.markdown("""
-<style>
-    .main-header {
-        text-align: center;
-        color: #2c3e50;
-        margin-bottom: 2rem;
-    }
-    .upload-section {
-        background-color: #f8f9fa;
-        padding: 2rem;
-        border-radius: 10px;
-        margin: 1rem 0;
-    }
-    .success-message {
-        background-color: #d4edda;
-        color: #155724;
-        padding: 1rem;
-        border-radius: 5px;
-        margin: 1rem 0;
-    }
-    .error-message {
-        background-color: #f8d7da;
-        color: #721c24;
-        padding: 1rem;
-        border-radius: 5px;
-        margin: 1rem 0;
-    }
-</style>
-""", unsafe_allow_html=True)
-
-# Initialize session state
-if 'api_key' not in st.session_state:
-    st.session_state.api_key = ""
-if 'optimized_resume' not in st.session_state:
-    st.session_state.optimized_resume = ""
+from artifact_store import artifact_store
+from caching import LRUCache, content_digest
+from compaction import compact_job_description, compact_resume_text, compaction_report
+from early_stop import EndPatternWatcher
+from jobs import job_manager
+from llm import current_session_id, generate_text, result_key
+from metrics import observe, span, start_exporter
+from pdf_extract import extract_text
+from pdf_render import PRERENDER, estimate_pages, find_pdf_render, render_html, render_pdf_async
+from streaming_preview import rerun, show_html_preview, show_job_progress, wait_and_rerun
+from usage import usage_ledger
+
+def setup_page():
+    """Configure the page, custom styling and session state"""
+    # Configure page
+    st.set_page_config(
+        page_title="AI Resume Optimizer",
+        page_icon="📄",
+        layout="wide",
+        initial_sidebar_state="expanded"
+    )
+
+    # Custom CSS for better styling
+    st.markdown("""
+    <style>
+        .main-header {
+            text-align: center;
+            color: #2c3e50;
+            margin-bottom: 2rem;
+        }
+        .upload-section {
+            background-color: #f8f9fa;
+            padding: 2rem;
+            border-radius: 10px;
+            margin: 1rem 0;
+        }
+        .success-message {
+            background-color: #d4edda;
+            color: #155724;
+            padding: 1rem;
+            border-radius: 5px;
+            margin: 1rem 0;
+        }
+        .error-message {
+            background-color: #f8d7da;
+            color: #721c24;
+            padding: 1rem;
+            border-radius: 5px;
+            margin: 1rem 0;
+        }
+    </style>
+    """, unsafe_allow_html=True)
+
+    # Stage latency histograms on $METRICS_PORT / $METRICS_FILE, once per process
+    start_exporter()
+
+    # Initialize session state
+    if 'api_key' not in st.session_state:
+        st.session_state.api_key = ""
+    if 'stream_output' not in st.session_state:
+        st.session_state.stream_output = True
+    if 'use_cache' not in st.session_state:
+        st.session_state.use_cache = True
+    if 'job_id' not in st.session_state:
+        st.session_state.job_id = None
+    if 'optimized_resume' not in st.session_state:
+        st.session_state.optimized_resume = ""
+
+# Extracted resume text keyed by a digest of the uploaded bytes, so each upload
+# is parsed once instead of on every rerun
+extraction_cache = LRUCache(max_entries=32)
+extraction_timings = {'parse_seconds': 0.0, 'saved_seconds': 0.0}
+
+def parse_pdf_bytes(pdf_bytes):
+    """Extract text from PDF bytes and time the extraction"""
+    start = time.perf_counter()
+    # Large PDFs are split into page ranges extracted in worker processes
+    text = extract_text(pdf_bytes)
+    return {'text': text, 'parse_seconds': time.perf_counter() - start}
 
 def extract_text_from_pdf(pdf_file):
     """Extract text content from uploaded PDF file"""
     try:
-        pdf_reader = PyPDF2.PdfReader(pdf_file)
-        text = ""
-        for page in pdf_reader.pages:
-            text += page.extract_text() + "\n"
-        return text.strip()
+        pdf_bytes = pdf_file.getvalue()
+        key = content_digest(pdf_bytes)
+        entry = extraction_cache.get(key)
+        if entry is None:
+            entry = parse_pdf_bytes(pdf_bytes)
+            extraction_cache.put(key, entry)
+            extraction_timings['parse_seconds'] += entry['parse_seconds']
+        else:
+            extraction_timings['saved_seconds'] += entry['parse_seconds']
+        st.session_state.last_parse_seconds = entry['parse_seconds']
+        return entry['text']
     except Exception as e:
         st.error(f"Error reading PDF: {str(e)}")
         return None
 
-def optimize_resume_with_gemini(resume_text, job_description, api_key):
-    """Use Gemini API to optimize the resume"""
-    try:
-        # Configure Gemini API
-        genai.configure(api_key=api_key)
-        model = genai.GenerativeModel('gemini-1.5-flash')
-        
-        prompt = f"""
+def extraction_stats():
+    """Return extraction cache counters together with parse timings"""
+    stats = extraction_cache.stats()
+    stats.update(extraction_timings)
+    return stats
+
+def build_resume_prompt(resume_text, job_description):
+    """Build the resume optimization prompt sent to Gemini"""
+    return f"""
 You are a professional resume optimization expert. Your task is to rewrite the provided resume to perfectly match the job description requirements.
 
 IMPORTANT: You must output ONLY the complete rewritten resume in markdown format. Do not include any suggestions, advice, or additional text after the resume.
@@ -103,35 +142,82 @@ JOB DESCRIPTION:
 OUTPUT ONLY THE REWRITTEN RESUME IN MARKDOWN FORMAT:
 """
 
-        response = model.generate_content(
-            prompt,
-            generation_config=genai.types.GenerationConfig(
-                temperature=0.7,
-                max_output_tokens=4000,
-                top_p=0.8,
-                top_k=40
-            )
+def optimize_resume_with_gemini(resume_text, job_description, api_key, on_chunk=None, use_cache=True, on_queue=None, reports=None,
+                                priority='interactive', app='resume'):
+    """Use Gemini API to optimize the resume.
+
+    Runs in a background job (or a batch_optimize worker): API errors
+    propagate to the caller, and the compaction and early-stop reports are
+    stored in the reports dict. priority and app pick the rate-limiter lane
+    and the usage-ledger entry.
+    """
+    reports = {} if reports is None else reports
+    with span('prompt_build'):
+        # Strip PDF extraction noise and JD boilerplate before paying for tokens
+        compact_resume = compact_resume_text(resume_text)
+        compact_job = compact_job_description(job_description)
+        reports['compaction'] = compaction_report(
+            resume_text + job_description, compact_resume + compact_job
         )
-        
-        return response.text
-    
-    except Exception as e:
-        st.error(f"Error calling Gemini API: {str(e)}")
-        return None
+        prompt = build_resume_prompt(compact_resume, compact_job)
+
+    # Stops the model as soon as it starts the suggestions that
+    # clean_resume_content would strip anyway
+    watcher = EndPatternWatcher(END_PATTERNS)
+
+    # Streams partial text to on_chunk when given; identical requests are
+    # served from the response cache unless use_cache is False; on_queue
+    # hears about waits for the shared rate limit
+    optimized = generate_text(api_key, prompt, on_chunk=on_chunk, use_cache=use_cache, on_queue=on_queue,
+                              priority=priority, app=app, stop_when=watcher, on_source=watcher.served)
+    watcher.finish(optimized)
+    reports['early_stop'] = watcher.report()
+    return optimized
+
+def run_optimization_job(job, resume_text, job_description, api_key, use_cache, stream_output):
+    """Background job: optimize and clean the resume, returning it with its reports"""
+    reports = {'compaction': None, 'early_stop': None, 'from_store': False}
+    # Finished resumes are shared through the artifact store, so the same
+    # inputs in another session or server process skip generation entirely
+    key = result_key('resume', resume_text, job_description)
+    stored = artifact_store.get_text(key) if use_cache else None
+    if stored is not None:
+        reports['optimized_resume'] = stored
+        reports['from_store'] = True
+        if PRERENDER:
+            start_pdf_render(stored)
+        return reports
+    optimized = optimize_resume_with_gemini(
+        resume_text, job_description, api_key,
+        on_chunk=job.update if stream_output else None,
+        use_cache=use_cache,
+        on_queue=job.set_queue_position,
+        reports=reports
+    )
+    reports['optimized_resume'] = clean_resume_content(optimized) if optimized else ""
+    if reports['optimized_resume']:
+        artifact_store.put_text(key, reports['optimized_resume'])
+        if PRERENDER:
+            # Render while the user reads the preview
+            start_pdf_render(reports['optimized_resume'])
+    return reports
+
+# Where the model's trailing suggestions start, in priority order; shared with
+# the early-stop watcher so generation ends where cleaning would cut
+END_PATTERNS = [
+    r'\n#+\s*Additional Suggestions.*',
+    r'\n#+\s*Actionable Suggestions.*',
+    r'\n#+\s*Recommendations.*',
+    r'\n\*\*Additional Suggestions\*\*.*',
+    r'\nThis optimized resume.*',
+    r'\nActionable Suggestions:.*'
+]
 
 def clean_resume_content(resume_text):
     """Clean up the resume content and ensure proper formatting"""
+    start = time.perf_counter()
     # Remove any remaining suggestions text
-    end_patterns = [
-        r'\n#+\s*Additional Suggestions.*',
-        r'\n#+\s*Actionable Suggestions.*',
-        r'\n#+\s*Recommendations.*',
-        r'\n\*\*Additional Suggestions\*\*.*',
-        r'\nThis optimized resume.*',
-        r'\nActionable Suggestions:.*'
-    ]
-    
-    for pattern in end_patterns:
+    for pattern in END_PATTERNS:
         match = re.search(pattern, resume_text, re.IGNORECASE | re.DOTALL)
         if match:
             resume_text = resume_text[:match.start()]
@@ -140,73 +226,21 @@ def clean_resume_content(resume_text):
     # Remove extra whitespace
     resume_text = re.sub(r'\n\n\n+', '\n\n', resume_text)
     
+    observe('clean_content', time.perf_counter() - start)
     return resume_text.strip()
 
-def markdown_to_pdf(markdown_content):
-    """Convert markdown content to PDF"""
-    try:
-        # Convert Markdown to HTML
-        html_content = markdown.markdown(markdown_content)
-        
-        # Add styling
-        styled_html = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <meta charset="utf-8">
-            <style>
-                body {{
-                    font-family: 'Arial', sans-serif;
-                    line-height: 1.6;
-                    margin: 40px;
-                    color: #333;
-                    max-width: 800px;
-                }}
-                h1 {{
-                    color: #2c3e50;
-                    border-bottom: 2px solid #3498db;
-                    padding-bottom: 10px;
-                    font-size: 28px;
-                }}
-                h2 {{
-                    color: #34495e;
-                    margin-top: 25px;
-                    font-size: 20px;
-                }}
-                h3 {{
-                    color: #7f8c8d;
-                    font-size: 16px;
-                }}
-                ul {{
-                    margin-left: 20px;
-                }}
-                li {{
-                    margin-bottom: 5px;
-                }}
-                p {{
-                    margin-bottom: 10px;
-                }}
-                strong {{
-                    color: #2c3e50;
-                }}
-            </style>
-        </head>
-        <body>
-            {html_content}
-        </body>
-        </html>
-        """
-        
-        # Convert HTML to PDF
-        pdf_bytes = HTML(string=styled_html).write_pdf()
-        return pdf_bytes
-    
-    except Exception as e:
-        st.error(f"Error generating PDF: {str(e)}")
-        return None
+# Theme of the PDF, HTML export and print preview
+PDF_THEME = 'resume'
+
+def start_pdf_render(markdown_content):
+    """Start rendering the resume PDF in the background and return its Future"""
+    # Renders are cached by markdown + theme, so every rerun gets the same Future
+    return render_pdf_async(markdown_content, theme=PDF_THEME)
 
 # Main App
 def main():
+    setup_page()
+    
     # Header
     st.markdown('<h1 class="main-header">🚀 AI Resume Optimizer</h1>', unsafe_allow_html=True)
     st.markdown('<p style="text-align: center; color: #7f8c8d; font-size: 18px;">Transform your resume to match any job description using AI</p>', unsafe_allow_html=True)
@@ -226,6 +260,17 @@ def main():
             st.warning("Please enter your Gemini API key to continue.")
             st.info("Get your free API key from [Google AI Studio](https://makersuite.google.com/app/apikey)")
         
+        st.session_state.stream_output = st.checkbox(
+            "Stream output as it is generated",
+            value=st.session_state.stream_output,
+            help="Show the answer live while the AI writes it instead of waiting for the full response"
+        )
+        st.session_state.use_cache = st.checkbox(
+            "Reuse answers for identical inputs",
+            value=st.session_state.use_cache,
+            help="Untick to skip the response cache and get a fresh variant from the AI"
+        )
+        
         st.header("📋 Instructions")
         st.markdown("""
         1. **Enter your Gemini API key** (free from Google AI Studio)
@@ -258,6 +303,12 @@ def main():
             if resume_text:
                 with st.expander("📖 Preview Extracted Text"):
                     st.text_area("Resume Content", resume_text, height=200, disabled=True)
+                    stats = extraction_stats()
+                    st.caption(
+                        f"Parsed in {st.session_state.last_parse_seconds * 1000:.0f} ms · "
+                        f"extraction cache hit rate {stats['hit_rate']:.0%} · "
+                        f"{stats['saved_seconds']:.2f} s of parsing saved"
+                    )
     
     with col2:
         st.subheader("🎯 Job Description")
@@ -273,39 +324,98 @@ def main():
         
         col1, col2, col3 = st.columns([1, 2, 1])
         with col2:
-            if st.button("🚀 Optimize Resume", type="primary", use_container_width=True):
-                if resume_text:
-                    with st.spinner("🤖 AI is optimizing your resume... This may take a few moments."):
-                        optimized_resume = optimize_resume_with_gemini(resume_text, job_description, api_key)
-                    
-                    if optimized_resume:
-                        # Clean the optimized resume
-                        cleaned_resume = clean_resume_content(optimized_resume)
-                        st.session_state.optimized_resume = cleaned_resume
-                        
-                        st.markdown('<div class="success-message">✅ Resume optimized successfully!</div>', unsafe_allow_html=True)
-                else:
-                    st.error("Could not extract text from the uploaded PDF. Please try a different file.")
+            optimize_clicked = st.button("🚀 Optimize Resume", type="primary", use_container_width=True)
+        
+        if optimize_clicked:
+            if resume_text:
+                # Generation runs on a worker thread so reruns don't lose it;
+                # only the job ID lives in session state
+                st.session_state.job_id = job_manager.submit(
+                    run_optimization_job, resume_text, job_description, api_key,
+                    st.session_state.use_cache, st.session_state.stream_output,
+                    owner=current_session_id()
+                )
+            else:
+                st.error("Could not extract text from the uploaded PDF. Please try a different file.")
+    
+    # Poll the background job, and pick up its result once it has finished
+    if st.session_state.job_id:
+        job = job_manager.get(st.session_state.job_id)
+        if job is None:
+            # Expired, or lost with a server restart
+            st.session_state.job_id = None
+            st.warning("The previous optimization is no longer available. Please run it again.")
+        elif not job.finished:
+            show_job_progress(job, "🤖 AI is optimizing your resume... This may take a few moments.", st.session_state.stream_output)
+        else:
+            st.session_state.job_id = None
+            if job.error is not None:
+                st.error(f"Error calling Gemini API: {str(job.error)}")
+            elif job.result['optimized_resume']:
+                st.session_state.optimized_resume = job.result['optimized_resume']
+                
+                st.markdown('<div class="success-message">✅ Resume optimized successfully!</div>', unsafe_allow_html=True)
+                if job.result['from_store']:
+                    st.caption("📦 Reused the saved result for these exact inputs")
+                if job.first_output_seconds is not None:
+                    st.caption(f"⚡ First tokens after {job.first_output_seconds:.1f} s")
+                compaction = job.result['compaction']
+                if compaction and compaction['tokens_saved'] > 0:
+                    st.caption(f"✂️ Trimmed ~{compaction['tokens_saved']} input tokens of boilerplate and PDF noise before sending")
+                early_stop = job.result['early_stop']
+                if early_stop and early_stop['tokens_saved'] is not None:
+                    st.caption(f"🛑 Stopped the AI at its trailing suggestions, saving ~{early_stop['tokens_saved']} output tokens and ~{early_stop['seconds_saved']:.1f} s")
+                elif early_stop:
+                    st.caption("🛑 Stopped the AI at its trailing suggestions")
+                usage = usage_ledger.totals(session=current_session_id())
+                if usage['calls']:
+                    st.caption(f"🧮 This session so far: {usage['prompt_tokens']:,} prompt + {usage['output_tokens']:,} output tokens over {usage['calls']} AI calls (~${usage['cost_usd']:.4f})")
     
     # Display optimized resume
+    pdf_pending = False
     if st.session_state.optimized_resume:
         st.markdown("---")
         st.subheader("✨ Optimized Resume")
         
+        # HTML export and print preview share the PDF's markdown conversion
+        # and theme CSS but skip WeasyPrint, so they are ready in milliseconds
+        html_export = render_html(st.session_state.optimized_resume, theme=PDF_THEME)
+        pages = estimate_pages(st.session_state.optimized_resume, theme=PDF_THEME)
+        
         # Display in two columns
         col1, col2 = st.columns([2, 1])
         
         with col1:
             st.markdown(st.session_state.optimized_resume)
+            
+            with st.expander(f"🖨️ Print preview (about {pages} page(s))"):
+                show_html_preview(html_export)
         
         with col2:
             st.subheader("📥 Download")
             
-            # Generate PDF
-            pdf_bytes = markdown_to_pdf(st.session_state.optimized_resume)
+            # The PDF needs a full WeasyPrint layout, so it is only rendered on
+            # request (or ahead of time with PDF_PRERENDER=1); the download
+            # button appears once the bytes have arrived
+            pdf_future = find_pdf_render(st.session_state.optimized_resume, theme=PDF_THEME)
+            pdf_bytes = None
+            if pdf_future is not None and pdf_future.done():
+                if pdf_future.exception() is not None:
+                    # Failed renders are forgotten once reported, so the button below retries
+                    st.error(f"Error generating PDF: {str(pdf_future.exception())}")
+                    pdf_future = None
+                else:
+                    pdf_bytes = pdf_future.result()
+            if pdf_future is None and st.button("📄 Prepare PDF", use_container_width=True):
+                pdf_future = start_pdf_render(st.session_state.optimized_resume)
+            if pdf_future is None:
+                st.caption(f"📏 About {pages} page(s) as PDF")
+            elif pdf_bytes is None:
+                pdf_pending = True
+                st.info("⏳ Preparing your PDF... The download button appears here when it's ready.")
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             
             if pdf_bytes:
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
                 filename = f"optimized_resume_{timestamp}.pdf"
                 
                 st.download_button(
@@ -328,10 +438,19 @@ def main():
                 use_container_width=True
             )
             
+            # Download as HTML, which prints with the same page setup as the PDF
+            st.download_button(
+                label="🌐 Download HTML",
+                data=html_export,
+                file_name=f"optimized_resume_{timestamp}.html",
+                mime="text/html",
+                use_container_width=True
+            )
+            
             # Clear button
             if st.button("🗑️ Clear Results", use_container_width=True):
                 st.session_state.optimized_resume = ""
-                st.experimental_rerun()
+                rerun()
     
     # Footer
     st.markdown("---")
@@ -339,6 +458,10 @@ def main():
         '<p style="text-align: center; color: #7f8c8d;">Made by ❤️ JA</p>',
         unsafe_allow_html=True
     )
+    
+    # Keep checking on a running job or PDF render once the page is drawn
+    if st.session_state.job_id or pdf_pending:
+        wait_and_rerun()
 
 if __name__ == "__main__":
     main()
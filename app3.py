@@ -1,72 +1,95 @@
 # app.py - Streamlit CV Generator App
 import streamlit as st
-import google.generativeai as genai
-import markdown
-from weasyprint import HTML
 import io
+import json
 import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 
-# Configure page
-st.set_page_config(
-    page_title="AI CV Generator",
-    page_icon="📝",
-    layout="wide",
-    initial_sidebar_state="expanded"
-)
-
-# Custom CSS for better styling
-st.markdown("""
-<style>
-    .main-header {
-        text-align: center;
-        color: #2c3e50;
-        margin-bottom: 2rem;
-    }
-    .section-header {
-        background-color: #f8f9fa;
-        padding: 1rem;
-        border-radius: 10px;
-        margin: 1rem 0;
-        border-left: 4px solid #3498db;
-    }
-    .info-box {
-        background-color: #e8f4fd;
-        padding: 1rem;
-        border-radius: 8px;
-        margin: 1rem 0;
-        border: 1px solid #3498db;
-    }
-    .success-message {
-        background-color: #d4edda;
-        color: #155724;
-        padding: 1rem;
-        border-radius: 5px;
-        margin: 1rem 0;
-    }
-    .error-message {
-        background-color: #f8d7da;
-        color: #721c24;
-        padding: 1rem;
-        border-radius: 5px;
-        margin: 1rem 0;
-    }
-    .form-section {
-        background-color: #fafafa;
-        padding: 1.5rem;
-        border-radius: 10px;
-        margin: 1rem 0;
-    }
-</style>
-""", unsafe_allow_html=True)
+from artifact_store import artifact_store
+from compaction import compact_job_description, compaction_report, estimate_tokens
+from jobs import job_manager
+from llm import current_session_id, generate_text, result_key
+from metrics import span, start_exporter
+from pdf_render import PRERENDER, estimate_pages, find_pdf_render, render_html, render_pdf_async
+from streaming_preview import rerun, show_html_preview, show_job_progress, wait_and_rerun
+from usage import usage_ledger
+
+def setup_page():
+    """Configure the page, custom styling and session state"""
+    # Configure page
+    st.set_page_config(
+        page_title="AI CV Generator",
+        page_icon="📝",
+        layout="wide",
+        initial_sidebar_state="expanded"
+    )
 
-# Initialize session state
-if 'api_key' not in st.session_state:
-    st.session_state.api_key = ""
-if 'generated_cv' not in st.session_state:
-    st.session_state.generated_cv = ""
-if 'user_data' not in st.session_state:
-    st.session_state.user_data = {}
+    # Custom CSS for better styling
+    st.markdown("""
+    <style>
+        .main-header {
+            text-align: center;
+            color: #2c3e50;
+            margin-bottom: 2rem;
+        }
+        .section-header {
+            background-color: #f8f9fa;
+            padding: 1rem;
+            border-radius: 10px;
+            margin: 1rem 0;
+            border-left: 4px solid #3498db;
+        }
+        .info-box {
+            background-color: #e8f4fd;
+            padding: 1rem;
+            border-radius: 8px;
+            margin: 1rem 0;
+            border: 1px solid #3498db;
+        }
+        .success-message {
+            background-color: #d4edda;
+            color: #155724;
+            padding: 1rem;
+            border-radius: 5px;
+            margin: 1rem 0;
+        }
+        .error-message {
+            background-color: #f8d7da;
+            color: #721c24;
+            padding: 1rem;
+            border-radius: 5px;
+            margin: 1rem 0;
+        }
+        .form-section {
+            background-color: #fafafa;
+            padding: 1.5rem;
+            border-radius: 10px;
+            margin: 1rem 0;
+        }
+    </style>
+    """, unsafe_allow_html=True)
+
+    # Stage latency histograms on $METRICS_PORT / $METRICS_FILE, once per process
+    start_exporter()
+
+    # Initialize session state
+    if 'api_key' not in st.session_state:
+        st.session_state.api_key = ""
+    if 'stream_output' not in st.session_state:
+        st.session_state.stream_output = True
+    if 'use_cache' not in st.session_state:
+        st.session_state.use_cache = True
+    if 'job_id' not in st.session_state:
+        st.session_state.job_id = None
+    if 'generated_cv' not in st.session_state:
+        st.session_state.generated_cv = ""
+    if 'user_data' not in st.session_state:
+        st.session_state.user_data = {}
+    if 'previous_cv' not in st.session_state:
+        st.session_state.previous_cv = ""
+    if 'cv_job_description' not in st.session_state:
+        st.session_state.cv_job_description = ""
 
 def collect_user_information():
     """Collect comprehensive user information for CV generation"""
@@ -191,119 +214,118 @@ def collect_user_information():
     
     return user_data
 
-def generate_cv_with_gemini(user_data, job_description, api_key):
-    """Use Gemini API to generate a tailored CV"""
-    try:
-        # Configure Gemini API
-        genai.configure(api_key=api_key)
-        model = genai.GenerativeModel('gemini-1.5-flash')
-        
-        # Convert user data to structured format for the prompt
-        newline = '\n'
-        
-        # Build full name
-        full_name = f"{user_data.get('first_name', '').strip()} {user_data.get('last_name', '').strip()}".strip()
-        
-        # Helper function to build sections only if data exists
-        def build_section(title, items):
-            if not items:
-                return ""
-            return f"{title}:{newline}{items}{newline}"
-        
-        # Build personal info section (only include non-empty fields)
-        personal_info = []
-        personal_info.append(f"- Name: {full_name}" if full_name else "")
-        personal_info.append(f"- Email: {user_data.get('email', '')}" if user_data.get('email', '').strip() else "")
-        personal_info.append(f"- Phone: {user_data.get('phone', '')}" if user_data.get('phone', '').strip() else "")
-        personal_info.append(f"- Location: {user_data.get('location', '')}" if user_data.get('location', '').strip() else "")
-        personal_info.append(f"- LinkedIn: {user_data.get('linkedin', '')}" if user_data.get('linkedin', '').strip() else "")
-        personal_info.append(f"- Website: {user_data.get('website', '')}" if user_data.get('website', '').strip() else "")
-        
-        # Filter out empty entries
-        personal_info = [info for info in personal_info if info]
-        personal_info_text = newline.join(personal_info) if personal_info else ""
-        
-        # Format education entries (only include if data exists)
-        education_entries = []
-        for edu in user_data.get('education', []):
-            if edu.get('degree', '').strip() and edu.get('institution', '').strip():
-                entry = f"• {edu.get('degree', '')} - {edu.get('institution', '')}"
-                if edu.get('graduation_date', '').strip():
-                    entry += f" ({edu.get('graduation_date', '')})"
-                if edu.get('gpa', '').strip():
-                    entry += f" - GPA: {edu.get('gpa', '')}"
-                education_entries.append(entry)
-        
-        education_text = newline.join(education_entries) if education_entries else ""
-        
-        # Format experience entries (only include if data exists)
-        experience_entries = []
-        for exp in user_data.get('experience', []):
-            if exp.get('job_title', '').strip() and exp.get('company', '').strip():
-                entry = f"• {exp.get('job_title', '')} at {exp.get('company', '')}"
-                
-                # Add dates if provided
-                start_date = exp.get('start_date', '').strip()
-                end_date = exp.get('end_date', '').strip()
-                if start_date and end_date:
-                    entry += f" ({start_date} - {end_date})"
-                elif start_date:
-                    entry += f" ({start_date} - Present)"
-                
-                # Add responsibilities if provided
-                if exp.get('responsibilities', '').strip():
-                    entry += f"{newline}Responsibilities:{newline}{exp.get('responsibilities', '')}"
-                
-                experience_entries.append(entry)
-        
-        experience_text = newline.join(experience_entries) if experience_entries else ""
-        
-        # Build skills section (only if skills exist)
-        skills_entries = []
-        if user_data.get('technical_skills', '').strip():
-            skills_entries.append(f"Technical: {user_data.get('technical_skills', '')}")
-        if user_data.get('soft_skills', '').strip():
-            skills_entries.append(f"Soft Skills: {user_data.get('soft_skills', '')}")
-        
-        skills_text = newline.join(skills_entries) if skills_entries else ""
-        
-        # Build additional info section (only include non-empty fields)
-        additional_info = []
-        if user_data.get('certifications', '').strip():
-            additional_info.append(f"Certifications: {user_data.get('certifications', '')}")
-        if user_data.get('languages', '').strip():
-            additional_info.append(f"Languages: {user_data.get('languages', '')}")
-        if user_data.get('projects', '').strip():
-            additional_info.append(f"Projects: {user_data.get('projects', '')}")
-        if user_data.get('awards', '').strip():
-            additional_info.append(f"Awards: {user_data.get('awards', '')}")
-        
-        additional_info_text = newline.join(additional_info) if additional_info else ""
-        
-        # Build the complete user info text with only non-empty sections
-        user_info_sections = []
-        
-        if personal_info_text:
-            user_info_sections.append(f"PERSONAL INFORMATION:{newline}{personal_info_text}")
-        
-        if user_data.get('summary', '').strip():
-            user_info_sections.append(f"PROFESSIONAL SUMMARY:{newline}{user_data.get('summary', '')}")
-        
-        if education_text:
-            user_info_sections.append(f"EDUCATION:{newline}{education_text}")
-        
-        if experience_text:
-            user_info_sections.append(f"WORK EXPERIENCE:{newline}{experience_text}")
-        
-        if skills_text:
-            user_info_sections.append(f"SKILLS:{newline}{skills_text}")
-        
-        if additional_info_text:
-            user_info_sections.append(f"ADDITIONAL INFORMATION:{newline}{additional_info_text}")
-        
-        user_info_text = f"{newline}{newline}".join(user_info_sections)
+def build_cv_user_info(user_data):
+    """Format the collected form data as the USER INFORMATION block, skipping empty fields"""
+    # Convert user data to structured format for the prompt
+    newline = '\n'
+    
+    # Build full name
+    full_name = f"{user_data.get('first_name', '').strip()} {user_data.get('last_name', '').strip()}".strip()
+    
+    # Helper function to build sections only if data exists
+    def build_section(title, items):
+        if not items:
+            return ""
+        return f"{title}:{newline}{items}{newline}"
+    
+    # Build personal info section (only include non-empty fields)
+    personal_info = []
+    personal_info.append(f"- Name: {full_name}" if full_name else "")
+    personal_info.append(f"- Email: {user_data.get('email', '')}" if user_data.get('email', '').strip() else "")
+    personal_info.append(f"- Phone: {user_data.get('phone', '')}" if user_data.get('phone', '').strip() else "")
+    personal_info.append(f"- Location: {user_data.get('location', '')}" if user_data.get('location', '').strip() else "")
+    personal_info.append(f"- LinkedIn: {user_data.get('linkedin', '')}" if user_data.get('linkedin', '').strip() else "")
+    personal_info.append(f"- Website: {user_data.get('website', '')}" if user_data.get('website', '').strip() else "")
+    
+    # Filter out empty entries
+    personal_info = [info for info in personal_info if info]
+    personal_info_text = newline.join(personal_info) if personal_info else ""
+    
+    # Format education entries (only include if data exists)
+    education_entries = []
+    for edu in user_data.get('education', []):
+        if edu.get('degree', '').strip() and edu.get('institution', '').strip():
+            entry = f"• {edu.get('degree', '')} - {edu.get('institution', '')}"
+            if edu.get('graduation_date', '').strip():
+                entry += f" ({edu.get('graduation_date', '')})"
+            if edu.get('gpa', '').strip():
+                entry += f" - GPA: {edu.get('gpa', '')}"
+            education_entries.append(entry)
+    
+    education_text = newline.join(education_entries) if education_entries else ""
+    
+    # Format experience entries (only include if data exists)
+    experience_entries = []
+    for exp in user_data.get('experience', []):
+        if exp.get('job_title', '').strip() and exp.get('company', '').strip():
+            entry = f"• {exp.get('job_title', '')} at {exp.get('company', '')}"
+            
+            # Add dates if provided
+            start_date = exp.get('start_date', '').strip()
+            end_date = exp.get('end_date', '').strip()
+            if start_date and end_date:
+                entry += f" ({start_date} - {end_date})"
+            elif start_date:
+                entry += f" ({start_date} - Present)"
+            
+            # Add responsibilities if provided
+            if exp.get('responsibilities', '').strip():
+                entry += f"{newline}Responsibilities:{newline}{exp.get('responsibilities', '')}"
+            
+            experience_entries.append(entry)
+    
+    experience_text = newline.join(experience_entries) if experience_entries else ""
+    
+    # Build skills section (only if skills exist)
+    skills_entries = []
+    if user_data.get('technical_skills', '').strip():
+        skills_entries.append(f"Technical: {user_data.get('technical_skills', '')}")
+    if user_data.get('soft_skills', '').strip():
+        skills_entries.append(f"Soft Skills: {user_data.get('soft_skills', '')}")
+    
+    skills_text = newline.join(skills_entries) if skills_entries else ""
+    
+    # Build additional info section (only include non-empty fields)
+    additional_info = []
+    if user_data.get('certifications', '').strip():
+        additional_info.append(f"Certifications: {user_data.get('certifications', '')}")
+    if user_data.get('languages', '').strip():
+        additional_info.append(f"Languages: {user_data.get('languages', '')}")
+    if user_data.get('projects', '').strip():
+        additional_info.append(f"Projects: {user_data.get('projects', '')}")
+    if user_data.get('awards', '').strip():
+        additional_info.append(f"Awards: {user_data.get('awards', '')}")
+    
+    additional_info_text = newline.join(additional_info) if additional_info else ""
+    
+    # Build the complete user info text with only non-empty sections
+    user_info_sections = []
+    
+    if personal_info_text:
+        user_info_sections.append(f"PERSONAL INFORMATION:{newline}{personal_info_text}")
+    
+    if user_data.get('summary', '').strip():
+        user_info_sections.append(f"PROFESSIONAL SUMMARY:{newline}{user_data.get('summary', '')}")
+    
+    if education_text:
+        user_info_sections.append(f"EDUCATION:{newline}{education_text}")
+    
+    if experience_text:
+        user_info_sections.append(f"WORK EXPERIENCE:{newline}{experience_text}")
+    
+    if skills_text:
+        user_info_sections.append(f"SKILLS:{newline}{skills_text}")
+    
+    if additional_info_text:
+        user_info_sections.append(f"ADDITIONAL INFORMATION:{newline}{additional_info_text}")
+    
+    return f"{newline}{newline}".join(user_info_sections)
 
-        prompt = f"""
+def build_cv_prompt(user_data, job_description):
+    """Build the CV generation prompt sent to Gemini"""
+    user_info_text = build_cv_user_info(user_data)
+
+    return f"""
 You are a professional CV writer. Create a comprehensive, ATS-optimized CV based on the user information and tailored to the job description.
 
 IMPORTANT: Output ONLY the complete CV in clean markdown format. Do not include any suggestions, advice, or additional text.
@@ -327,109 +349,223 @@ JOB DESCRIPTION TO TAILOR FOR:
 OUTPUT THE COMPLETE CV IN MARKDOWN FORMAT:
 """
 
-        response = model.generate_content(
-            prompt,
-            generation_config=genai.types.GenerationConfig(
-                temperature=0.7,
-                max_output_tokens=4000,
-                top_p=0.8,
-                top_k=40
-            )
-        )
-        
-        return response.text
-    
-    except Exception as e:
-        st.error(f"Error calling Gemini API: {str(e)}")
+def generate_cv_with_gemini(user_data, job_description, api_key, on_chunk=None, use_cache=True, on_queue=None, reports=None):
+    """Use Gemini API to generate a tailored CV.
+
+    Runs in a background job: API errors propagate to the job, and the
+    compaction report is stored in the reports dict.
+    """
+    reports = {} if reports is None else reports
+    # Strip JD boilerplate (EEO statements, benefits) before paying for tokens
+    with span('prompt_build'):
+        compact_job = compact_job_description(job_description)
+        reports['compaction'] = compaction_report(job_description, compact_job)
+        prompt = build_cv_prompt(user_data, compact_job)
+
+    # Streams partial text to on_chunk when given; identical requests are
+    # served from the response cache unless use_cache is False
+    return generate_text(api_key, prompt, on_chunk=on_chunk, use_cache=use_cache, on_queue=on_queue, app='cv')
+
+# Form fields behind each part of the CV; editing a field only touches the
+# sections built from its group
+CV_FIELD_GROUPS = {
+    'header': ['first_name', 'last_name', 'email', 'phone', 'location', 'linkedin', 'website'],
+    'summary': ['summary'],
+    'education': ['education'],
+    'experience': ['experience'],
+    'skills': ['technical_skills', 'soft_skills'],
+    'certifications': ['certifications'],
+    'languages': ['languages'],
+    'projects': ['projects'],
+    'awards': ['awards'],
+}
+
+# Keywords in a generated "## " heading and the field groups that section is built from
+CV_HEADING_GROUPS = [
+    (('summary', 'profile', 'objective', 'about'), ('summary',)),
+    (('education', 'academic', 'qualification'), ('education',)),
+    (('experience', 'employment', 'work history', 'career'), ('experience',)),
+    (('skill', 'competenc', 'expertise', 'technolog'), ('skills',)),
+    (('certif', 'licens'), ('certifications',)),
+    (('language',), ('languages',)),
+    (('project',), ('projects',)),
+    (('award', 'achievement', 'honor', 'honour'), ('awards',)),
+    (('additional', 'other'), ('certifications', 'languages', 'projects', 'awards')),
+]
+
+# Above this share of sections changed, one full rewrite is as cheap and reads more coherently
+INCREMENTAL_MAX_FRACTION = 0.5
+
+def changed_cv_groups(old_data, new_data):
+    """Field groups whose values differ between two collect_user_information results"""
+    return {
+        group for group, fields in CV_FIELD_GROUPS.items()
+        if any(old_data.get(field) != new_data.get(field) for field in fields)
+    }
+
+def split_cv_sections(cv_markdown):
+    """Split a CV into its header block and one chunk per "## " section.
+
+    Returns (groups, chunk) pairs; the chunks join back into the original text.
+    """
+    sections = []
+    for chunk in re.split(r'(?m)^(?=## )', cv_markdown):
+        if not chunk:
+            continue
+        if not chunk.startswith('## '):
+            # Name and contact details above the first section
+            sections.append(({'header'}, chunk))
+            continue
+        heading = chunk.split('\n', 1)[0].lower()
+        groups = set()
+        for keywords, heading_groups in CV_HEADING_GROUPS:
+            if any(keyword in heading for keyword in keywords):
+                groups.update(heading_groups)
+        sections.append((groups, chunk))
+    return sections
+
+def build_cv_section_prompt(section_text, user_info_text, job_description):
+    """Build the prompt that rewrites one existing CV section after an edit"""
+    return f"""
+You are a professional CV writer updating ONE section of an existing CV after the candidate edited their details.
+
+IMPORTANT: Output ONLY the updated section in clean markdown, starting with the same heading line. Do not write any other section, suggestions, or additional text.
+
+Guidelines:
+- Keep the heading, formatting and tone of the current section
+- Reflect the updated information; leave out anything no longer provided
+- Tailor the content to match the job description keywords
+- Use strong action verbs and quantifiable achievements
+- Use bullet points for easy reading
+
+CURRENT SECTION:
+{section_text.strip()}
+
+UPDATED USER INFORMATION FOR THIS SECTION:
+{user_info_text}
+
+JOB DESCRIPTION TO TAILOR FOR:
+{job_description}
+
+OUTPUT THE UPDATED SECTION IN MARKDOWN FORMAT:
+"""
+
+def splice_cv_section(old_chunk, new_text):
+    """Replace a section chunk, keeping its heading line and trailing spacing"""
+    heading = old_chunk.split('\n', 1)[0]
+    new_text = new_text.strip()
+    if not new_text.startswith('#'):
+        # The model skipped the heading despite the instructions
+        new_text = f"{heading}\n{new_text}"
+    trailing = old_chunk[len(old_chunk.rstrip()):]
+    return new_text + (trailing or '\n\n')
+
+def regenerate_cv_sections(previous_cv, previous_data, user_data, job_description, api_key, on_chunk=None, use_cache=True, on_queue=None, reports=None):
+    """Regenerate only the CV sections affected by the edited fields.
+
+    Returns the spliced CV, or None when a full rewrite is needed instead
+    (nothing or too much changed, or an edited field has no section yet).
+    """
+    reports = {} if reports is None else reports
+    changed = changed_cv_groups(previous_data, user_data)
+    sections = split_cv_sections(previous_cv)
+    covered = set().union(*(groups for groups, _ in sections)) if sections else set()
+    if not changed or not changed <= covered:
         return None
 
-def markdown_to_pdf(markdown_content):
-    """Convert markdown content to PDF with professional styling"""
-    try:
-        # Convert Markdown to HTML
-        html_content = markdown.markdown(markdown_content)
-        
-        # Professional CV styling
-        styled_html = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <meta charset="utf-8">
-            <style>
-                @page {{
-                    size: A4;
-                    margin: 1in;
-                }}
-                body {{
-                    font-family: 'Calibri', 'Arial', sans-serif;
-                    line-height: 1.5;
-                    color: #333333;
-                    max-width: 100%;
-                    font-size: 11pt;
-                }}
-                h1 {{
-                    color: #2c3e50;
-                    font-size: 24pt;
-                    margin-bottom: 5px;
-                    border-bottom: 2px solid #3498db;
-                    padding-bottom: 5px;
-                }}
-                h2 {{
-                    color: #34495e;
-                    font-size: 14pt;
-                    margin-top: 20px;
-                    margin-bottom: 10px;
-                    text-transform: uppercase;
-                    font-weight: bold;
-                }}
-                h3 {{
-                    color: #2c3e50;
-                    font-size: 12pt;
-                    margin-bottom: 5px;
-                    font-weight: bold;
-                }}
-                h4 {{
-                    color: #7f8c8d;
-                    font-size: 10pt;
-                    margin-bottom: 5px;
-                    font-style: italic;
-                }}
-                ul {{
-                    margin-left: 20px;
-                    margin-bottom: 10px;
-                }}
-                li {{
-                    margin-bottom: 3px;
-                }}
-                p {{
-                    margin-bottom: 8px;
-                    text-align: justify;
-                }}
-                strong {{
-                    color: #2c3e50;
-                }}
-                .contact-info {{
-                    text-align: center;
-                    margin-bottom: 20px;
-                    color: #7f8c8d;
-                }}
-            </style>
-        </head>
-        <body>
-            {html_content}
-        </body>
-        </html>
-        """
-        
-        # Convert HTML to PDF
-        pdf_bytes = HTML(string=styled_html).write_pdf()
-        return pdf_bytes
-    
-    except Exception as e:
-        st.error(f"Error generating PDF: {str(e)}")
+    targets = [i for i, (groups, _) in enumerate(sections) if groups & changed]
+    if len(targets) > len(sections) * INCREMENTAL_MAX_FRACTION:
         return None
 
+    chunks = [chunk for _, chunk in sections]
+    prompts = {}
+    with span('prompt_build'):
+        compact_job = compact_job_description(job_description)
+        for i in targets:
+            fields = [field for group in sections[i][0] for field in CV_FIELD_GROUPS[group]]
+            user_info_text = build_cv_user_info({field: user_data[field] for field in fields if field in user_data})
+            if user_info_text:
+                prompts[i] = build_cv_section_prompt(chunks[i], user_info_text, compact_job)
+            else:
+                # Every field behind this section was cleared
+                chunks[i] = ""
+
+    # Sections are independent, so they are rewritten concurrently; the
+    # session is passed along because pool threads don't know the job's owner
+    session = current_session_id()
+    with ThreadPoolExecutor(max_workers=max(1, len(prompts))) as executor:
+        futures = {
+            executor.submit(generate_text, api_key, prompt, use_cache=use_cache, on_queue=on_queue,
+                            app='cv', session=session): i
+            for i, prompt in prompts.items()
+        }
+        # Collected on this thread so on_chunk always sees a whole document
+        for future in as_completed(futures):
+            i = futures[future]
+            chunks[i] = splice_cv_section(chunks[i], future.result())
+            if on_chunk is not None:
+                on_chunk("".join(chunks))
+
+    report = compaction_report(job_description, compact_job)
+    reports['compaction'] = {k: v * len(prompts) for k, v in report.items()}
+    reports['incremental'] = {
+        'sections': len(targets),
+        'total_sections': len(sections),
+        'tokens': sum(estimate_tokens(prompt) for prompt in prompts.values()),
+        'full_tokens': estimate_tokens(build_cv_prompt(user_data, compact_job)),
+    }
+    return "".join(chunks).strip()
+
+def update_cv_with_gemini(previous_cv, previous_data, previous_job_description, user_data, job_description, api_key, on_chunk=None, use_cache=True, on_queue=None, reports=None):
+    """Patch the previous CV section by section when possible, else generate it anew"""
+    reports = {} if reports is None else reports
+    reports['incremental'] = None
+    # A new job description changes the tailoring of every section
+    if previous_cv and job_description == previous_job_description:
+        updated_cv = regenerate_cv_sections(previous_cv, previous_data, user_data, job_description, api_key, on_chunk=on_chunk, use_cache=use_cache, on_queue=on_queue, reports=reports)
+        if updated_cv:
+            return updated_cv
+    return generate_cv_with_gemini(user_data, job_description, api_key, on_chunk=on_chunk, use_cache=use_cache, on_queue=on_queue, reports=reports)
+
+def run_generation_job(job, previous_cv, previous_data, previous_job_description, user_data, job_description, api_key, use_cache, stream_output):
+    """Background job: generate or patch the CV, returning it with its inputs and reports"""
+    reports = {'user_data': user_data, 'job_description': job_description,
+               'compaction': None, 'incremental': None, 'from_store': False}
+    # Finished CVs are shared through the artifact store, so the same inputs
+    # in another session or server process skip generation entirely
+    key = result_key('cv', json.dumps(user_data, sort_keys=True), job_description)
+    stored = artifact_store.get_text(key) if use_cache else None
+    if stored is not None:
+        reports['generated_cv'] = stored
+        reports['from_store'] = True
+        if PRERENDER:
+            start_pdf_render(stored)
+        return reports
+    reports['generated_cv'] = update_cv_with_gemini(
+        previous_cv, previous_data, previous_job_description, user_data, job_description, api_key,
+        on_chunk=job.update if stream_output else None,
+        use_cache=use_cache,
+        on_queue=job.set_queue_position,
+        reports=reports
+    )
+    if reports['generated_cv']:
+        artifact_store.put_text(key, reports['generated_cv'])
+        if PRERENDER:
+            # Render while the user reads the preview
+            start_pdf_render(reports['generated_cv'])
+    return reports
+
+# Theme of the PDF, HTML export and print preview
+PDF_THEME = 'cv-a4'
+
+def start_pdf_render(markdown_content):
+    """Start rendering the CV PDF in the background and return its Future"""
+    # Renders are cached by markdown + theme, so every rerun gets the same Future
+    return render_pdf_async(markdown_content, theme=PDF_THEME)
+
 def main():
+    setup_page()
+    
     # Header
     st.markdown('<h1 class="main-header">📝 AI CV Generator</h1>', unsafe_allow_html=True)
     st.markdown('<p style="text-align: center; color: #7f8c8d; font-size: 18px;">Create a professional CV tailored to any job description using AI</p>', unsafe_allow_html=True)
@@ -449,6 +585,17 @@ def main():
             st.warning("Please enter your Gemini API key to continue.")
             st.info("Get your free API key from [Google AI Studio](https://makersuite.google.com/app/apikey)")
         
+        st.session_state.stream_output = st.checkbox(
+            "Stream output as it is generated",
+            value=st.session_state.stream_output,
+            help="Show the answer live while the AI writes it instead of waiting for the full response"
+        )
+        st.session_state.use_cache = st.checkbox(
+            "Reuse answers for identical inputs",
+            value=st.session_state.use_cache,
+            help="Untick to skip the response cache and get a fresh variant from the AI"
+        )
+        
         st.header("📋 How It Works")
         st.markdown("""
         1. **Enter your Gemini API key**
@@ -504,31 +651,94 @@ Requirements: Bachelor's degree in Computer Science, 2+ years of experience, str
     st.markdown("---")
     col1, col2, col3 = st.columns([1, 2, 1])
     with col2:
-        if st.button("🚀 Generate Professional CV", type="primary", use_container_width=True):
-            with st.spinner("🤖 AI is creating your professional CV... This may take a few moments."):
-                generated_cv = generate_cv_with_gemini(user_data, job_description, api_key)
-            
-            if generated_cv:
-                st.session_state.generated_cv = generated_cv
-                st.session_state.user_data = user_data
+        generate_clicked = st.button("🚀 Generate Professional CV", type="primary", use_container_width=True)
+    
+    if generate_clicked:
+        # After "Edit & Regenerate" only the edited sections are rewritten
+        previous_cv = st.session_state.previous_cv or st.session_state.generated_cv
+        # Generation runs on a worker thread so reruns don't lose it;
+        # only the job ID lives in session state
+        st.session_state.job_id = job_manager.submit(
+            run_generation_job, previous_cv, st.session_state.user_data, st.session_state.cv_job_description,
+            user_data, job_description, api_key, st.session_state.use_cache, st.session_state.stream_output,
+            owner=current_session_id()
+        )
+    
+    # Poll the background job, and pick up its result once it has finished
+    if st.session_state.job_id:
+        job = job_manager.get(st.session_state.job_id)
+        if job is None:
+            # Expired, or lost with a server restart
+            st.session_state.job_id = None
+            st.warning("The previous CV generation is no longer available. Please run it again.")
+        elif not job.finished:
+            show_job_progress(job, "🤖 AI is creating your professional CV... This may take a few moments.", st.session_state.stream_output)
+        else:
+            st.session_state.job_id = None
+            if job.error is not None:
+                st.error(f"Error calling Gemini API: {str(job.error)}")
+            elif job.result['generated_cv']:
+                st.session_state.generated_cv = job.result['generated_cv']
+                st.session_state.previous_cv = ""
+                st.session_state.user_data = job.result['user_data']
+                st.session_state.cv_job_description = job.result['job_description']
                 st.markdown('<div class="success-message">✅ CV generated successfully!</div>', unsafe_allow_html=True)
+                if job.result['from_store']:
+                    st.caption("📦 Reused the saved result for these exact inputs")
+                incremental = job.result['incremental']
+                if incremental:
+                    st.caption(f"♻️ Rewrote {incremental['sections']} of {incremental['total_sections']} sections (~{incremental['tokens']} input tokens instead of ~{incremental['full_tokens']}) and kept the rest")
+                if job.first_output_seconds is not None:
+                    st.caption(f"⚡ First tokens after {job.first_output_seconds:.1f} s")
+                compaction = job.result['compaction']
+                if compaction and compaction['tokens_saved'] > 0:
+                    st.caption(f"✂️ Trimmed ~{compaction['tokens_saved']} input tokens of boilerplate and PDF noise before sending")
+                usage = usage_ledger.totals(session=current_session_id())
+                if usage['calls']:
+                    st.caption(f"🧮 This session so far: {usage['prompt_tokens']:,} prompt + {usage['output_tokens']:,} output tokens over {usage['calls']} AI calls (~${usage['cost_usd']:.4f})")
     
     # Display Generated CV
+    pdf_pending = False
     if st.session_state.generated_cv:
         st.markdown("---")
         st.subheader("✨ Your Professional CV")
         
+        # HTML export and print preview share the PDF's markdown conversion
+        # and theme CSS but skip WeasyPrint, so they are ready in milliseconds
+        html_export = render_html(st.session_state.generated_cv, theme=PDF_THEME)
+        pages = estimate_pages(st.session_state.generated_cv, theme=PDF_THEME)
+        
         # Display in columns
         col1, col2 = st.columns([3, 1])
         
         with col1:
             st.markdown(st.session_state.generated_cv)
+            
+            with st.expander(f"🖨️ Print preview (about {pages} page(s))"):
+                show_html_preview(html_export)
         
         with col2:
             st.subheader("📥 Download Options")
             
-            # Generate PDF
-            pdf_bytes = markdown_to_pdf(st.session_state.generated_cv)
+            # The PDF needs a full WeasyPrint layout, so it is only rendered on
+            # request (or ahead of time with PDF_PRERENDER=1); the download
+            # button appears once the bytes have arrived
+            pdf_future = find_pdf_render(st.session_state.generated_cv, theme=PDF_THEME)
+            pdf_bytes = None
+            if pdf_future is not None and pdf_future.done():
+                if pdf_future.exception() is not None:
+                    # Failed renders are forgotten once reported, so the button below retries
+                    st.error(f"Error generating PDF: {str(pdf_future.exception())}")
+                    pdf_future = None
+                else:
+                    pdf_bytes = pdf_future.result()
+            if pdf_future is None and st.button("📄 Prepare PDF", use_container_width=True):
+                pdf_future = start_pdf_render(st.session_state.generated_cv)
+            if pdf_future is None:
+                st.caption(f"📏 About {pages} page(s) as PDF")
+            elif pdf_bytes is None:
+                pdf_pending = True
+                st.info("⏳ Preparing your PDF... The download button appears here when it's ready.")
             
             if pdf_bytes:
                 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -559,16 +769,29 @@ Requirements: Bachelor's degree in Computer Science, 2+ years of experience, str
                 use_container_width=True
             )
             
+            # Download as HTML, which prints with the same page setup as the PDF
+            html_filename = f"{full_name.replace(' ', '_')}_CV_{timestamp}.html" if full_name else f"CV_{timestamp}.html"
+            st.download_button(
+                label="🌐 Download as HTML",
+                data=html_export,
+                file_name=html_filename,
+                mime="text/html",
+                use_container_width=True
+            )
+            
             # Edit and Regenerate
             if st.button("✏️ Edit & Regenerate", use_container_width=True):
+                # Kept so the next generate only rewrites the edited sections
+                st.session_state.previous_cv = st.session_state.generated_cv
                 st.session_state.generated_cv = ""
-                st.experimental_rerun()
+                rerun()
             
             # Clear All
             if st.button("🗑️ Start Over", use_container_width=True):
                 st.session_state.generated_cv = ""
+                st.session_state.previous_cv = ""
                 st.session_state.user_data = {}
-                st.experimental_rerun()
+                rerun()
     
     # Footer
     st.markdown("---")
@@ -576,6 +799,10 @@ Requirements: Bachelor's degree in Computer Science, 2+ years of experience, str
         '<p style="text-align: center; color: #7f8c8d;">Made by JA ❤️ | Create professional CVs in minutes</p>',
         unsafe_allow_html=True
     )
+    
+    # Keep checking on a running job or PDF render once the page has rendered
+    if st.session_state.job_id or pdf_pending:
+        wait_and_rerun()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,80 +1,101 @@
 # app.py - Streamlit LinkedIn Profile Optimizer App
 import streamlit as st
-import google.generativeai as genai
-import markdown
-from weasyprint import HTML
 import io
+import json
 import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 
-# Configure page
-st.set_page_config(
-    page_title="AI LinkedIn Profile Optimizer",
-    page_icon="💼",
-    layout="wide",
-    initial_sidebar_state="expanded"
-)
-
-# Custom CSS for better styling
-st.markdown("""
-<style>
-    .main-header {
-        text-align: center;
-        color: #0077b5;
-        margin-bottom: 2rem;
-    }
-    .section-header {
-        background-color: #f8f9fa;
-        padding: 1rem;
-        border-radius: 10px;
-        margin: 1rem 0;
-        border-left: 4px solid #0077b5;
-    }
-    .info-box {
-        background-color: #e8f4fd;
-        padding: 1rem;
-        border-radius: 8px;
-        margin: 1rem 0;
-        border: 1px solid #0077b5;
-    }
-    .linkedin-preview {
-        background-color: #ffffff;
-        border: 1px solid #e0e0e0;
-        border-radius: 10px;
-        padding: 2rem;
-        margin: 1rem 0;
-        box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-    }
-    .success-message {
-        background-color: #d4edda;
-        color: #155724;
-        padding: 1rem;
-        border-radius: 5px;
-        margin: 1rem 0;
-    }
-    .error-message {
-        background-color: #f8d7da;
-        color: #721c24;
-        padding: 1rem;
-        border-radius: 5px;
-        margin: 1rem 0;
-    }
-    .linkedin-section {
-        margin-bottom: 1.5rem;
-        padding: 1rem;
-        background-color: #fafafa;
-        border-radius: 8px;
-    }
-</style>
-""", unsafe_allow_html=True)
-
-# Initialize session state
-if 'api_key' not in st.session_state:
-    st.session_state.api_key = ""
-if 'optimized_profile' not in st.session_state:
-    st.session_state.optimized_profile = ""
-if 'user_data' not in st.session_state:
-    st.session_state.user_data = {}
+from artifact_store import artifact_store
+from compaction import compact_job_description, compaction_report
+from jobs import job_manager
+from llm import current_session_id, generate_text, result_key
+from metrics import span, start_exporter
+from pdf_render import PRERENDER, estimate_pages, find_pdf_render, render_html, render_pdf_async
+from streaming_preview import rerun, show_html_preview, show_job_progress, wait_and_rerun
+from usage import usage_ledger
+
+def setup_page():
+    """Configure the page, custom styling and session state"""
+    # Configure page
+    st.set_page_config(
+        page_title="AI LinkedIn Profile Optimizer",
+        page_icon="💼",
+        layout="wide",
+        initial_sidebar_state="expanded"
+    )
+
+    # Custom CSS for better styling
+    st.markdown("""
+    <style>
+        .main-header {
+            text-align: center;
+            color: #0077b5;
+            margin-bottom: 2rem;
+        }
+        .section-header {
+            background-color: #f8f9fa;
+            padding: 1rem;
+            border-radius: 10px;
+            margin: 1rem 0;
+            border-left: 4px solid #0077b5;
+        }
+        .info-box {
+            background-color: #e8f4fd;
+            padding: 1rem;
+            border-radius: 8px;
+            margin: 1rem 0;
+            border: 1px solid #0077b5;
+        }
+        .linkedin-preview {
+            background-color: #ffffff;
+            border: 1px solid #e0e0e0;
+            border-radius: 10px;
+            padding: 2rem;
+            margin: 1rem 0;
+            box-shadow: 0 2px 4px rgba(0,0,0,0.1);
+        }
+        .success-message {
+            background-color: #d4edda;
+            color: #155724;
+            padding: 1rem;
+            border-radius: 5px;
+            margin: 1rem 0;
+        }
+        .error-message {
+            background-color: #f8d7da;
+            color: #721c24;
+            padding: 1rem;
+            border-radius: 5px;
+            margin: 1rem 0;
+        }
+        .linkedin-section {
+            margin-bottom: 1.5rem;
+            padding: 1rem;
+            background-color: #fafafa;
+            border-radius: 8px;
+        }
+    </style>
+    """, unsafe_allow_html=True)
+
+    # Stage latency histograms on $METRICS_PORT / $METRICS_FILE, once per process
+    start_exporter()
+
+    # Initialize session state
+    if 'api_key' not in st.session_state:
+        st.session_state.api_key = ""
+    if 'stream_output' not in st.session_state:
+        st.session_state.stream_output = True
+    if 'use_cache' not in st.session_state:
+        st.session_state.use_cache = True
+    if 'job_id' not in st.session_state:
+        st.session_state.job_id = None
+    if 'parallel_sections' not in st.session_state:
+        st.session_state.parallel_sections = False
+    if 'optimized_profile' not in st.session_state:
+        st.session_state.optimized_profile = ""
+    if 'user_data' not in st.session_state:
+        st.session_state.user_data = {}
 
 def collect_linkedin_information():
     """Collect comprehensive LinkedIn profile information"""
@@ -211,108 +232,107 @@ def collect_linkedin_information():
     
     return user_data
 
-def optimize_linkedin_with_gemini(user_data, target_role, api_key):
-    """Use Gemini API to optimize LinkedIn profile"""
-    try:
-        # Configure Gemini API
-        genai.configure(api_key=api_key)
-        model = genai.GenerativeModel('gemini-1.5-flash')
-        
-        # Convert user data to structured format
-        newline = '\n'
-        
-        # Build full name
-        full_name = f"{user_data.get('first_name', '').strip()} {user_data.get('last_name', '').strip()}".strip()
-        
-        # Format experience entries
-        experience_entries = []
-        for exp in user_data.get('experience', []):
-            if exp.get('job_title', '').strip() and exp.get('company', '').strip():
-                entry = f"• {exp.get('job_title', '')} at {exp.get('company', '')}"
-                entry += f" ({exp.get('employment_type', 'Full-time')})"
-                
-                # Add dates if provided
-                if exp.get('start_date', '').strip() and exp.get('end_date', '').strip():
-                    entry += f" | {exp.get('start_date', '')} - {exp.get('end_date', '')}"
-                
-                # Add location if provided
-                if exp.get('location', '').strip():
-                    entry += f" | {exp.get('location', '')}"
-                
-                # Add description if provided
-                if exp.get('description', '').strip():
-                    entry += f"{newline}{exp.get('description', '')}"
-                
-                experience_entries.append(entry)
-        
-        experience_text = newline.join(experience_entries) if experience_entries else ""
-        
-        # Format education entries
-        education_entries = []
-        for edu in user_data.get('education', []):
-            if edu.get('degree', '').strip() and edu.get('school', '').strip():
-                entry = f"• {edu.get('degree', '')} - {edu.get('school', '')}"
-                
-                if edu.get('start_year', '').strip() and edu.get('end_year', '').strip():
-                    entry += f" ({edu.get('start_year', '')} - {edu.get('end_year', '')})"
-                
-                if edu.get('activities', '').strip():
-                    entry += f"{newline}Activities: {edu.get('activities', '')}"
-                
-                education_entries.append(entry)
-        
-        education_text = newline.join(education_entries) if education_entries else ""
-        
-        # Build user info sections
-        user_info_sections = []
-        
-        # Basic info
-        basic_info = [f"Name: {full_name}"]
-        if user_data.get('current_title', '').strip():
-            basic_info.append(f"Current Title: {user_data.get('current_title', '')}")
-        if user_data.get('location', '').strip():
-            basic_info.append(f"Location: {user_data.get('location', '')}")
-        if user_data.get('industry', '').strip():
-            basic_info.append(f"Industry: {user_data.get('industry', '')}")
-        
-        user_info_sections.append(f"BASIC INFORMATION:{newline}{newline.join(basic_info)}")
-        
-        # Current profile content
-        if user_data.get('current_headline', '').strip():
-            user_info_sections.append(f"CURRENT HEADLINE:{newline}{user_data.get('current_headline', '')}")
-        
-        if user_data.get('current_about', '').strip():
-            user_info_sections.append(f"CURRENT ABOUT SECTION:{newline}{user_data.get('current_about', '')}")
-        
-        # Experience
-        if experience_text:
-            user_info_sections.append(f"WORK EXPERIENCE:{newline}{experience_text}")
-        
-        # Education
-        if education_text:
-            user_info_sections.append(f"EDUCATION:{newline}{education_text}")
-        
-        # Skills
-        if user_data.get('skills', '').strip():
-            user_info_sections.append(f"SKILLS:{newline}{user_data.get('skills', '')}")
-        
-        # Additional sections
-        additional_info = []
-        if user_data.get('certifications', '').strip():
-            additional_info.append(f"Certifications:{newline}{user_data.get('certifications', '')}")
-        if user_data.get('projects', '').strip():
-            additional_info.append(f"Projects:{newline}{user_data.get('projects', '')}")
-        if user_data.get('volunteer', '').strip():
-            additional_info.append(f"Volunteer Experience:{newline}{user_data.get('volunteer', '')}")
-        if user_data.get('languages', '').strip():
-            additional_info.append(f"Languages:{newline}{user_data.get('languages', '')}")
-        
-        if additional_info:
-            user_info_sections.append(f"ADDITIONAL INFORMATION:{newline}{newline.join(additional_info)}")
-        
-        user_info_text = f"{newline}{newline}".join(user_info_sections)
+def build_linkedin_user_info(user_data):
+    """Format the collected profile data as the USER PROFILE INFORMATION block"""
+    # Convert user data to structured format
+    newline = '\n'
+    
+    # Build full name
+    full_name = f"{user_data.get('first_name', '').strip()} {user_data.get('last_name', '').strip()}".strip()
+    
+    # Format experience entries
+    experience_entries = []
+    for exp in user_data.get('experience', []):
+        if exp.get('job_title', '').strip() and exp.get('company', '').strip():
+            entry = f"• {exp.get('job_title', '')} at {exp.get('company', '')}"
+            entry += f" ({exp.get('employment_type', 'Full-time')})"
+            
+            # Add dates if provided
+            if exp.get('start_date', '').strip() and exp.get('end_date', '').strip():
+                entry += f" | {exp.get('start_date', '')} - {exp.get('end_date', '')}"
+            
+            # Add location if provided
+            if exp.get('location', '').strip():
+                entry += f" | {exp.get('location', '')}"
+            
+            # Add description if provided
+            if exp.get('description', '').strip():
+                entry += f"{newline}{exp.get('description', '')}"
+            
+            experience_entries.append(entry)
+    
+    experience_text = newline.join(experience_entries) if experience_entries else ""
+    
+    # Format education entries
+    education_entries = []
+    for edu in user_data.get('education', []):
+        if edu.get('degree', '').strip() and edu.get('school', '').strip():
+            entry = f"• {edu.get('degree', '')} - {edu.get('school', '')}"
+            
+            if edu.get('start_year', '').strip() and edu.get('end_year', '').strip():
+                entry += f" ({edu.get('start_year', '')} - {edu.get('end_year', '')})"
+            
+            if edu.get('activities', '').strip():
+                entry += f"{newline}Activities: {edu.get('activities', '')}"
+            
+            education_entries.append(entry)
+    
+    education_text = newline.join(education_entries) if education_entries else ""
+    
+    # Build user info sections
+    user_info_sections = []
+    
+    # Basic info
+    basic_info = [f"Name: {full_name}"]
+    if user_data.get('current_title', '').strip():
+        basic_info.append(f"Current Title: {user_data.get('current_title', '')}")
+    if user_data.get('location', '').strip():
+        basic_info.append(f"Location: {user_data.get('location', '')}")
+    if user_data.get('industry', '').strip():
+        basic_info.append(f"Industry: {user_data.get('industry', '')}")
+    
+    user_info_sections.append(f"BASIC INFORMATION:{newline}{newline.join(basic_info)}")
+    
+    # Current profile content
+    if user_data.get('current_headline', '').strip():
+        user_info_sections.append(f"CURRENT HEADLINE:{newline}{user_data.get('current_headline', '')}")
+    
+    if user_data.get('current_about', '').strip():
+        user_info_sections.append(f"CURRENT ABOUT SECTION:{newline}{user_data.get('current_about', '')}")
+    
+    # Experience
+    if experience_text:
+        user_info_sections.append(f"WORK EXPERIENCE:{newline}{experience_text}")
+    
+    # Education
+    if education_text:
+        user_info_sections.append(f"EDUCATION:{newline}{education_text}")
+    
+    # Skills
+    if user_data.get('skills', '').strip():
+        user_info_sections.append(f"SKILLS:{newline}{user_data.get('skills', '')}")
+    
+    # Additional sections
+    additional_info = []
+    if user_data.get('certifications', '').strip():
+        additional_info.append(f"Certifications:{newline}{user_data.get('certifications', '')}")
+    if user_data.get('projects', '').strip():
+        additional_info.append(f"Projects:{newline}{user_data.get('projects', '')}")
+    if user_data.get('volunteer', '').strip():
+        additional_info.append(f"Volunteer Experience:{newline}{user_data.get('volunteer', '')}")
+    if user_data.get('languages', '').strip():
+        additional_info.append(f"Languages:{newline}{user_data.get('languages', '')}")
+    
+    if additional_info:
+        user_info_sections.append(f"ADDITIONAL INFORMATION:{newline}{newline.join(additional_info)}")
+    
+    return f"{newline}{newline}".join(user_info_sections)
 
-        prompt = f"""
+def build_linkedin_prompt(user_data, target_role):
+    """Build the full-profile optimization prompt sent to Gemini"""
+    user_info_text = build_linkedin_user_info(user_data)
+
+    return f"""
 You are a LinkedIn profile optimization expert. Create an optimized LinkedIn profile that will attract recruiters and align with the target role.
 
 IMPORTANT: Structure your response with clear sections for each part of the LinkedIn profile. Use professional language that's engaging and keyword-rich.
@@ -355,104 +375,155 @@ Structure your response as follows:
 Create the optimized profile now:
 """
 
-        response = model.generate_content(
-            prompt,
-            generation_config=genai.types.GenerationConfig(
-                temperature=0.7,
-                max_output_tokens=4000,
-                top_p=0.8,
-                top_k=40
-            )
-        )
-        
-        return response.text
-    
-    except Exception as e:
-        st.error(f"Error calling Gemini API: {str(e)}")
-        return None
+def optimize_linkedin_with_gemini(user_data, target_role, api_key, on_chunk=None, use_cache=True, on_queue=None, reports=None):
+    """Use Gemini API to optimize LinkedIn profile.
 
-def markdown_to_pdf(markdown_content):
-    """Convert markdown content to PDF with LinkedIn-style formatting"""
-    try:
-        # Convert Markdown to HTML
-        html_content = markdown.markdown(markdown_content)
-        
-        # LinkedIn-style formatting
-        styled_html = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <meta charset="utf-8">
-            <style>
-                @page {{
-                    size: A4;
-                    margin: 1in;
-                }}
-                body {{
-                    font-family: 'Arial', sans-serif;
-                    line-height: 1.6;
-                    color: #333333;
-                    max-width: 100%;
-                    font-size: 11pt;
-                }}
-                h1 {{
-                    color: #0077b5;
-                    font-size: 24pt;
-                    margin-bottom: 10px;
-                    text-align: center;
-                    border-bottom: 2px solid #0077b5;
-                    padding-bottom: 10px;
-                }}
-                h2 {{
-                    color: #0077b5;
-                    font-size: 16pt;
-                    margin-top: 25px;
-                    margin-bottom: 10px;
-                    font-weight: bold;
-                }}
-                h3 {{
-                    color: #2c3e50;
-                    font-size: 14pt;
-                    margin-bottom: 8px;
-                }}
-                ul {{
-                    margin-left: 20px;
-                    margin-bottom: 15px;
-                }}
-                li {{
-                    margin-bottom: 5px;
-                }}
-                p {{
-                    margin-bottom: 10px;
-                    text-align: justify;
-                }}
-                strong {{
-                    color: #0077b5;
-                }}
-                .linkedin-section {{
-                    background-color: #f8f9fa;
-                    padding: 15px;
-                    border-radius: 8px;
-                    margin-bottom: 20px;
-                    border-left: 4px solid #0077b5;
-                }}
-            </style>
-        </head>
-        <body>
-            {html_content}
-        </body>
-        </html>
-        """
-        
-        # Convert HTML to PDF
-        pdf_bytes = HTML(string=styled_html).write_pdf()
-        return pdf_bytes
+    Runs in a background job: API errors propagate to the job, and the
+    compaction report is stored in the reports dict.
+    """
+    reports = {} if reports is None else reports
+    with span('prompt_build'):
+        # Target roles are often pasted job ads; strip their boilerplate first
+        compact_role = compact_job_description(target_role)
+        reports['compaction'] = compaction_report(target_role, compact_role)
+        prompt = build_linkedin_prompt(user_data, compact_role)
+
+    # Streams partial text to on_chunk when given; identical requests are
+    # served from the response cache unless use_cache is False
+    return generate_text(api_key, prompt, on_chunk=on_chunk, use_cache=use_cache, on_queue=on_queue, app='linkedin')
+
+# Sections requested independently in parallel mode, in profile order:
+# (heading, what the model should write for it)
+LINKEDIN_SECTIONS = [
+    ("Professional Headline", "Write one compelling professional headline (120 characters max)."),
+    ("About Section", "Write an engaging About/Summary section (2000 characters max)."),
+    ("Experience Section Improvements", "Provide optimized descriptions for each job, maintaining chronological order. Use strong action verbs and quantified achievements."),
+    ("Skills Optimization", "Provide a prioritized list of skills for the target role."),
+    ("Additional Recommendations", "Provide any other suggestions for profile improvement."),
+]
+
+def build_linkedin_section_prompt(user_info_text, target_role, heading, instructions):
+    """Build the prompt for a single profile section"""
+    return f"""
+You are a LinkedIn profile optimization expert. You are writing ONE section of an optimized LinkedIn profile that will attract recruiters and align with the target role.
+
+IMPORTANT: Output ONLY the content of the "{heading}" section in markdown. Do not repeat the section heading and do not write any other section.
+
+Task:
+{instructions}
+
+Guidelines:
+- Use professional language that's engaging and keyword-rich
+- Use industry keywords naturally
+- Make it ATS-friendly and recruiter-appealing
+- Maintain authenticity while optimizing for discoverability
+
+USER PROFILE INFORMATION:
+{user_info_text}
+
+TARGET ROLE/CAREER GOAL:
+{target_role}
+
+Write the {heading} section now:
+"""
+
+def strip_section_heading(section_text, heading):
+    """Drop a leading heading line if the model repeated it anyway"""
+    lines = section_text.strip().split('\n')
+    if lines and lines[0].lstrip('#').strip().lower() == heading.lower():
+        lines = lines[1:]
+    return '\n'.join(lines).strip()
+
+def assemble_linkedin_profile(sections):
+    """Join finished sections into the standard OPTIMIZED LINKEDIN PROFILE layout"""
+    parts = ["# OPTIMIZED LINKEDIN PROFILE"]
+    for heading, _ in LINKEDIN_SECTIONS:
+        if heading in sections:
+            parts.append(f"## {heading}\n{sections[heading]}")
+    return "\n\n".join(parts)
+
+def optimize_linkedin_by_section(user_data, target_role, api_key, on_chunk=None, use_cache=True, on_queue=None, reports=None):
+    """Use concurrent per-section Gemini requests to optimize LinkedIn profile"""
+    reports = {} if reports is None else reports
+    with span('prompt_build'):
+        user_info_text = build_linkedin_user_info(user_data)
+        # Target roles are often pasted job ads; strip their boilerplate first
+        compact_role = compact_job_description(target_role)
+    # Every section prompt repeats the target role, so savings multiply
+    report = compaction_report(target_role, compact_role)
+    reports['compaction'] = {k: v * len(LINKEDIN_SECTIONS) for k, v in report.items()}
+    target_role = compact_role
+    sections = {}
     
-    except Exception as e:
-        st.error(f"Error generating PDF: {str(e)}")
-        return None
+    # One smaller request per section, so total latency is roughly the
+    # slowest section instead of one long sequential completion. The session
+    # is passed along because pool threads don't know the job's owner
+    session = current_session_id()
+    with ThreadPoolExecutor(max_workers=len(LINKEDIN_SECTIONS)) as executor:
+        futures = {
+            executor.submit(
+                generate_text,
+                api_key,
+                build_linkedin_section_prompt(user_info_text, target_role, heading, instructions),
+                use_cache=use_cache,
+                on_queue=on_queue,
+                app='linkedin',
+                session=session
+            ): heading
+            for heading, instructions in LINKEDIN_SECTIONS
+        }
+        # Collected on this thread so on_chunk always sees a whole profile
+        for future in as_completed(futures):
+            heading = futures[future]
+            sections[heading] = strip_section_heading(future.result(), heading)
+            if on_chunk is not None:
+                on_chunk(assemble_linkedin_profile(sections))
+    
+    return assemble_linkedin_profile(sections)
+
+def run_optimization_job(job, user_data, target_role, api_key, use_cache, stream_output, parallel_sections):
+    """Background job: optimize the profile, returning it with its inputs and reports"""
+    if parallel_sections:
+        optimize = optimize_linkedin_by_section
+    else:
+        optimize = optimize_linkedin_with_gemini
+    reports = {'user_data': user_data, 'compaction': None, 'from_store': False}
+    # Finished profiles are shared through the artifact store, so the same
+    # inputs in another session or server process skip generation entirely
+    key = result_key('linkedin', json.dumps(user_data, sort_keys=True), target_role,
+                     'sections' if parallel_sections else 'single')
+    stored = artifact_store.get_text(key) if use_cache else None
+    if stored is not None:
+        reports['optimized_profile'] = stored
+        reports['from_store'] = True
+        if PRERENDER:
+            start_pdf_render(stored)
+        return reports
+    reports['optimized_profile'] = optimize(
+        user_data, target_role, api_key,
+        on_chunk=job.update if stream_output else None,
+        use_cache=use_cache,
+        on_queue=job.set_queue_position,
+        reports=reports
+    )
+    if reports['optimized_profile']:
+        artifact_store.put_text(key, reports['optimized_profile'])
+        if PRERENDER:
+            # Render while the user reads the preview
+            start_pdf_render(reports['optimized_profile'])
+    return reports
+
+# Theme of the PDF, HTML export and print preview
+PDF_THEME = 'linkedin-blue'
+
+def start_pdf_render(markdown_content):
+    """Start rendering the profile PDF in the background and return its Future"""
+    # Renders are cached by markdown + theme, so every rerun gets the same Future
+    return render_pdf_async(markdown_content, theme=PDF_THEME)
 
 def main():
+    setup_page()
+    
     # Header
     st.markdown('<h1 class="main-header">💼 AI LinkedIn Profile Optimizer</h1>', unsafe_allow_html=True)
     st.markdown('<p style="text-align: center; color: #7f8c8d; font-size: 18px;">Optimize your LinkedIn profile to attract recruiters and land your dream job</p>', unsafe_allow_html=True)
@@ -472,6 +543,22 @@ def main():
             st.warning("Please enter your Gemini API key to continue.")
             st.info("Get your free API key from [Google AI Studio](https://makersuite.google.com/app/apikey)")
         
+        st.session_state.stream_output = st.checkbox(
+            "Stream output as it is generated",
+            value=st.session_state.stream_output,
+            help="Show the answer live while the AI writes it instead of waiting for the full response"
+        )
+        st.session_state.use_cache = st.checkbox(
+            "Reuse answers for identical inputs",
+            value=st.session_state.use_cache,
+            help="Untick to skip the response cache and get a fresh variant from the AI"
+        )
+        st.session_state.parallel_sections = st.checkbox(
+            "Generate sections in parallel",
+            value=st.session_state.parallel_sections,
+            help="Request each profile section separately and at the same time for a faster result"
+        )
+        
         st.header("📋 How It Works")
         st.markdown("""
         1. **Enter your Gemini API key**
@@ -529,20 +616,56 @@ Interested in leadership opportunities and mentoring junior developers."""
     st.markdown("---")
     col1, col2, col3 = st.columns([1, 2, 1])
     with col2:
-        if st.button("🚀 Optimize LinkedIn Profile", type="primary", use_container_width=True):
-            with st.spinner("🤖 AI is optimizing your LinkedIn profile... This may take a few moments."):
-                optimized_profile = optimize_linkedin_with_gemini(user_data, target_role, api_key)
-            
-            if optimized_profile:
-                st.session_state.optimized_profile = optimized_profile
-                st.session_state.user_data = user_data
+        generate_clicked = st.button("🚀 Optimize LinkedIn Profile", type="primary", use_container_width=True)
+    
+    if generate_clicked:
+        # Generation runs on a worker thread so reruns don't lose it;
+        # only the job ID lives in session state
+        st.session_state.job_id = job_manager.submit(
+            run_optimization_job, user_data, target_role, api_key,
+            st.session_state.use_cache, st.session_state.stream_output, st.session_state.parallel_sections,
+            owner=current_session_id()
+        )
+    
+    # Poll the background job, and pick up its result once it has finished
+    if st.session_state.job_id:
+        job = job_manager.get(st.session_state.job_id)
+        if job is None:
+            # Expired, or lost with a server restart
+            st.session_state.job_id = None
+            st.warning("The previous optimization is no longer available. Please run it again.")
+        elif not job.finished:
+            show_job_progress(job, "🤖 AI is optimizing your LinkedIn profile... This may take a few moments.", st.session_state.stream_output)
+        else:
+            st.session_state.job_id = None
+            if job.error is not None:
+                st.error(f"Error calling Gemini API: {str(job.error)}")
+            elif job.result['optimized_profile']:
+                st.session_state.optimized_profile = job.result['optimized_profile']
+                st.session_state.user_data = job.result['user_data']
                 st.markdown('<div class="success-message">✅ LinkedIn profile optimized successfully!</div>', unsafe_allow_html=True)
+                if job.result['from_store']:
+                    st.caption("📦 Reused the saved result for these exact inputs")
+                if job.first_output_seconds is not None:
+                    st.caption(f"⚡ First tokens after {job.first_output_seconds:.1f} s")
+                compaction = job.result['compaction']
+                if compaction and compaction['tokens_saved'] > 0:
+                    st.caption(f"✂️ Trimmed ~{compaction['tokens_saved']} input tokens of boilerplate and PDF noise before sending")
+                usage = usage_ledger.totals(session=current_session_id())
+                if usage['calls']:
+                    st.caption(f"🧮 This session so far: {usage['prompt_tokens']:,} prompt + {usage['output_tokens']:,} output tokens over {usage['calls']} AI calls (~${usage['cost_usd']:.4f})")
     
     # Display Optimized Profile
+    pdf_pending = False
     if st.session_state.optimized_profile:
         st.markdown("---")
         st.subheader("✨ Your Optimized LinkedIn Profile")
         
+        # HTML export and print preview share the PDF's markdown conversion
+        # and theme CSS but skip WeasyPrint, so they are ready in milliseconds
+        html_export = render_html(st.session_state.optimized_profile, theme=PDF_THEME)
+        pages = estimate_pages(st.session_state.optimized_profile, theme=PDF_THEME)
+        
         # Display in columns
         col1, col2 = st.columns([3, 1])
         
@@ -550,12 +673,32 @@ Interested in leadership opportunities and mentoring junior developers."""
             st.markdown('<div class="linkedin-preview">', unsafe_allow_html=True)
             st.markdown(st.session_state.optimized_profile)
             st.markdown('</div>', unsafe_allow_html=True)
+            
+            with st.expander(f"🖨️ Print preview (about {pages} page(s))"):
+                show_html_preview(html_export)
         
         with col2:
             st.subheader("📥 Download & Share")
             
-            # Generate PDF
-            pdf_bytes = markdown_to_pdf(st.session_state.optimized_profile)
+            # The PDF needs a full WeasyPrint layout, so it is only rendered on
+            # request (or ahead of time with PDF_PRERENDER=1); the download
+            # button appears once the bytes have arrived
+            pdf_future = find_pdf_render(st.session_state.optimized_profile, theme=PDF_THEME)
+            pdf_bytes = None
+            if pdf_future is not None and pdf_future.done():
+                if pdf_future.exception() is not None:
+                    # Failed renders are forgotten once reported, so the button below retries
+                    st.error(f"Error generating PDF: {str(pdf_future.exception())}")
+                    pdf_future = None
+                else:
+                    pdf_bytes = pdf_future.result()
+            if pdf_future is None and st.button("📄 Prepare PDF", use_container_width=True):
+                pdf_future = start_pdf_render(st.session_state.optimized_profile)
+            if pdf_future is None:
+                st.caption(f"📏 About {pages} page(s) as PDF")
+            elif pdf_bytes is None:
+                pdf_pending = True
+                st.info("⏳ Preparing your PDF... The download button appears here when it's ready.")
             
             if pdf_bytes:
                 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -586,6 +729,16 @@ Interested in leadership opportunities and mentoring junior developers."""
                 use_container_width=True
             )
             
+            # Download as HTML, which pastes with formatting and prints like the PDF
+            html_filename = f"{full_name.replace(' ', '_')}_LinkedIn_Profile_{timestamp}.html" if full_name else f"LinkedIn_Profile_{timestamp}.html"
+            st.download_button(
+                label="🌐 Download as HTML",
+                data=html_export,
+                file_name=html_filename,
+                mime="text/html",
+                use_container_width=True
+            )
+            
             st.markdown("---")
             st.markdown("**📋 How to Use:**")
             st.markdown("1. Copy each section")
@@ -596,13 +749,13 @@ Interested in leadership opportunities and mentoring junior developers."""
             # Edit and Regenerate
             if st.button("✏️ Edit & Regenerate", use_container_width=True):
                 st.session_state.optimized_profile = ""
-                st.experimental_rerun()
+                rerun()
             
             # Clear All
             if st.button("🗑️ Start Over", use_container_width=True):
                 st.session_state.optimized_profile = ""
                 st.session_state.user_data = {}
-                st.experimental_rerun()
+                rerun()
     
     # Footer
     st.markdown("---")
@@ -610,6 +763,10 @@ Interested in leadership opportunities and mentoring junior developers."""
         '<p style="text-align: center; color: #7f8c8d;">Made by JA ❤️ | Optimize your LinkedIn presence in minutes</p>',
         unsafe_allow_html=True
     )
+    
+    # Keep checking on a running job or PDF render once the page has rendered
+    if st.session_state.job_id or pdf_pending:
+        wait_and_rerun()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
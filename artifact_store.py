@@ -0,0 +1,142 @@
+# artifact_store.py - Persistent on-disk store of generated markdown and rendered PDFs
+"""Finished results shared by every session, process and replica on this disk.
+
+Artifacts are keyed by a digest of their inputs plus a kind ('markdown' for
+a generated resume/CV/profile, 'pdf' for a rendered document). The database
+runs in WAL mode, so readers never block the writer and several Streamlit
+processes can use the same file. Entries expire after ARTIFACT_TTL_SECONDS
+and the least recently used ones are evicted beyond ARTIFACT_MAX_BYTES.
+"""
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_PATH = os.environ.get(
+    'ARTIFACT_STORE_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'artifacts.sqlite3')
+)
+TTL_SECONDS = float(os.environ.get('ARTIFACT_TTL_SECONDS', 7 * 24 * 3600))
+MAX_BYTES = int(os.environ.get('ARTIFACT_MAX_BYTES', 200 * 1024 * 1024))
+
+
+class ArtifactStore:
+    """SQLite-backed (key, kind) -> bytes store with TTL and total-size eviction"""
+
+    def __init__(self, path=DEFAULT_PATH, ttl_seconds=TTL_SECONDS, max_bytes=MAX_BYTES):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._initialized = False
+
+    def _connect(self):
+        # One short-lived connection per operation, as in ResponseCache
+        conn = sqlite3.connect(self.path, timeout=10)
+        # WAL makes fsync at checkpoints enough; a crash can only lose the
+        # newest artifacts, which are regenerated on demand
+        conn.execute("PRAGMA synchronous=NORMAL")
+        if not self._initialized:
+            with self._lock:
+                if not self._initialized:
+                    # Persistent for the database file, so once per process is plenty
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.execute(
+                        """
+                        CREATE TABLE IF NOT EXISTS artifacts (
+                            key TEXT NOT NULL,
+                            kind TEXT NOT NULL,
+                            data BLOB NOT NULL,
+                            size INTEGER NOT NULL,
+                            created_at REAL NOT NULL,
+                            last_used REAL NOT NULL,
+                            PRIMARY KEY (key, kind)
+                        )
+                        """
+                    )
+                    conn.execute("CREATE INDEX IF NOT EXISTS idx_artifacts_last_used ON artifacts(last_used)")
+                    conn.commit()
+                    self._initialized = True
+        return conn
+
+    def get(self, key, kind):
+        """Return the stored bytes, or None if missing or expired"""
+        now = time.time()
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT data, created_at FROM artifacts WHERE key = ? AND kind = ?", (key, kind)
+            ).fetchone()
+            if row is None:
+                return None
+            data, created_at = row
+            if now - created_at > self.ttl_seconds:
+                conn.execute("DELETE FROM artifacts WHERE key = ? AND kind = ?", (key, kind))
+                conn.commit()
+                return None
+            conn.execute("UPDATE artifacts SET last_used = ? WHERE key = ? AND kind = ?", (now, key, kind))
+            conn.commit()
+            return bytes(data)
+        finally:
+            conn.close()
+
+    def put(self, key, kind, data):
+        """Store bytes and evict expired / least recently used artifacts"""
+        if len(data) > self.max_bytes:
+            # Too large to ever fit - don't flush the whole store for it
+            return
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO artifacts (key, kind, data, size, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, kind, sqlite3.Binary(data), len(data), now, now),
+            )
+            self._evict(conn, now)
+            conn.commit()
+        finally:
+            conn.close()
+
+    def get_text(self, key, kind='markdown'):
+        data = self.get(key, kind)
+        return data.decode('utf-8') if data is not None else None
+
+    def put_text(self, key, text, kind='markdown'):
+        self.put(key, kind, text.encode('utf-8'))
+
+    def _evict(self, conn, now):
+        conn.execute("DELETE FROM artifacts WHERE created_at < ?", (now - self.ttl_seconds,))
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM artifacts").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, kind, size in conn.execute(
+            "SELECT key, kind, size FROM artifacts ORDER BY last_used ASC"
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+            conn.execute("DELETE FROM artifacts WHERE key = ? AND kind = ?", (key, kind))
+            total -= size
+
+    def stats(self):
+        """{kind: {'entries', 'bytes'}} for everything currently stored"""
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT kind, COUNT(*), COALESCE(SUM(size), 0) FROM artifacts GROUP BY kind"
+            ).fetchall()
+        finally:
+            conn.close()
+        return {kind: {'entries': entries, 'bytes': size} for kind, entries, size in rows}
+
+
+def open_default_store():
+    """Create the default store, making sure its directory exists"""
+    directory = os.path.dirname(DEFAULT_PATH)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    return ArtifactStore(DEFAULT_PATH)
+
+
+# Shared by all apps in this process (and, through the file, with other processes)
+artifact_store = open_default_store()
@@ -0,0 +1,194 @@
+# batch_optimize.py - Headless batch runner for the resume optimizer pipeline
+"""Optimize every resume PDF against every job description without the UI.
+
+Usage:
+    python batch_optimize.py --resumes resumes/ --jobs jobs/ --out results/ --workers 4
+
+Runs the app.py pipeline (extract -> optimize -> clean -> render) for each
+resume/job pair on a bounded thread pool. Every finished pair is appended to
+results/manifest.jsonl with per-stage timings; re-running the same command
+skips pairs that already completed, so an interrupted batch picks up where it
+stopped. Per-stage latency histograms are written to results/metrics.prom.
+Gemini calls go through the shared rate limiter in the 'batch'
+priority lane, so $LLM_RPM / $LLM_TPM cap the request rate however many
+workers run.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from app import clean_resume_content, extraction_cache, optimize_resume_with_gemini, parse_pdf_bytes
+from caching import content_digest
+from metrics import stage_metrics
+from pdf_render import render_pdf
+
+JOB_EXTENSIONS = ('.txt', '.md')
+MANIFEST_NAME = 'manifest.jsonl'
+METRICS_NAME = 'metrics.prom'
+
+
+def list_files(directory, extensions):
+    return sorted(
+        os.path.join(directory, name)
+        for name in os.listdir(directory)
+        if name.lower().endswith(extensions)
+    )
+
+
+def pair_id(resume_path, job_path):
+    """Stable output name for a resume/job pair"""
+    resume_stem = os.path.splitext(os.path.basename(resume_path))[0]
+    job_stem = os.path.splitext(os.path.basename(job_path))[0]
+    return f"{resume_stem}__{job_stem}"
+
+
+def load_completed(manifest_path):
+    """Return the pair ids already recorded as successful in the manifest"""
+    completed = set()
+    if not os.path.exists(manifest_path):
+        return completed
+    with open(manifest_path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A line cut short by an interruption - that pair is redone
+                continue
+            if record.get('status') == 'ok':
+                completed.add(record['pair'])
+    return completed
+
+
+def extract_resume_text(pdf_bytes):
+    """Parse a resume once, even when it is paired with many job descriptions"""
+    entry = extraction_cache.get_or_compute(
+        content_digest(pdf_bytes), lambda: parse_pdf_bytes(pdf_bytes)
+    )
+    return entry['text']
+
+
+def process_pair(resume_path, job_path, out_dir, api_key, use_cache):
+    """Run one resume/job pair through the pipeline and return its manifest record"""
+    name = pair_id(resume_path, job_path)
+    record = {'pair': name, 'resume': resume_path, 'job': job_path, 'timings': {}}
+    timings = record['timings']
+    stage = 'extract'
+    try:
+        start = time.perf_counter()
+        with open(resume_path, 'rb') as f:
+            resume_text = extract_resume_text(f.read())
+        with open(job_path, encoding='utf-8') as f:
+            job_description = f.read()
+        timings['extract'] = time.perf_counter() - start
+        if not resume_text:
+            raise ValueError("no text could be extracted from the PDF")
+
+        # Compaction happens inside, so its (millisecond) cost is part of 'optimize'
+        stage = 'optimize'
+        start = time.perf_counter()
+        reports = {}
+        optimized = optimize_resume_with_gemini(
+            resume_text, job_description, api_key, use_cache=use_cache, reports=reports,
+            priority='batch', app='batch'
+        )
+        timings['optimize'] = time.perf_counter() - start
+        record['tokens_saved'] = reports['compaction']['tokens_saved']
+        record['early_stop'] = reports['early_stop']
+
+        stage = 'clean'
+        start = time.perf_counter()
+        cleaned = clean_resume_content(optimized)
+        timings['clean'] = time.perf_counter() - start
+
+        md_path = os.path.join(out_dir, name + '.md')
+        with open(md_path, 'w', encoding='utf-8') as f:
+            f.write(cleaned)
+
+        stage = 'render'
+        start = time.perf_counter()
+        pdf_bytes = render_pdf(cleaned, theme='resume')
+        timings['render'] = time.perf_counter() - start
+
+        pdf_path = os.path.join(out_dir, name + '.pdf')
+        with open(pdf_path, 'wb') as f:
+            f.write(pdf_bytes)
+
+        record.update(status='ok', markdown=md_path, pdf=pdf_path)
+    except Exception as e:
+        record.update(status='error', stage=stage, error=str(e))
+    record['total'] = sum(timings.values())
+    return record
+
+
+def run_batch(resume_dir, job_dir, out_dir, api_key, workers=4, use_cache=True):
+    """Process all resume/job pairs not yet completed and return (ok, failed) counts"""
+    os.makedirs(out_dir, exist_ok=True)
+    manifest_path = os.path.join(out_dir, MANIFEST_NAME)
+    completed = load_completed(manifest_path)
+
+    pairs = [
+        (resume_path, job_path)
+        for resume_path in list_files(resume_dir, ('.pdf',))
+        for job_path in list_files(job_dir, JOB_EXTENSIONS)
+        if pair_id(resume_path, job_path) not in completed
+    ]
+    print(f"{len(completed)} pairs already done, {len(pairs)} to process with {workers} workers")
+
+    ok = failed = 0
+    executor = ThreadPoolExecutor(max_workers=workers)
+    try:
+        futures = [
+            executor.submit(process_pair, resume_path, job_path, out_dir, api_key, use_cache)
+            for resume_path, job_path in pairs
+        ]
+        with open(manifest_path, 'a', encoding='utf-8') as manifest:
+            for future in as_completed(futures):
+                record = future.result()
+                # Written as each pair finishes so an interruption loses nothing
+                manifest.write(json.dumps(record) + '\n')
+                manifest.flush()
+                if record['status'] == 'ok':
+                    ok += 1
+                    print(f"✅ {record['pair']} ({record['total']:.1f} s)")
+                else:
+                    failed += 1
+                    print(f"❌ {record['pair']} failed at {record['stage']}: {record['error']}")
+    except KeyboardInterrupt:
+        print("Interrupted - finished pairs are in the manifest, re-run to resume.")
+        executor.shutdown(wait=False, cancel_futures=True)
+        raise
+    executor.shutdown()
+    # Stage latency histograms for this run, in Prometheus text format
+    stage_metrics.write_file(os.path.join(out_dir, METRICS_NAME))
+    return ok, failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Optimize many resumes against many job descriptions")
+    parser.add_argument('--resumes', required=True, help="Directory of resume PDFs")
+    parser.add_argument('--jobs', required=True, help="Directory of job descriptions (.txt/.md)")
+    parser.add_argument('--out', required=True, help="Output directory for PDFs, markdown and the manifest")
+    parser.add_argument('--workers', type=int, default=4, help="Number of pairs processed concurrently")
+    parser.add_argument('--api-key', default=os.environ.get('GEMINI_API_KEY', ''),
+                        help="Gemini API key (defaults to $GEMINI_API_KEY)")
+    parser.add_argument('--no-cache', action='store_true', help="Bypass the LLM response cache")
+    args = parser.parse_args(argv)
+
+    if not args.api_key:
+        parser.error("a Gemini API key is required (--api-key or $GEMINI_API_KEY)")
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+
+    ok, failed = run_batch(
+        args.resumes, args.jobs, args.out, args.api_key,
+        workers=args.workers, use_cache=not args.no_cache,
+    )
+    print(f"Done: {ok} succeeded, {failed} failed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
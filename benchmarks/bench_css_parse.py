@@ -0,0 +1,58 @@
+# benchmarks/bench_css_parse.py - Per-render cost of re-parsing theme CSS
+"""Compare rendering with an inline <style> block (re-parsed on every render,
+as the apps used to do) against the precompiled theme CSS in pdf_render.
+
+Usage:
+    python -m benchmarks.bench_css_parse [--renders 10]
+"""
+import argparse
+import json
+import time
+
+from weasyprint import HTML
+
+from benchmarks.corpora import resume_markdown
+from pdf_render import build_html, get_font_config, get_theme_css, render_in_worker
+from pdf_themes import THEMES
+
+
+def time_renders(render, renders):
+    start = time.perf_counter()
+    for _ in range(renders):
+        render()
+    return (time.perf_counter() - start) / renders
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--renders', type=int, default=10, help="Renders timed per theme and mode")
+    args = parser.parse_args(argv)
+
+    markdown_content = resume_markdown(num_roles=4)
+    # Pay the one-off font and theme setup before timing anything
+    for theme in THEMES:
+        get_theme_css(theme)
+    get_font_config()
+    render_in_worker(markdown_content, 'resume')
+
+    results = {}
+    for theme, stylesheet in THEMES.items():
+        inline = time_renders(
+            lambda: HTML(string=build_html(markdown_content, stylesheet)).write_pdf(),
+            args.renders,
+        )
+        precompiled = time_renders(
+            lambda: render_in_worker(markdown_content, theme), args.renders
+        )
+        results[theme] = {
+            'inline_css_ms': inline * 1000,
+            'precompiled_css_ms': precompiled * 1000,
+            'speedup': inline / precompiled if precompiled else None,
+        }
+        print(f"{theme:<14} inline {inline * 1000:8.1f} ms   precompiled {precompiled * 1000:8.1f} ms   "
+              f"x{results[theme]['speedup']:.2f}")
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+# benchmarks/bench_pdf_extract.py - Sequential vs page-sharded PDF extraction
+"""Time the original page-by-page extraction loop against pdf_extract.extract_text
+on synthetic multi-page PDFs.
+
+Usage:
+    python -m benchmarks.bench_pdf_extract [--pages 10 20 40] [--repeat 3]
+"""
+import argparse
+import io
+import json
+import time
+
+import PyPDF2
+
+from benchmarks.corpora import multipage_pdf
+from compaction import PAGE_BREAK
+from pdf_extract import EXTRACT_WORKERS, extract_text, get_executor
+
+
+def sequential_extract(pdf_bytes):
+    """The extraction loop app.py used before sharding"""
+    pdf_reader = PyPDF2.PdfReader(io.BytesIO(pdf_bytes))
+    text = ""
+    for page in pdf_reader.pages:
+        text += page.extract_text() + "\n"
+    return text.strip()
+
+
+def best_of(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--pages', type=int, nargs='+', default=[10, 20, 40])
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per case; the best is reported")
+    args = parser.parse_args(argv)
+
+    # Start the worker processes before timing so spawn cost isn't counted
+    for future in [get_executor().submit(int) for _ in range(EXTRACT_WORKERS)]:
+        future.result()
+
+    results = {}
+    for num_pages in args.pages:
+        pdf_bytes = multipage_pdf(num_pages)
+        sequential, expected = best_of(lambda: sequential_extract(pdf_bytes), args.repeat)
+        sharded, text = best_of(lambda: extract_text(pdf_bytes, max_pages=None), args.repeat)
+        # Only the page breaks kept for compaction differ from the old loop
+        assert text.replace(f"{PAGE_BREAK}\n", "") == expected, "sharded extraction must match the sequential loop"
+        results[num_pages] = {
+            'sequential_ms': sequential * 1000,
+            'sharded_ms': sharded * 1000,
+            'speedup': sequential / sharded,
+        }
+        print(f"{num_pages:>3} pages   sequential {sequential * 1000:8.1f} ms   "
+              f"sharded {sharded * 1000:8.1f} ms   x{sequential / sharded:.2f}")
+    print(json.dumps({'workers': EXTRACT_WORKERS, 'results': results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
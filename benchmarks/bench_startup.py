@@ -0,0 +1,78 @@
+# benchmarks/bench_startup.py - Cold-start import cost of the apps
+"""Measure how long a fresh interpreter takes to import each app with the heavy
+libraries deferred (as shipped) versus imported eagerly at module top (as the
+apps used to), plus a per-module import-time report for those libraries.
+
+Usage:
+    python -m benchmarks.bench_startup [--repeat 5]
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+APPS = ['app', 'app3', 'app4']
+HEAVY_MODULES = ['weasyprint', 'google.generativeai', 'markdown', 'PyPDF2']
+
+EAGER_IMPORTS = (
+    "import importlib\n"
+    f"for name in {HEAVY_MODULES!r}:\n"
+    "    try:\n"
+    "        importlib.import_module(name)\n"
+    "    except Exception:\n"
+    "        pass\n"
+)
+
+
+def time_subprocess(code, repeat):
+    """Median wall time of running code in a fresh interpreter"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', code], check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def module_import_ms(name):
+    """Cumulative import time of a module from `python -X importtime`, or None if it fails"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {name}'],
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        return None
+    for line in result.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        parts = [part.strip() for part in line.split('|')]
+        if len(parts) == 3 and parts[2] == name:
+            return int(parts[1]) / 1000
+    return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--repeat', type=int, default=5, help="Fresh interpreters per measurement")
+    args = parser.parse_args(argv)
+
+    baseline = time_subprocess("import streamlit", args.repeat)
+    results = {'streamlit_only_ms': baseline * 1000, 'apps': {}, 'modules_ms': {}}
+    for app in APPS:
+        lazy = time_subprocess(f"import {app}", args.repeat)
+        eager = time_subprocess(f"import {app}\n{EAGER_IMPORTS}", args.repeat)
+        results['apps'][app] = {'lazy_ms': lazy * 1000, 'eager_ms': eager * 1000,
+                                'saved_ms': (eager - lazy) * 1000}
+        print(f"{app:<5} lazy {lazy * 1000:7.0f} ms   eager {eager * 1000:7.0f} ms   "
+              f"saved {(eager - lazy) * 1000:6.0f} ms")
+
+    for name in HEAVY_MODULES:
+        ms = module_import_ms(name)
+        results['modules_ms'][name] = ms
+        print(f"  {name:<20} {'unavailable' if ms is None else f'{ms:.0f} ms'}")
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
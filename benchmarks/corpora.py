@@ -0,0 +1,163 @@
+# benchmarks/corpora.py - Synthetic inputs shared by the benchmark scripts
+import random
+
+SKILLS = [
+    "Python", "SQL", "AWS", "Docker", "Kubernetes", "React", "TypeScript", "Go",
+    "Terraform", "Airflow", "Spark", "PostgreSQL", "Redis", "GraphQL", "CI/CD",
+]
+VERBS = ["Led", "Built", "Designed", "Shipped", "Reduced", "Improved", "Automated", "Migrated"]
+OBJECTS = [
+    "the billing platform", "a real-time analytics pipeline", "the customer onboarding flow",
+    "internal developer tooling", "the search ranking service", "a multi-region deployment",
+]
+
+
+def bullet(rng):
+    return (
+        f"{rng.choice(VERBS)} {rng.choice(OBJECTS)} using {rng.choice(SKILLS)} and "
+        f"{rng.choice(SKILLS)}, improving throughput by {rng.randint(10, 80)}%"
+    )
+
+
+def resume_markdown(num_roles=3, bullets_per_role=3, seed=0):
+    """Resume-shaped markdown like the optimizer produces"""
+    rng = random.Random(seed)
+    parts = [
+        "# Jordan Example",
+        "jordan@example.com | +1 555 0100 | linkedin.com/in/jordan-example",
+        "## Professional Summary",
+        "Engineer with a track record of shipping reliable data and web platforms. " * 2,
+        "## Experience",
+    ]
+    for i in range(num_roles):
+        parts.append(f"### Senior Engineer - Company {i + 1}\n*2019 - Present*")
+        parts.append("\n".join(f"- {bullet(rng)}" for _ in range(bullets_per_role)))
+    parts.append("## Skills")
+    parts.append(", ".join(SKILLS))
+    parts.append("## Education")
+    parts.append("**B.Sc. Computer Science** - State University (2015)")
+    return "\n\n".join(parts)
+
+
+def multipage_pdf(num_pages=20, lines_per_page=40, seed=0):
+    """Build a text-only PDF with num_pages pages of resume-like lines.
+
+    Written by hand so the extraction benchmarks don't need a PDF renderer.
+    """
+    rng = random.Random(seed)
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # page tree, filled in once the page object numbers are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    page_ids = []
+    for page in range(num_pages):
+        lines = [f"Page {page + 1} - {bullet(rng)}" for _ in range(lines_per_page)]
+        escaped = [line.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)') for line in lines]
+        stream = "BT /F1 9 Tf 12 TL 40 760 Td " + " ".join(f"({line}) '" for line in escaped) + " ET"
+        stream = stream.encode('latin-1')
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+        page_ids.append(len(objects))
+    kids = b" ".join(b"%d 0 R" % page_id for page_id in page_ids)
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, num_pages)
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref_offset = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref_offset)
+    return bytes(out)
+
+
+def job_description(paragraphs=12, seed=0):
+    """Long pasted job description with requirements, benefits and EEO boilerplate"""
+    rng = random.Random(seed)
+    parts = ["Senior Platform Engineer", "About the role"]
+    for _ in range(paragraphs):
+        parts.append(
+            f"You will {rng.choice(VERBS).lower()} {rng.choice(OBJECTS)} and partner with product "
+            f"teams on {rng.choice(OBJECTS)}. Experience with {rng.choice(SKILLS)}, "
+            f"{rng.choice(SKILLS)} and {rng.choice(SKILLS)} is expected."
+        )
+    parts.append("Requirements:\n" + "\n".join(f"- {rng.randint(2, 8)}+ years of {skill}" for skill in SKILLS[:8]))
+    parts.append("Benefits: competitive salary, equity, health, dental and vision insurance, 401(k) matching, "
+                 "unlimited PTO, remote-friendly culture and a home office stipend.")
+    parts.append("We are an equal opportunity employer and value diversity. All qualified applicants will "
+                 "receive consideration for employment without regard to race, color, religion, sex, sexual "
+                 "orientation, gender identity, national origin, disability or veteran status.")
+    return "\n\n".join(parts)
+
+
+def cv_form(num_experience=10, num_education=3, seed=0):
+    """app3.py user_data as collected from a fully filled-in form"""
+    rng = random.Random(seed)
+    return {
+        'first_name': 'Jordan', 'last_name': 'Example', 'email': 'jordan@example.com',
+        'phone': '+1 555 0100', 'location': 'Berlin, Germany',
+        'linkedin': 'linkedin.com/in/jordan-example', 'website': 'jordan.example.com',
+        'summary': "Engineer with a track record of shipping reliable data and web platforms.",
+        'education': [
+            {'degree': f'Degree {i + 1} in Computer Science', 'institution': f'University {i + 1}',
+             'graduation_date': f'May {2010 + i}', 'gpa': '3.8/4.0'}
+            for i in range(num_education)
+        ],
+        'experience': [
+            {'job_title': f'Engineer {i + 1}', 'company': f'Company {i + 1}',
+             'start_date': f'Jan {2010 + i}', 'end_date': f'Dec {2011 + i}',
+             'responsibilities': "\n".join(f"• {bullet(rng)}" for _ in range(4))}
+            for i in range(num_experience)
+        ],
+        'technical_skills': ", ".join(SKILLS),
+        'soft_skills': "Leadership, Communication, Mentoring",
+        'certifications': "• AWS Certified Solutions Architect\n• CKA",
+        'languages': "English (Native), German (Fluent)",
+        'projects': "• Open-source scheduler\n• Realtime dashboard",
+        'awards': "• Engineering excellence award 2022",
+    }
+
+
+def linkedin_form(num_experience=10, num_education=3, seed=0):
+    """app4.py user_data as collected from a fully filled-in form"""
+    rng = random.Random(seed)
+    return {
+        'first_name': 'Jordan', 'last_name': 'Example', 'current_title': 'Staff Engineer',
+        'location': 'Berlin, Germany', 'industry': 'Technology', 'email': 'jordan@example.com',
+        'current_headline': 'Staff Engineer | Platforms | Data',
+        'current_about': "Engineer with a track record of shipping reliable data and web platforms. " * 4,
+        'experience': [
+            {'job_title': f'Engineer {i + 1}', 'company': f'Company {i + 1}',
+             'employment_type': 'Full-time', 'start_date': f'Jan {2010 + i}',
+             'end_date': f'Dec {2011 + i}', 'location': 'Remote',
+             'description': "\n".join(f"• {bullet(rng)}" for _ in range(4))}
+            for i in range(num_experience)
+        ],
+        'education': [
+            {'degree': f'Degree {i + 1}', 'school': f'University {i + 1}',
+             'start_year': str(2005 + i), 'end_year': str(2009 + i), 'activities': 'Robotics club'}
+            for i in range(num_education)
+        ],
+        'skills': ", ".join(SKILLS),
+        'certifications': "AWS Certified Solutions Architect",
+        'languages': "English (Native)",
+        'projects': "Open-source scheduler",
+        'volunteer': "Code mentor",
+    }
+
+
+def model_output(num_roles=3, seed=0):
+    """Raw optimizer output including the trailing suggestions clean_resume_content strips"""
+    return (
+        resume_markdown(num_roles=num_roles, seed=seed)
+        + "\n\n\n\n## Additional Suggestions\n\n"
+        + "\n".join(f"- Consider adding metrics for role {i + 1}." for i in range(num_roles))
+    )
@@ -0,0 +1,121 @@
+# benchmarks/load_test.py - Offline load test of the Streamlit apps on the fake backend
+"""Drive many concurrent simulated sessions through app3.py or app4.py with
+Streamlit's AppTest harness and the FakeBackend standing in for Gemini, then
+report throughput and latency percentiles of the generate click.
+
+Usage:
+    python -m benchmarks.load_test --app app4 --sessions 20 --concurrency 5 \\
+        [--ttft-ms 800] [--tokens-per-second 60] [--error-rate 0.02] [--hedge-after auto]
+
+app.py needs a PDF upload, which AppTest cannot simulate, so it is not covered.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Text inputs filled in per app before clicking generate: (label, value)
+REQUIRED_INPUTS = {
+    'app3': [("First Name *", "Jordan"), ("Last Name *", "Example"), ("Email Address *", "jordan@example.com")],
+    'app4': [("First Name *", "Jordan"), ("Last Name *", "Example"), ("Current Job Title *", "Engineer")],
+}
+RESULT_KEYS = {'app3': 'generated_cv', 'app4': 'optimized_profile'}
+GENERATE_LABELS = {'app3': "Generate Professional CV", 'app4': "Optimize LinkedIn Profile"}
+
+
+def run_session(app, index, timeout):
+    """Fill in one session's form, click generate and time the rerun it triggers"""
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(os.path.join(APP_DIR, f'{app}.py'), default_timeout=timeout)
+    at.run()
+    at.text_input[0].input(f"load-test-key-{index}").run()
+    # Unique goal text per session so the response cache doesn't absorb the load
+    at.text_area[0].input(f"Senior platform engineer, session {index}").run()
+    for text_input in at.text_input:
+        for label, value in REQUIRED_INPUTS[app]:
+            if text_input.label == label:
+                text_input.input(value)
+    at.run()
+
+    button = next(b for b in at.button if GENERATE_LABELS[app] in b.label)
+    start = time.perf_counter()
+    button.click().run()
+    elapsed = time.perf_counter() - start
+    ok = bool(at.session_state[RESULT_KEYS[app]])
+    return {'seconds': elapsed, 'ok': ok, 'errors': [e.value for e in at.error]}
+
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--app', choices=sorted(REQUIRED_INPUTS), default='app4')
+    parser.add_argument('--sessions', type=int, default=20, help="Total simulated sessions")
+    parser.add_argument('--concurrency', type=int, default=5, help="Sessions running at once")
+    parser.add_argument('--ttft-ms', type=float, default=800)
+    parser.add_argument('--ttft-sigma', type=float, default=0.5)
+    parser.add_argument('--tokens-per-second', type=float, default=60)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--hedge-after', default='0',
+                        help="Seconds (or 'auto' for the observed p95) before a duplicate request is sent; 0 disables")
+    parser.add_argument('--timeout', type=float, default=120, help="Per-rerun timeout in seconds")
+    args = parser.parse_args(argv)
+
+    # The apps read these when they first import llm
+    os.environ['LLM_BACKEND'] = 'fake'
+    os.environ['FAKE_LLM_TTFT_MS'] = str(args.ttft_ms)
+    os.environ['FAKE_LLM_TTFT_SIGMA'] = str(args.ttft_sigma)
+    os.environ['FAKE_LLM_TOKENS_PER_SECOND'] = str(args.tokens_per_second)
+    os.environ['FAKE_LLM_ERROR_RATE'] = str(args.error_rate)
+    os.environ['FAKE_LLM_SEED'] = str(args.seed)
+    os.environ['LLM_HEDGE_AFTER'] = args.hedge_after
+    os.environ.setdefault('LLM_CACHE_PATH', os.path.join(tempfile.mkdtemp(), 'load_test.sqlite3'))
+    os.environ.setdefault('LLM_USAGE_PATH', os.path.join(tempfile.mkdtemp(), 'load_test_usage.sqlite3'))
+    os.environ.setdefault('ARTIFACT_STORE_PATH', os.path.join(tempfile.mkdtemp(), 'load_test_artifacts.sqlite3'))
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        results = list(executor.map(
+            lambda i: run_session(args.app, i, args.timeout), range(args.sessions)
+        ))
+    wall = time.perf_counter() - start
+
+    # AppTest runs the apps in this process, so they share llm's single-flight
+    # layer, rate limiter and retry/hedging stats
+    import llm
+
+    latencies = sorted(r['seconds'] for r in results)
+    succeeded = sum(r['ok'] for r in results)
+    summary = {
+        'app': args.app,
+        'sessions': args.sessions,
+        'concurrency': args.concurrency,
+        'succeeded': succeeded,
+        'failed': args.sessions - succeeded,
+        'wall_seconds': wall,
+        'throughput_per_minute': succeeded / wall * 60 if wall else 0.0,
+        'p50_seconds': statistics.median(latencies),
+        'p95_seconds': percentile(latencies, 0.95),
+        'p99_seconds': percentile(latencies, 0.99),
+        'max_seconds': latencies[-1],
+        'coalesced_requests': llm.in_flight.stats()['coalesced'],
+        'rate_limited_requests': llm.rate_limiter.stats()['queued'],
+        'retries': llm.resilient.stats()['retries'],
+        'hedged_requests': llm.resilient.stats()['hedges'],
+    }
+    print(json.dumps(summary, indent=2))
+    return 0 if succeeded == args.sessions else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
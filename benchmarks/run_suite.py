@@ -0,0 +1,175 @@
+# benchmarks/run_suite.py - Offline benchmark suite for every pipeline stage
+"""Time each stage of the three apps in isolation, plus the full resume
+pipeline, on synthetic inputs with Gemini replaced by an instant FakeBackend.
+Results are written as JSON so runs from different commits can be compared.
+
+Usage:
+    python -m benchmarks.run_suite --output results.json [--repeat 20]
+    python -m benchmarks.run_suite --output new.json --compare results.json [--threshold 0.10]
+
+--compare exits with status 1 when any stage's median got slower than the
+baseline by more than --threshold (a fraction).
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# Keep the suite's generations out of the real response cache and usage ledger
+os.environ.setdefault('LLM_CACHE_PATH', os.path.join(tempfile.mkdtemp(), 'bench_responses.sqlite3'))
+os.environ.setdefault('LLM_USAGE_PATH', os.path.join(tempfile.mkdtemp(), 'bench_usage.sqlite3'))
+
+import app
+import app3
+import app4
+import llm
+import pdf_render
+from benchmarks import corpora
+from compaction import compact_job_description, compact_resume_text
+from llm_backends import FakeBackend
+from pdf_extract import extract_text
+
+
+def measure(fn, repeat):
+    """Run fn repeat times (after one warm-up) and summarize the timings in ms"""
+    fn()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return {
+        'min_ms': timings[0],
+        'median_ms': statistics.median(timings),
+        'p95_ms': timings[min(len(timings) - 1, int(len(timings) * 0.95))],
+        'runs': repeat,
+    }
+
+
+def render_available():
+    try:
+        pdf_render.render_in_worker("probe", 'resume')
+        return True
+    except Exception:
+        # WeasyPrint or its system libraries (Pango/Cairo) are missing
+        return False
+
+
+def build_stages():
+    small_pdf = corpora.multipage_pdf(num_pages=1)
+    large_pdf = corpora.multipage_pdf(num_pages=20)
+    long_jd = corpora.job_description(paragraphs=20)
+    cv_form = corpora.cv_form(num_experience=10)
+    linkedin_form = corpora.linkedin_form(num_experience=10)
+    raw_output = corpora.model_output(num_roles=4)
+    small_markdown = corpora.resume_markdown(num_roles=2)
+    large_markdown = corpora.resume_markdown(num_roles=10, bullets_per_role=5)
+    resume_text = extract_text(large_pdf)
+
+    # Instant, error-free stand-in so only our own code is timed
+    llm.set_backend(FakeBackend(ttft_ms=0, tokens_per_second=None))
+
+    def resume_pipeline(with_render):
+        text = compact_resume_text(extract_text(large_pdf))
+        prompt = app.build_resume_prompt(text, compact_job_description(long_jd))
+        optimized = llm.generate_text('bench-key', prompt, use_cache=False)
+        cleaned = app.clean_resume_content(optimized)
+        if with_render:
+            pdf_render.render_in_worker(cleaned, 'resume')
+        else:
+            pdf_render.build_html(cleaned)
+
+    stages = {
+        'extract_small_resume': lambda: extract_text(small_pdf),
+        'extract_large_resume': lambda: extract_text(large_pdf),
+        'prompt_resume': lambda: app.build_resume_prompt(resume_text, long_jd),
+        'prompt_cv_10_entries': lambda: app3.build_cv_prompt(cv_form, long_jd),
+        'prompt_linkedin_10_entries': lambda: app4.build_linkedin_prompt(linkedin_form, long_jd),
+        'compact_resume_text': lambda: compact_resume_text(resume_text),
+        'compact_job_description': lambda: compact_job_description(long_jd),
+        'clean_resume_content': lambda: app.clean_resume_content(raw_output),
+        'markdown_to_html_small': lambda: pdf_render.build_html(small_markdown),
+        'markdown_to_html_large': lambda: pdf_render.build_html(large_markdown),
+        'llm_fake_call': lambda: llm.generate_text('bench-key', app.build_resume_prompt(resume_text, long_jd), use_cache=False),
+    }
+    if render_available():
+        for theme in pdf_render.THEMES:
+            stages[f'render_pdf_small_{theme}'] = lambda theme=theme: pdf_render.render_in_worker(small_markdown, theme)
+            stages[f'render_pdf_large_{theme}'] = lambda theme=theme: pdf_render.render_in_worker(large_markdown, theme)
+        stages['pipeline_resume_end_to_end'] = lambda: resume_pipeline(True)
+    else:
+        print("WeasyPrint unavailable - skipping PDF render stages", file=sys.stderr)
+        stages['pipeline_resume_without_render'] = lambda: resume_pipeline(False)
+    return stages
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def compare(results, baseline, threshold):
+    """Print per-stage median deltas against a baseline run; return the regressed stages"""
+    regressions = []
+    for stage, stats in results['stages'].items():
+        before = baseline['stages'].get(stage)
+        if before is None:
+            print(f"{stage:<36} new stage")
+            continue
+        change = (stats['median_ms'] - before['median_ms']) / before['median_ms'] if before['median_ms'] else 0.0
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions.append(stage)
+        print(f"{stage:<36} {before['median_ms']:9.2f} -> {stats['median_ms']:9.2f} ms  {change:+7.1%}{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--repeat', type=int, default=20, help="Timed runs per stage")
+    parser.add_argument('--only', nargs='*', help="Run only stages whose name contains one of these")
+    parser.add_argument('--output', help="Write results JSON here")
+    parser.add_argument('--compare', help="Baseline results JSON to compare against")
+    parser.add_argument('--threshold', type=float, default=0.10, help="Allowed median slowdown fraction")
+    args = parser.parse_args(argv)
+
+    results = {
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'stages': {},
+    }
+    for name, fn in build_stages().items():
+        if args.only and not any(part in name for part in args.only):
+            continue
+        stats = measure(fn, args.repeat)
+        results['stages'][name] = stats
+        print(f"{name:<36} median {stats['median_ms']:9.2f} ms   p95 {stats['p95_ms']:9.2f} ms")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} stage(s) regressed: {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,195 @@
+# compaction.py - Shrink resume and job-description text before it goes into a prompt
+import re
+
+# Separates pages in extracted text (form feed, as pdftotext does)
+PAGE_BREAK = '\f'
+
+# Legal/application boilerplate; a paragraph made only of such lines is dropped
+JD_BOILERPLATE_PATTERNS = [
+    r'equal (employment )?opportunity',
+    r'without regard to (race|color|religion|sex|age|national origin|disability|veteran)',
+    r'reasonable accommodations?',
+    r'e-?verify',
+    r'privacy (notice|policy)',
+    r'recruit(ment|ing) (agencies|agency)',
+    r'click (apply|here)',
+    r'applicants? (must|will) be (authorized|required)',
+]
+_jd_boilerplate = re.compile('|'.join(JD_BOILERPLATE_PATTERNS), re.IGNORECASE)
+
+# Headings (or opening phrases) of benefits and EEO blurbs; the section they
+# start is dropped as a whole. Insurance, 401(k) etc. elsewhere are kept, since
+# for insurtech or HR-tech roles they are the actual requirements.
+JD_BLURB_HEADINGS = [
+    r'benefits',
+    r'perks',
+    r'what we offer',
+    r'we offer',
+    r'our (benefits|perks)',
+    r'(compensation|salary) (and|&) benefits',
+    r'why (join|work (with|for)) us',
+    r'in return',
+    r'equal (employment )?opportunity',
+    r'eeo\b',
+]
+_jd_blurb_heading = re.compile(r'^(%s)' % '|'.join(JD_BLURB_HEADINGS), re.IGNORECASE)
+# Short line ending in a colon: starts a new section in pasted JDs without blank lines
+_jd_heading = re.compile(r'^[^.!?]{1,60}:$')
+# Perks; only a paragraph listing nothing else counts as a benefits blurb
+_jd_perk = re.compile(
+    r'\b(insurance|401\(?k\)?|pto|paid time off|vacation|parental leave|stipend|wellness|gym|'
+    r'medical|dental|vision)\b', re.IGNORECASE
+)
+_list_item = re.compile(r'^([-*+•]|\d+[.)])\s+')
+
+_page_number = re.compile(r'^\s*(page\s*)?\d{1,3}(\s*(of|/)\s*\d{1,3})?\s*$', re.IGNORECASE)
+# A word broken across lines; the left side may itself be hyphenated ("state-of-the-").
+# The lookbehind starts matches only at the start of a word, so a long run of
+# word characters is scanned once instead of once per position (quadratic)
+_hyphen_break = re.compile(r'(?<![\w-])([\w-]*\w)-\n(\w+)')
+_hyphenated_word = re.compile(r'(?<![\w-])\w+(?:-\w+)+')
+# First halves of compounds that keep their hyphen when a line break splits
+# them; only ones that never end a syllable of an ordinary hyphenated word
+COMPOUND_PREFIXES = {'self', 'cross', 'multi', 'non', 'full', 'cloud', 'user', 'team', 'client', 'customer'}
+_spaces = re.compile(r'[ \t ]+')
+_blank_runs = re.compile(r'\n{3,}')
+
+
+def estimate_tokens(text):
+    """Rough token count (~4 characters per token, as for Gemini's English text)"""
+    return (len(text) + 3) // 4
+
+
+def normalize_whitespace(text):
+    """Collapse runs of spaces/tabs and blank lines, trimming every line"""
+    text = _spaces.sub(' ', text)
+    text = '\n'.join(line.strip() for line in text.split('\n'))
+    return _blank_runs.sub('\n\n', text).strip()
+
+
+def rejoin_hyphenated(text):
+    """Undo line-break hyphenation: "manage-\nment" -> "management".
+
+    Only lowercase word halves are joined. Dates ("2019-\n2021"), acronyms
+    ("CI-\nCD") and compounds ("self-\nservice", "state-of-the-\nart", or any
+    form also found hyphenated elsewhere in the text) keep their hyphen.
+    """
+    # Every "a-b" pair written on one line, collected in a single pass
+    compounds = set()
+    for word in _hyphenated_word.findall(text):
+        parts = word.split('-')
+        compounds.update(f"{a}-{b}" for a, b in zip(parts, parts[1:]))
+
+    def rejoin(match):
+        left, right = match.group(1), match.group(2)
+        hyphenated = f"{left}-{right}"
+        if (
+            left[-1].isalpha() and left[-1].islower() and right[0].isalpha() and right[0].islower()
+            and '-' not in left and left.lower() not in COMPOUND_PREFIXES
+            and hyphenated not in compounds
+        ):
+            return left + right
+        return hyphenated
+
+    return _hyphen_break.sub(rejoin, text)
+
+
+def compact_resume_text(text, band=2):
+    """Clean PyPDF2 output: rejoin hyphenated words, drop page numbers and
+    running headers/footers, collapse whitespace.
+
+    Pages are separated by form feeds (pdf_extract.PAGE_BREAK). A line is a
+    running header or footer when it sits within the first or last `band`
+    lines of two consecutive pages; repeats elsewhere (say "- Python 3"
+    under several roles) are content and are kept.
+    """
+    text = text.replace('\r\n', '\n').replace('\r', '\n')
+    text = rejoin_hyphenated(text)
+    pages = [[line.strip() for line in page.split('\n')] for page in text.split(PAGE_BREAK)]
+
+    def bands(page):
+        """Positions of the first and last `band` non-empty lines"""
+        filled = [index for index, line in enumerate(page) if line]
+        return filled[:band], filled[-band:]
+
+    def band_lines(page, positions):
+        return set(page[index] for index in positions if len(page[index]) <= 80)
+
+    page_bands = [bands(page) for page in pages]
+    running = set()
+    for i in range(len(pages) - 1):
+        (top, bottom), (next_top, next_bottom) = page_bands[i], page_bands[i + 1]
+        running |= band_lines(pages[i], top) & band_lines(pages[i + 1], next_top)
+        running |= band_lines(pages[i], bottom) & band_lines(pages[i + 1], next_bottom)
+
+    kept = []
+    for number, (page, (top, bottom)) in enumerate(zip(pages, page_bands)):
+        for index, line in enumerate(page):
+            in_band = index in top or index in bottom
+            if in_band and _page_number.match(line):
+                continue
+            # The first page's header may be the candidate's name/contact line
+            if in_band and line in running and not (number == 0 and index in top):
+                continue
+            kept.append(line)
+    return normalize_whitespace('\n'.join(kept))
+
+
+def _is_blurb_heading(line):
+    """'Benefits:', '## What we offer' etc., but not a sentence that starts the same way"""
+    line = line.lstrip('#* ').rstrip('* ')
+    return bool(_jd_blurb_heading.match(line)) and (line.endswith(':') or len(line.split()) <= 4)
+
+
+def _jd_sections(paragraph):
+    """Split a paragraph into sections, each starting at a heading line"""
+    sections = []
+    for line in paragraph.split('\n'):
+        if not sections or _jd_heading.match(line) or _is_blurb_heading(line):
+            sections.append([])
+        sections[-1].append(line)
+    return sections
+
+
+def _is_blurb(section):
+    """True for a benefits/EEO section, a bare list of perks or legal boilerplate only"""
+    if _is_blurb_heading(section[0]):
+        return True
+    if all(_jd_boilerplate.search(line) for line in section):
+        return True
+    # A heading such as "Requirements:" means the items are the job itself,
+    # even when they mention insurance or 401(k)
+    items = [line for line in section if _list_item.match(line)]
+    return (
+        len(items) >= 2 and len(items) == len(section)
+        and all(_jd_perk.search(line) for line in items)
+    )
+
+
+def compact_job_description(text):
+    """Drop boilerplate sections (EEO statements, benefits blurbs) and repeated paragraphs"""
+    text = normalize_whitespace(text.replace('\r\n', '\n').replace('\r', '\n'))
+    kept = []
+    seen = set()
+    for paragraph in text.split('\n\n'):
+        # Filter section by section: pasted JDs often have no blank lines at all
+        sections = [section for section in _jd_sections(paragraph) if not _is_blurb(section)]
+        paragraph = '\n'.join(line for section in sections for line in section)
+        key = paragraph.lower()
+        if not paragraph or key in seen:
+            continue
+        seen.add(key)
+        kept.append(paragraph)
+    # Never hand the model an empty job description
+    return '\n\n'.join(kept) or text
+
+
+def compaction_report(before, after):
+    """Token counts before/after compaction for display"""
+    tokens_before = estimate_tokens(before)
+    tokens_after = estimate_tokens(after)
+    return {
+        'tokens_before': tokens_before,
+        'tokens_after': tokens_after,
+        'tokens_saved': tokens_before - tokens_after,
+    }
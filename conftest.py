@@ -0,0 +1 @@
+# conftest.py - Lets pytest import the app modules from the repository root
@@ -0,0 +1,117 @@
+# early_stop.py - Stop a streamed generation once the model starts its trailing suggestions
+import os
+import re
+import threading
+import time
+from collections import deque
+
+from compaction import estimate_tokens
+
+# 'exact' stops only where the cleaned result is guaranteed unchanged, 'any'
+# on every end pattern, 'off' never
+EARLY_STOP_MODE = os.environ.get('EARLY_STOP', 'exact')
+# Text re-scanned before each new chunk, so a pattern split across chunks is still found
+SCAN_OVERLAP = 200
+
+
+class TailTracker:
+    """Rolling mean of how many tokens the cleaner discarded from full responses"""
+
+    def __init__(self, window=100):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, tokens):
+        with self._lock:
+            self._samples.append(tokens)
+
+    def mean(self):
+        """Mean tail length, or None until a real tail has been measured"""
+        with self._lock:
+            if not self._samples:
+                return None
+            return sum(self._samples) / len(self._samples)
+
+
+# Shared by all sessions in this process
+tail_tracker = TailTracker()
+
+
+class EndPatternWatcher:
+    """stop_when predicate for llm.generate_text built from a cleaner's end patterns.
+
+    The cleaner cuts at the first pattern, in priority order, that matches
+    anywhere in the text. Stopping on the highest-priority pattern therefore
+    never changes the cleaned result, but stopping on a lower one could: the
+    higher one might still have appeared further on. In 'exact' mode only the
+    first pattern stops the stream; 'any' stops on all of them.
+    """
+
+    def __init__(self, patterns, mode=EARLY_STOP_MODE, flags=re.IGNORECASE | re.DOTALL):
+        self.patterns = [re.compile(pattern, flags) for pattern in patterns]
+        if mode == 'off':
+            self.watched = []
+        elif mode == 'any':
+            self.watched = self.patterns
+        else:
+            self.watched = self.patterns[:1]
+        self.first_chunk_at = None
+        self.stopped_at = None
+        self.stopped_chars = None
+        self.source = None
+        self._scanned = 0
+
+    def __call__(self, text):
+        now = time.perf_counter()
+        if self.first_chunk_at is None:
+            self.first_chunk_at = now
+        if len(text) < self._scanned:
+            # A retried or hedged attempt started a new stream
+            self._scanned = 0
+        start = max(0, self._scanned - SCAN_OVERLAP)
+        self._scanned = len(text)
+        for pattern in self.watched:
+            if pattern.search(text, start):
+                self.stopped_at = now
+                self.stopped_chars = len(text)
+                return True
+        return False
+
+    def served(self, source):
+        """on_source callback for llm.generate_text"""
+        self.source = source
+
+    def finish(self, text):
+        """Learn the tail length from a response that ran to completion.
+
+        Only generations this watcher saw count: cached or coalesced text may
+        have been cut short by another caller's early stop.
+        """
+        if self.source != 'generated' or self.stopped_at is not None or not text:
+            return
+        for pattern in self.patterns:
+            match = pattern.search(text)
+            if match:
+                tail_tracker.record(estimate_tokens(text[match.start():]))
+                return
+
+    def report(self):
+        """Estimated output tokens and seconds saved, or None if the stream was not stopped.
+
+        Both estimates are None while no full response has shown how long the
+        skipped tail usually is.
+        """
+        if self.stopped_at is None:
+            return None
+        mean_tail = tail_tracker.mean()
+        if mean_tail is None:
+            return {'tokens_saved': None, 'seconds_saved': None}
+        tokens_saved = round(mean_tail)
+        # Seconds saved at this stream's own output rate
+        streamed_seconds = self.stopped_at - self.first_chunk_at
+        # (~4 characters per token, as in compaction.estimate_tokens)
+        rate = self.stopped_chars / 4 / streamed_seconds if streamed_seconds > 0 else 0.0
+        return {
+            'tokens_saved': tokens_saved,
+            'seconds_saved': tokens_saved / rate if rate else 0.0,
+        }
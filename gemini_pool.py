@@ -0,0 +1,75 @@
+# gemini_pool.py - Process-wide pool of warm Gemini models, one per API key
+import threading
+import time
+
+from caching import content_digest
+from lazy_imports import lazy_import
+
+# The Gemini SDK and gRPC stack load on the first generation, not at app start
+genai = lazy_import('google.generativeai')
+glm = lazy_import('google.ai.generativelanguage')
+client_options_lib = lazy_import('google.api_core.client_options')
+
+
+class GeminiClientPool:
+    """Thread-safe pool keeping one GenerativeModel and transport per API key.
+
+    Each model gets its own GenerativeServiceClient bound to its key, so nothing
+    touches the global genai.configure() state and sessions using different keys
+    can generate concurrently. Clients idle for longer than idle_seconds are
+    closed and dropped.
+    """
+
+    def __init__(self, model_name, idle_seconds=15 * 60, max_clients=64):
+        self.model_name = model_name
+        self.idle_seconds = idle_seconds
+        self.max_clients = max_clients
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get_model(self, api_key):
+        """Return the warm model for api_key, creating it on first use"""
+        # Keys are held by digest so raw API keys don't sit in the pool's index
+        pool_key = content_digest(api_key)
+        now = time.monotonic()
+        with self._lock:
+            self._evict_idle(now)
+            entry = self._entries.get(pool_key)
+            if entry is None:
+                entry = {'model': self._build_model(api_key), 'last_used': now}
+                self._entries[pool_key] = entry
+                self._evict_oldest()
+            entry['last_used'] = now
+            return entry['model']
+
+    def _build_model(self, api_key):
+        client = glm.GenerativeServiceClient(
+            client_options=client_options_lib.ClientOptions(api_key=api_key)
+        )
+        model = genai.GenerativeModel(self.model_name)
+        # GenerativeModel falls back to the global default client when _client
+        # is unset; pinning it keeps this model on its own key and transport
+        model._client = client
+        return model
+
+    def _evict_idle(self, now):
+        for pool_key, entry in list(self._entries.items()):
+            if now - entry['last_used'] > self.idle_seconds:
+                self._close(self._entries.pop(pool_key))
+
+    def _evict_oldest(self):
+        while len(self._entries) > self.max_clients:
+            pool_key = min(self._entries, key=lambda k: self._entries[k]['last_used'])
+            self._close(self._entries.pop(pool_key))
+
+    @staticmethod
+    def _close(entry):
+        try:
+            entry['model']._client.transport.close()
+        except Exception:
+            # In-flight calls on other threads may still hold the transport
+            pass
+
+    def size(self):
+        with self._lock:
+            return len(self._entries)
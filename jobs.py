@@ -0,0 +1,116 @@
+# jobs.py - Background generation jobs that outlive Streamlit reruns
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+# Jobs mostly wait on the LLM, so threads rather than processes
+JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 8))
+# Finished jobs are kept this long for their session to pick up
+JOB_TTL_SECONDS = float(os.environ.get('JOB_TTL_SECONDS', 3600))
+
+_current = threading.local()
+
+
+def current_job():
+    """The Job running on this thread, if any"""
+    return getattr(_current, 'job', None)
+
+
+class Job:
+    """State of one submitted job, read by the session that polls it"""
+
+    def __init__(self, owner=None):
+        self.id = uuid.uuid4().hex
+        self.owner = owner
+        self.status = 'queued'
+        self.partial = ""
+        self.queue_position = None
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.first_output_seconds = None
+
+    @property
+    def finished(self):
+        return self.status in ('done', 'failed')
+
+    def update(self, text):
+        """on_chunk callback: keep the latest partial output for the poller"""
+        if self.first_output_seconds is None:
+            self.first_output_seconds = time.time() - self.started_at
+        self.partial = text
+
+    def set_queue_position(self, ahead):
+        """on_queue callback: requests ahead in the rate limiter, None once running"""
+        self.queue_position = ahead
+
+
+class JobManager:
+    """Runs jobs on a shared thread pool and keeps their state between reruns.
+
+    submit(fn, *args) calls fn(job, *args) on a worker thread and returns the
+    job ID to keep in session state. A rerun, a blocked script or a closed
+    tab does not affect the job; its result stays available for
+    ttl_seconds after it finishes.
+    """
+
+    def __init__(self, workers=JOB_WORKERS, ttl_seconds=JOB_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='job')
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args, owner=None, **kwargs):
+        job = Job(owner)
+        with self._lock:
+            self._prune(time.time())
+            self._jobs[job.id] = job
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        return job.id
+
+    def _run(self, job, fn, args, kwargs):
+        _current.job = job
+        job.status = 'running'
+        job.started_at = time.time()
+        try:
+            job.result = fn(job, *args, **kwargs)
+            status = 'done'
+        except Exception as e:
+            job.error = e
+            status = 'failed'
+        finally:
+            _current.job = None
+        # Everything a finished job carries is set before its status says so:
+        # pollers and _prune (on other threads) read the rest once it is final
+        job.queue_position = None
+        job.finished_at = time.time()
+        job.status = status
+
+    def get(self, job_id):
+        """Return the Job for job_id, or None if unknown or expired"""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _prune(self, now):
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.finished and job.finished_at is not None and now - job.finished_at > self.ttl_seconds
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def stats(self):
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return {
+            status: sum(job.status == status for job in jobs)
+            for status in ('queued', 'running', 'done', 'failed')
+        }
+
+
+# Shared by every session in this process
+job_manager = JobManager()
@@ -0,0 +1,183 @@
+# llm.py - Shared text-generation call path for the Streamlit apps
+import json
+import os
+import sys
+import time
+
+from caching import content_digest
+from compaction import estimate_tokens
+from gemini_pool import GeminiClientPool
+from jobs import current_job
+from llm_backends import FakeBackend, GeminiBackend
+from metrics import observe
+from rate_limiter import RateLimiter
+from resilience import ResilientCaller
+from response_cache import ResponseCache, response_cache
+from singleflight import SingleFlight
+from usage import usage_ledger
+
+MODEL_NAME = 'gemini-1.5-flash'
+
+# Generation settings used by every generator
+GENERATION_CONFIG = {
+    'temperature': 0.7,
+    'max_output_tokens': 4000,
+    'top_p': 0.8,
+    'top_k': 40,
+}
+
+# Warm models shared by every session in this process, one per API key
+client_pool = GeminiClientPool(MODEL_NAME)
+
+# Concurrent identical requests (double clicks, sessions with the same inputs)
+# share one backend call
+in_flight = SingleFlight()
+
+# Per-key RPM/TPM quotas shared by every session; see rate_limiter.py
+rate_limiter = RateLimiter()
+
+# Retries transient failures and optionally hedges slow calls; see resilience.py
+resilient = ResilientCaller()
+
+# Output tokens reserved against the TPM quota before the answer's size is known
+EXPECTED_OUTPUT_TOKENS = 1000
+
+
+def backend_from_env():
+    """Pick the backend named by $LLM_BACKEND ('gemini' by default, or 'fake')"""
+    name = os.environ.get('LLM_BACKEND', 'gemini')
+    if name == 'fake':
+        return FakeBackend.from_env()
+    if name == 'gemini':
+        return GeminiBackend(MODEL_NAME, GENERATION_CONFIG, client_pool)
+    raise ValueError(f"Unknown LLM_BACKEND '{name}' (expected 'gemini' or 'fake')")
+
+
+backend = backend_from_env()
+
+
+def set_backend(new_backend):
+    """Swap the backend used by every generator (load tests, benchmarks)"""
+    global backend
+    backend = new_backend
+
+
+def result_key(app, *inputs):
+    """Artifact store key of an app's finished result for these inputs.
+
+    The model and generation settings are part of the key, so switching
+    either one never serves a result produced by the other.
+    """
+    config = json.dumps(GENERATION_CONFIG, sort_keys=True)
+    return content_digest(app, backend.model_name, config, *inputs)
+
+
+def current_session_id():
+    """Id of the Streamlit session whose script (or background job) runs on this thread, if any"""
+    job = current_job()
+    if job is not None and job.owner:
+        return job.owner
+    # Not imported at all: no session, and no reason to pay for the import
+    if 'streamlit' not in sys.modules:
+        return None
+    # batch_optimize imports the apps (and so Streamlit) but runs outside any
+    # script run; there is no context then and the call is quietly None
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+    except ImportError:
+        return None
+    ctx = get_script_run_ctx(suppress_warning=True)
+    return ctx.session_id if ctx else None
+
+
+def generate_text(api_key, prompt, on_chunk=None, use_cache=True, on_queue=None, priority='interactive',
+                  app=None, session=None, stop_when=None, on_source=None):
+    """Run a prompt through the configured backend and return the full response text.
+
+    When on_chunk is given the response is streamed and on_chunk is called with
+    the accumulated text after every chunk, so callers can render partial output.
+    Identical requests are answered from the on-disk response cache unless
+    use_cache is False, in which case a fresh answer replaces the cached one.
+    A request identical to one already running with the same API key waits for
+    that call instead of starting its own (not when use_cache is False). Backend calls wait their turn in the shared rate limiter;
+    on_queue is told the caller's queue position while they do. Transient API
+    errors are retried with backoff, and slow calls may be hedged.
+
+    Token usage is logged to the usage ledger under app and session; session
+    defaults to the Streamlit session running on this thread. stop_when(text)
+    ends the generation early when it returns True (see early_stop.py).
+    on_source is told where the text came from: 'cache', 'coalesced' (another
+    caller's identical request) or 'generated' (a backend call made for this
+    one, where stop_when has seen every chunk).
+    """
+    cache_key = ResponseCache.make_key(backend.model_name, prompt, GENERATION_CONFIG)
+    if use_cache:
+        cached = response_cache.get(cache_key)
+        if cached is not None:
+            if on_chunk is not None:
+                on_chunk(cached)
+            usage_ledger.record(app, session or current_session_id(), backend.model_name, cached=True)
+            if on_source is not None:
+                on_source('cache')
+            return cached
+
+    # Without a Streamlit session (CLI, worker threads) requests are grouped
+    # per API key, which is hashed so it never reaches the usage ledger
+    session = session or current_session_id() or f"key-{content_digest(api_key)[:12]}"
+    prompt_tokens = estimate_tokens(prompt)
+
+    def attempt(emit, queued, cancelled):
+        # Every attempt (retry or hedge) spends quota of its own
+        queued_at = time.perf_counter()
+        stop = stop_when
+        if cancelled is not None:
+            # A hedged copy stops as soon as the other one has won
+            def stop(text):
+                return cancelled.is_set() or (stop_when is not None and stop_when(text))
+        with rate_limiter.reserve(api_key, session, prompt_tokens + EXPECTED_OUTPUT_TOKENS,
+                                  priority=priority, on_queue=queued) as reservation:
+            if cancelled is not None and cancelled.is_set():
+                # Lost while still queued: nothing sent, nothing spent
+                reservation.used(0)
+                return ""
+            # Timed from dispatch so the histograms show the model, not our queue
+            dispatched = time.perf_counter()
+            observe('llm_queue_wait', dispatched - queued_at)
+            first_chunk = []
+
+            def timed_emit(text):
+                if not first_chunk:
+                    first_chunk.append(True)
+                    observe('llm_first_token', time.perf_counter() - dispatched)
+                emit(text)
+
+            usage = {}
+            text = backend.generate(api_key, prompt, on_chunk=timed_emit if emit else None,
+                                    on_usage=usage.update, stop_when=stop)
+            observe('llm_total', time.perf_counter() - dispatched)
+            # Real counts when the API reports them, else our estimate
+            used_prompt = usage.get('prompt_tokens') or prompt_tokens
+            used_output = usage.get('output_tokens') or estimate_tokens(text or "")
+            reservation.used(used_prompt + used_output)
+        usage_ledger.record(app, session, backend.model_name, used_prompt, used_output)
+        return text
+
+    generated = []
+
+    def call_backend(publish):
+        generated.append(True)
+        text = resilient.call(attempt, on_chunk=publish, on_queue=on_queue)
+        if text:
+            response_cache.put(cache_key, text)
+        return text
+
+    if use_cache:
+        # Only callers with the same API key share a call, so one key's auth or
+        # quota error never reaches another's
+        text = in_flight.do(f"{cache_key}:{content_digest(api_key)}", call_backend, on_chunk=on_chunk)
+    else:
+        # A fresh answer was asked for; joining a running call would not be one
+        text = call_backend(on_chunk)
+    if on_source is not None:
+        on_source('generated' if generated else 'coalesced')
+    return text
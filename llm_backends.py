@@ -0,0 +1,236 @@
+# llm_backends.py - Interchangeable text-generation backends behind llm.generate_text
+import hashlib
+import math
+import os
+import random
+import threading
+import time
+
+from lazy_imports import lazy_import
+
+genai = lazy_import('google.generativeai')
+
+
+class GeminiBackend:
+    """Google Gemini through the shared per-key client pool"""
+
+    name = 'gemini'
+
+    def __init__(self, model_name, generation_config, client_pool):
+        self.model_name = model_name
+        self.generation_config = generation_config
+        self.client_pool = client_pool
+
+    @staticmethod
+    def iter_stream_text(response):
+        """Yield the text of each streamed chunk, skipping chunks without parts"""
+        for chunk in response:
+            try:
+                text = chunk.text
+            except ValueError:
+                # Final/safety chunks can carry no text parts
+                continue
+            if text:
+                yield text
+
+    @staticmethod
+    def usage_from_response(response):
+        """Token counts from a response's usage_metadata (the last chunk's when streamed)"""
+        metadata = getattr(response, 'usage_metadata', None)
+        return {
+            'prompt_tokens': getattr(metadata, 'prompt_token_count', 0) or 0,
+            'output_tokens': getattr(metadata, 'candidates_token_count', 0) or 0,
+        }
+
+    @staticmethod
+    def cancel_stream(response):
+        """Cancel the underlying gRPC stream so the model stops generating"""
+        cancel = getattr(getattr(response, '_iterator', None), 'cancel', None)
+        if cancel is not None:
+            cancel()
+
+    def generate(self, api_key, prompt, on_chunk=None, on_usage=None, stop_when=None):
+        """Return the response text, streaming accumulated text to on_chunk if given.
+
+        on_usage, if given, receives {'prompt_tokens', 'output_tokens'} once
+        the response is complete. stop_when(text) is checked after every chunk
+        (the response is streamed for it); returning True cancels the rest.
+        """
+        model = self.client_pool.get_model(api_key)
+        generation_config = genai.types.GenerationConfig(**self.generation_config)
+
+        if on_chunk is None and stop_when is None:
+            response = model.generate_content(prompt, generation_config=generation_config)
+            text = response.text
+        else:
+            response = model.generate_content(prompt, generation_config=generation_config, stream=True)
+            text = ""
+            for piece in self.iter_stream_text(response):
+                text += piece
+                if on_chunk is not None:
+                    on_chunk(text)
+                if stop_when is not None and stop_when(text):
+                    self.cancel_stream(response)
+                    break
+
+        if on_usage is not None:
+            on_usage(self.usage_from_response(response))
+        return text
+
+
+class FakeBackendError(Exception):
+    """Injected failure; code mirrors the HTTP status a real API error would carry"""
+
+    def __init__(self, code, message):
+        super().__init__(f"{code} {message}")
+        self.code = code
+
+
+# (code, message) pairs picked from when an error is injected
+INJECTED_ERRORS = [
+    (429, "Resource has been exhausted (e.g. check quota)."),
+    (500, "An internal error has occurred."),
+    (503, "The service is currently unavailable."),
+    (400, "Request payload is invalid."),
+]
+
+ROLE_WORDS = ["Engineer", "Analyst", "Manager", "Developer", "Consultant", "Designer"]
+BULLET_VERBS = ["Led", "Built", "Designed", "Launched", "Reduced", "Improved", "Automated", "Scaled"]
+BULLET_OBJECTS = [
+    "a customer analytics platform", "the release pipeline", "an onboarding flow",
+    "cross-team reporting", "the core API", "a cloud migration",
+]
+
+# Opening line of app4's prompts, which the CV and resume prompts never emit
+LINKEDIN_TASK_HEADER = "You are a LinkedIn profile optimization expert."
+
+
+class FakeBackend:
+    """Deterministic local stand-in for load testing without quota or network.
+
+    The text depends only on the prompt, so repeated prompts give identical
+    answers. Latency, token rate and errors are drawn from a seeded RNG:
+    time-to-first-token follows a lognormal (or constant) distribution around
+    ttft_ms, text is streamed at tokens_per_second (None = instantly) and
+    error_rate is the probability a call fails with an injected API error.
+    """
+
+    name = 'fake'
+
+    def __init__(self, ttft_ms=800.0, ttft_sigma=0.5, tokens_per_second=60.0,
+                 error_rate=0.0, chunk_tokens=20, seed=None):
+        self.model_name = 'fake-gemini'
+        self.ttft_ms = ttft_ms
+        self.ttft_sigma = ttft_sigma
+        self.tokens_per_second = tokens_per_second
+        self.error_rate = error_rate
+        self.chunk_tokens = chunk_tokens
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        """Configure from FAKE_LLM_* environment variables"""
+        tokens_per_second = float(os.environ.get('FAKE_LLM_TOKENS_PER_SECOND', 60))
+        seed = os.environ.get('FAKE_LLM_SEED')
+        return cls(
+            ttft_ms=float(os.environ.get('FAKE_LLM_TTFT_MS', 800)),
+            ttft_sigma=float(os.environ.get('FAKE_LLM_TTFT_SIGMA', 0.5)),
+            tokens_per_second=tokens_per_second or None,
+            error_rate=float(os.environ.get('FAKE_LLM_ERROR_RATE', 0)),
+            seed=int(seed) if seed is not None else None,
+        )
+
+    def sample_ttft(self):
+        """Seconds until the first token"""
+        if self.ttft_ms <= 0:
+            return 0.0
+        with self._rng_lock:
+            if self.ttft_sigma <= 0:
+                return self.ttft_ms / 1000
+            # Lognormal with its median at ttft_ms: most calls are quick, a few are slow
+            return self._rng.lognormvariate(math.log(self.ttft_ms / 1000), self.ttft_sigma)
+
+    def maybe_fail(self):
+        with self._rng_lock:
+            if self.error_rate <= 0 or self._rng.random() >= self.error_rate:
+                return
+            code, message = self._rng.choice(INJECTED_ERRORS)
+        raise FakeBackendError(code, message)
+
+    def compose(self, prompt):
+        """Build realistic markdown for the kind of document the prompt asks for"""
+        rng = random.Random(hashlib.sha256(prompt.encode('utf-8')).digest())
+
+        def bullets(count):
+            return "\n".join(
+                f"- {rng.choice(BULLET_VERBS)} {rng.choice(BULLET_OBJECTS)}, "
+                f"improving key metrics by {rng.randint(10, 60)}%"
+                for _ in range(count)
+            )
+
+        if "CURRENT SECTION:" in prompt:
+            # Section rewrite (app3 incremental regenerate): answer with that section only
+            heading = prompt.split("CURRENT SECTION:", 1)[1].strip().split("\n", 1)[0]
+            return f"{heading}\n{bullets(3)}"
+
+        if prompt.lstrip().startswith(LINKEDIN_TASK_HEADER):
+            # Matched on the task header: CV prompts mention LinkedIn as a contact field
+            if "You are writing ONE section" in prompt:
+                # One section of app4's parallel mode
+                return bullets(3)
+            return "\n\n".join([
+                "# OPTIMIZED LINKEDIN PROFILE",
+                f"## Professional Headline\nSenior {rng.choice(ROLE_WORDS)} | Data-driven | Cloud & Platforms",
+                "## About Section\n" + " ".join(
+                    f"I have spent {rng.randint(3, 12)} years helping teams ship reliable products."
+                    for _ in range(4)
+                ),
+                "## Experience Section Improvements\n" + "\n\n".join(
+                    f"### {rng.choice(ROLE_WORDS)} - Company {i + 1}\n{bullets(3)}" for i in range(3)
+                ),
+                "## Skills Optimization\n" + bullets(5),
+                "## Additional Recommendations\n" + bullets(3),
+            ])
+
+        document = "\n\n".join([
+            "# Jordan Example",
+            "jordan@example.com | +1 555 0100",
+            "## Professional Summary\nResults-oriented professional with a record of measurable impact.",
+            "## Experience\n" + "\n\n".join(
+                f"### {rng.choice(ROLE_WORDS)} - Company {i + 1}\n*{2015 + i} - {2017 + i}*\n{bullets(3)}"
+                for i in range(rng.randint(2, 4))
+            ),
+            "## Skills\nPython, SQL, Cloud, Leadership",
+            "## Education\n**B.Sc. Computer Science** - State University",
+        ])
+        # Models often add advice the apps strip afterwards; keep that realistic
+        if rng.random() < 0.5:
+            document += "\n\n## Additional Suggestions\n" + bullets(3)
+        return document
+
+    def generate(self, api_key, prompt, on_chunk=None, on_usage=None, stop_when=None):
+        """Return the canned response, simulating latency, streaming and failures"""
+        time.sleep(self.sample_ttft())
+        self.maybe_fail()
+        text = self.compose(prompt)
+
+        # ~4 characters per token
+        chunk_chars = self.chunk_tokens * 4
+        delay = self.chunk_tokens / self.tokens_per_second if self.tokens_per_second else 0.0
+        if on_chunk is None and stop_when is None:
+            time.sleep(delay * max(0, math.ceil(len(text) / chunk_chars) - 1))
+        else:
+            for end in range(chunk_chars, len(text) + chunk_chars, chunk_chars):
+                if on_chunk is not None:
+                    on_chunk(text[:end])
+                if stop_when is not None and stop_when(text[:end]):
+                    text = text[:end]
+                    break
+                if end < len(text):
+                    time.sleep(delay)
+
+        if on_usage is not None:
+            # Only what was generated before a stop counts
+            on_usage({'prompt_tokens': (len(prompt) + 3) // 4, 'output_tokens': (len(text) + 3) // 4})
+        return text
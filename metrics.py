@@ -0,0 +1,187 @@
+# metrics.py - Per-stage latency histograms with a Prometheus text export
+"""Timing spans for every pipeline stage, aggregated into histograms.
+
+Stages: pdf_extract, prompt_build, llm_queue_wait, llm_first_token,
+llm_total, clean_content, markdown_to_html, pdf_write (WeasyPrint itself),
+pdf_render (including render-pool queueing) and html_export. Components
+with their own counters (e.g. the PDF render pool's queue depth and
+rejections) register a stats function and are exported alongside.
+
+Set METRICS_PORT to serve http://127.0.0.1:<port>/metrics and/or METRICS_FILE
+to have the same text rewritten every METRICS_FILE_INTERVAL seconds.
+"""
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+METRIC_PREFIX = 'resume_app'
+METRIC_NAME = f'{METRIC_PREFIX}_stage_seconds'
+# Upper bounds in seconds, from cache hits up to slow LLM completions
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+
+METRICS_PORT = int(os.environ.get('METRICS_PORT', 0))
+METRICS_FILE = os.environ.get('METRICS_FILE', '')
+METRICS_FILE_INTERVAL = float(os.environ.get('METRICS_FILE_INTERVAL', 15))
+
+
+class Histogram:
+    """Bucketed observations; not thread-safe on its own"""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        # Last slot is the +Inf bucket
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        """(upper bound, observations <= bound) pairs ending with +Inf"""
+        total = 0
+        pairs = []
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            total += count
+            pairs.append((bound, total))
+        return pairs
+
+
+class StageMetrics:
+    """One latency histogram per stage, shared by every session in the process"""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self._histograms = {}
+        self._collectors = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, stats_fn, counters=()):
+        """Export stats_fn()'s numbers as resume_app_<name>_<key> on every render.
+
+        Keys listed in counters only ever grow and become <key>_total
+        counters; every other number is a gauge.
+        """
+        with self._lock:
+            self._collectors[name] = (stats_fn, frozenset(counters))
+
+    def observe(self, stage, seconds):
+        with self._lock:
+            histogram = self._histograms.get(stage)
+            if histogram is None:
+                histogram = self._histograms[stage] = Histogram(self.buckets)
+            histogram.observe(seconds)
+
+    @contextmanager
+    def span(self, stage):
+        """Time the with-block as one observation of stage (also when it raises)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def summary(self):
+        """{stage: {'count', 'sum_seconds', 'avg_seconds'}} for display"""
+        with self._lock:
+            return {
+                stage: {
+                    'count': histogram.count,
+                    'sum_seconds': histogram.sum,
+                    'avg_seconds': histogram.sum / histogram.count if histogram.count else 0.0,
+                }
+                for stage, histogram in sorted(self._histograms.items())
+            }
+
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)"""
+        lines = [
+            f"# HELP {METRIC_NAME} Latency of each resume/CV/LinkedIn pipeline stage.",
+            f"# TYPE {METRIC_NAME} histogram",
+        ]
+        with self._lock:
+            for stage, histogram in sorted(self._histograms.items()):
+                for bound, count in histogram.cumulative():
+                    le = '+Inf' if bound == float('inf') else repr(bound)
+                    lines.append(f'{METRIC_NAME}_bucket{{stage="{stage}",le="{le}"}} {count}')
+                lines.append(f'{METRIC_NAME}_sum{{stage="{stage}"}} {histogram.sum!r}')
+                lines.append(f'{METRIC_NAME}_count{{stage="{stage}"}} {histogram.count}')
+            collectors = sorted(self._collectors.items())
+        # Outside the lock: stats functions take locks of their own
+        for name, (stats_fn, counters) in collectors:
+            for key, value in sorted(stats_fn().items()):
+                if not isinstance(value, (int, float)):
+                    continue
+                if key in counters:
+                    metric, kind = f'{METRIC_PREFIX}_{name}_{key}_total', 'counter'
+                else:
+                    metric, kind = f'{METRIC_PREFIX}_{name}_{key}', 'gauge'
+                lines.append(f"# TYPE {metric} {kind}")
+                lines.append(f"{metric} {value!r}")
+        return "\n".join(lines) + "\n"
+
+    def write_file(self, path):
+        """Atomically replace path with the current exposition text"""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.render())
+        os.replace(tmp_path, path)
+
+
+stage_metrics = StageMetrics()
+observe = stage_metrics.observe
+span = stage_metrics.span
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?', 1)[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = stage_metrics.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Scrapes every few seconds would flood the Streamlit log
+        pass
+
+
+_exporter_started = False
+_exporter_lock = threading.Lock()
+
+
+def start_exporter(port=METRICS_PORT, path=METRICS_FILE, interval=METRICS_FILE_INTERVAL):
+    """Start the /metrics endpoint and/or file writer once per process"""
+    global _exporter_started
+    with _exporter_lock:
+        if _exporter_started or not (port or path):
+            return
+        _exporter_started = True
+
+    if port:
+        # Local only: put a reverse proxy in front to scrape from elsewhere
+        try:
+            server = ThreadingHTTPServer(('127.0.0.1', port), _MetricsHandler)
+        except OSError as e:
+            # e.g. another app on this machine already took the port
+            print(f"metrics: cannot listen on port {port}: {e}", file=sys.stderr)
+        else:
+            threading.Thread(target=server.serve_forever, name='metrics-http', daemon=True).start()
+
+    if path:
+        def write_periodically():
+            while True:
+                time.sleep(interval)
+                stage_metrics.write_file(path)
+
+        threading.Thread(target=write_periodically, name='metrics-file', daemon=True).start()
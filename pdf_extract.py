@@ -0,0 +1,78 @@
+# pdf_extract.py - Page-sharded PDF text extraction
+import io
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from compaction import PAGE_BREAK
+from lazy_imports import lazy_import
+from metrics import span
+
+PyPDF2 = lazy_import('PyPDF2')
+
+# Pages beyond the cap are ignored; long portfolios rarely add resume content
+MAX_PAGES = int(os.environ.get('PDF_MAX_PAGES', 50))
+EXTRACT_WORKERS = int(os.environ.get('PDF_EXTRACT_WORKERS', max(1, (os.cpu_count() or 2) - 1)))
+# Below this many pages, shipping the PDF to workers costs more than it saves
+MIN_PAGES_TO_SHARD = int(os.environ.get('PDF_MIN_PAGES_TO_SHARD', 8))
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # spawn rather than fork: the Streamlit server is multi-threaded
+            _executor = ProcessPoolExecutor(
+                max_workers=EXTRACT_WORKERS,
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+        return _executor
+
+
+def extract_page_range(pdf_bytes, start, stop):
+    """Extract the text of pages [start, stop) as a list of strings"""
+    pdf_reader = PyPDF2.PdfReader(io.BytesIO(pdf_bytes))
+    return [pdf_reader.pages[i].extract_text() for i in range(start, stop)]
+
+
+def shard_ranges(num_pages, num_shards):
+    """Split num_pages into at most num_shards contiguous (start, stop) ranges"""
+    num_shards = max(1, min(num_shards, num_pages))
+    size, extra = divmod(num_pages, num_shards)
+    ranges = []
+    start = 0
+    for shard in range(num_shards):
+        stop = start + size + (1 if shard < extra else 0)
+        ranges.append((start, stop))
+        start = stop
+    return ranges
+
+
+def extract_text(pdf_bytes, max_pages=MAX_PAGES, workers=EXTRACT_WORKERS):
+    """Extract text from up to max_pages pages, sharding large PDFs across processes"""
+    with span('pdf_extract'):
+        return _extract_text(pdf_bytes, max_pages, workers)
+
+
+def _extract_text(pdf_bytes, max_pages, workers):
+    num_pages = len(PyPDF2.PdfReader(io.BytesIO(pdf_bytes)).pages)
+    if max_pages:
+        num_pages = min(num_pages, max_pages)
+
+    if workers <= 1 or num_pages < MIN_PAGES_TO_SHARD:
+        pages = extract_page_range(pdf_bytes, 0, num_pages)
+    else:
+        executor = get_executor()
+        futures = [
+            executor.submit(extract_page_range, pdf_bytes, start, stop)
+            for start, stop in shard_ranges(num_pages, workers)
+        ]
+        pages = [text for future in futures for text in future.result()]
+
+    # Joined once instead of growing a string page by page; the page breaks
+    # let compaction tell running headers/footers from repeated content
+    return f"\n{PAGE_BREAK}\n".join(pages).strip()
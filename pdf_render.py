@@ -0,0 +1,289 @@
+# pdf_render.py - Shared Markdown -> PDF (and HTML) rendering for the Streamlit apps
+import math
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from html import unescape
+from urllib.parse import urlsplit
+
+from artifact_store import artifact_store
+from caching import LRUCache, content_digest
+from lazy_imports import lazy_import
+from metrics import observe, span, stage_metrics
+from pdf_themes import PAGE_LAYOUTS, THEMES
+from render_pool import RenderPool
+
+# WeasyPrint pulls in Pango/Cairo, so it is only loaded when a PDF is rendered
+markdown = lazy_import('markdown')
+weasyprint = lazy_import('weasyprint')
+weasyprint_fonts = lazy_import('weasyprint.text.fonts')
+
+# Rendered PDFs keyed by a digest of the markdown and theme. Streamlit keeps
+# imported modules alive across reruns and sessions, so this is process-wide.
+render_cache = LRUCache(max_entries=64, max_bytes=64 * 1024 * 1024)
+
+# Set PDF_RENDER_WORKERS=0 to render in-process (e.g. where spawning is not allowed)
+RENDER_WORKERS = int(os.environ.get('PDF_RENDER_WORKERS', max(1, (os.cpu_count() or 2) - 1)))
+RENDER_TIMEOUT = float(os.environ.get('PDF_RENDER_TIMEOUT', 60))
+# PDFs are rendered only when a user asks for one; PDF_PRERENDER=1 starts
+# every finished document's render in the background instead
+PRERENDER = os.environ.get('PDF_PRERENDER', '0') == '1'
+
+# Screen-only page frame for the HTML export, so browsers show the document
+# at its printed size; printing from the browser uses the theme's @page rules
+PAGE_FRAME_CSS = """
+    @media screen {{
+        html {{
+            background: #e9ecef;
+        }}
+        body {{
+            box-sizing: border-box;
+            width: {width}px;
+            max-width: none;
+            min-height: {height}px;
+            margin: 16px auto;
+            padding: {margin}px;
+            background: #ffffff;
+            box-shadow: 0 1px 6px rgba(0, 0, 0, 0.2);
+        }}
+    }}
+"""
+
+# Average glyph width of the themes' sans-serif fonts, in ems
+AVG_CHAR_EM = 0.5
+# List items are indented by the default 40px padding plus the themes' 20px margin
+LIST_INDENT = 60
+LIST_ITEM = re.compile(r'([-*+]|\d+\.)\s+')
+HEADING = re.compile(r'(#{1,6})\s+(.*)')
+# Emphasis, code and link targets take no room once rendered
+INLINE_MARKUP = re.compile(r'\*\*|__|[*_`]|\[|\]\([^)]*\)')
+
+# URL schemes kept in links and images; javascript:, data: etc. become '#'
+SAFE_URL_SCHEMES = {'', 'http', 'https', 'mailto', 'tel'}
+_url_attribute = re.compile(r'\b(href|src)="([^"]*)"')
+_url_noise = re.compile(r'[\x00-\x20]')
+
+
+def _safe_url(match):
+    url = _url_noise.sub('', unescape(match.group(2)))
+    if urlsplit(url).scheme.lower() in SAFE_URL_SCHEMES:
+        return match.group(0)
+    return f'{match.group(1)}="#"'
+
+
+def markdown_to_html(markdown_content):
+    """Convert generated markdown to HTML, keeping raw HTML in it as plain text.
+
+    Model output can carry HTML injected through an uploaded resume or a
+    pasted job description; neither the print preview nor WeasyPrint should
+    act on it, so tags are escaped and unsafe link targets dropped.
+    """
+    converter = markdown.Markdown()
+    converter.preprocessors.deregister('html_block')
+    converter.inlinePatterns.deregister('html')
+    return _url_attribute.sub(_safe_url, converter.convert(markdown_content))
+
+
+def build_html(markdown_content, stylesheet=''):
+    """Wrap converted markdown in a standalone HTML document with the stylesheet"""
+    html_content = markdown_to_html(markdown_content)
+    return f"""
+        <!DOCTYPE html>
+        <html>
+        <head>
+            <meta charset="utf-8">
+            <style>
+{stylesheet}
+            </style>
+        </head>
+        <body>
+            {html_content}
+        </body>
+        </html>
+        """
+
+
+def render_html(markdown_content, theme='resume'):
+    """Standalone HTML export: the PDF's markdown conversion and theme CSS, without WeasyPrint"""
+    if theme not in THEMES:
+        raise ValueError(f"Unknown PDF theme '{theme}' (available: {', '.join(THEMES)})")
+    with span('html_export'):
+        return build_html(markdown_content, THEMES[theme] + PAGE_FRAME_CSS.format(**PAGE_LAYOUTS[theme]))
+
+
+def estimate_pages(markdown_content, theme='resume'):
+    """Estimate the PDF's page count from the markdown, without laying it out.
+
+    Each line is wrapped at the theme's average characters per line and the
+    line heights are summed, so expect it to be off by a page at times.
+    """
+    layout = PAGE_LAYOUTS[theme]
+    content_width = layout['width'] - 2 * layout['margin']
+    body_line = layout['font_size'] * layout['line_height']
+    height = 0.0
+    for line in markdown_content.splitlines():
+        text = line.strip()
+        if not text:
+            # Paragraph and list spacing
+            height += body_line / 2
+            continue
+        heading = HEADING.match(text)
+        list_item = LIST_ITEM.match(text)
+        indent = 0
+        if heading:
+            font_size = layout['headings'].get(len(heading.group(1)), layout['font_size'])
+            line_height = font_size * 1.2
+            text = heading.group(2)
+            # Heading margins and rules
+            height += font_size
+        else:
+            font_size, line_height = layout['font_size'], body_line
+            if list_item:
+                indent = LIST_INDENT
+                text = text[list_item.end():]
+        chars_per_line = max(1, int((content_width - indent) / (font_size * AVG_CHAR_EM)))
+        height += math.ceil(len(INLINE_MARKUP.sub('', text)) / chars_per_line) * line_height
+    return max(1, math.ceil(height / (layout['height'] - 2 * layout['margin'])))
+
+
+# Fonts and parsed theme stylesheets, loaded once per process (the server
+# process when rendering in-process, otherwise each pool worker)
+_font_config = None
+_theme_css = {}
+_theme_lock = threading.Lock()
+
+
+def get_font_config():
+    """Return the FontConfiguration shared by every theme in this process"""
+    global _font_config
+    with _theme_lock:
+        if _font_config is None:
+            _font_config = weasyprint_fonts.FontConfiguration()
+        return _font_config
+
+
+def get_theme_css(theme):
+    """Return the parsed CSS object for a theme, parsing it on first use only"""
+    if theme not in THEMES:
+        raise ValueError(f"Unknown PDF theme '{theme}' (available: {', '.join(THEMES)})")
+    font_config = get_font_config()
+    with _theme_lock:
+        css = _theme_css.get(theme)
+        if css is None:
+            css = weasyprint.CSS(string=THEMES[theme], font_config=font_config)
+            _theme_css[theme] = css
+        return css
+
+
+def warm_worker():
+    """Parse every theme and run WeasyPrint's layout once before the first real render"""
+    for theme in THEMES:
+        get_theme_css(theme)
+    render_in_worker("warm up", next(iter(THEMES)))
+
+
+def render_in_worker_timed(markdown_content, theme):
+    """Render one document; also return its stage timings for the parent process"""
+    start = time.perf_counter()
+    html = build_html(markdown_content)
+    converted = time.perf_counter()
+    pdf_bytes = weasyprint.HTML(string=html).write_pdf(
+        stylesheets=[get_theme_css(theme)], font_config=get_font_config()
+    )
+    return pdf_bytes, {
+        'markdown_to_html': converted - start,
+        'pdf_write': time.perf_counter() - converted,
+    }
+
+
+def render_in_worker(markdown_content, theme):
+    """Render one document with a precompiled theme and the shared font configuration"""
+    return render_in_worker_timed(markdown_content, theme)[0]
+
+
+render_pool = RenderPool(
+    render_in_worker_timed, initializer=warm_worker, workers=RENDER_WORKERS or 1, timeout=RENDER_TIMEOUT
+)
+# Queue depth and rejections show whether the pool is the bottleneck
+stage_metrics.register('render_pool', render_pool.stats, counters=RenderPool.COUNTERS)
+
+
+def render_pdf(markdown_content, theme='resume'):
+    """Render markdown to PDF bytes, reusing a cached render of identical input.
+
+    Renders are looked up in this process's LRU cache first, then in the
+    on-disk artifact store shared with other processes.
+    """
+    if theme not in THEMES:
+        raise ValueError(f"Unknown PDF theme '{theme}' (available: {', '.join(THEMES)})")
+    # The stylesheet text is part of the key so editing a theme invalidates it
+    key = content_digest(markdown_content, theme, THEMES[theme])
+    return render_cache.get_or_compute(key, lambda: _render_stored(key, markdown_content, theme))
+
+
+# Background renders started before anyone asks for the PDF, keyed like
+# render_cache; finished futures are kept so every rerun finds the same one
+_prerenders = LRUCache(max_entries=64)
+_prerender_lock = threading.Lock()
+# Threads only wait on the render pool (or render in-process when it is off)
+_prerender_executor = ThreadPoolExecutor(max_workers=RENDER_WORKERS or 1, thread_name_prefix='prerender')
+
+
+def render_pdf_async(markdown_content, theme='resume'):
+    """Start render_pdf in the background and return its Future.
+
+    Called as soon as a document's markdown is final, so the PDF is usually
+    ready by the time the user reaches the download button. Repeated calls
+    for the same document return the same Future instead of rendering again,
+    unless that render failed (pool timeout, full queue, WeasyPrint error).
+    """
+    if theme not in THEMES:
+        raise ValueError(f"Unknown PDF theme '{theme}' (available: {', '.join(THEMES)})")
+    key = content_digest(markdown_content, theme, THEMES[theme])
+    with _prerender_lock:
+        future = _prerenders.get(key)
+        if future is None or _failed(future):
+            future = _prerender_executor.submit(render_pdf, markdown_content, theme)
+            _prerenders.put(key, future)
+        return future
+
+
+def find_pdf_render(markdown_content, theme='resume'):
+    """Return the Future of an already started render_pdf_async, or None.
+
+    A failed render is returned once, so its error can be shown, and then
+    forgotten: the next lookup returns None and the user can try again.
+    """
+    key = content_digest(markdown_content, theme, THEMES.get(theme, ''))
+    with _prerender_lock:
+        future = _prerenders.get(key)
+        if future is not None and _failed(future):
+            _prerenders.pop(key)
+        return future
+
+
+def _failed(future):
+    return future.done() and future.exception() is not None
+
+
+def _render_stored(key, markdown_content, theme):
+    pdf_bytes = artifact_store.get(key, 'pdf')
+    if pdf_bytes is None:
+        pdf_bytes = _render_uncached(markdown_content, theme)
+        artifact_store.put(key, 'pdf', pdf_bytes)
+    return pdf_bytes
+
+
+def _render_uncached(markdown_content, theme):
+    start = time.perf_counter()
+    if RENDER_WORKERS == 0:
+        pdf_bytes, timings = render_in_worker_timed(markdown_content, theme)
+    else:
+        pdf_bytes, timings = render_pool.run(markdown_content, theme)
+    # Workers time their own stages; the total adds pool queueing and IPC
+    for stage, seconds in timings.items():
+        observe(stage, seconds)
+    observe('pdf_render', time.perf_counter() - start)
+    return pdf_bytes
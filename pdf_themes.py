@@ -0,0 +1,181 @@
+# pdf_themes.py - Stylesheets for the exported PDFs, selectable by name
+
+# Resume optimizer (app.py)
+RESUME_STYLESHEET = """
+    body {
+        font-family: 'Arial', sans-serif;
+        line-height: 1.6;
+        margin: 40px;
+        color: #333;
+        max-width: 800px;
+    }
+    h1 {
+        color: #2c3e50;
+        border-bottom: 2px solid #3498db;
+        padding-bottom: 10px;
+        font-size: 28px;
+    }
+    h2 {
+        color: #34495e;
+        margin-top: 25px;
+        font-size: 20px;
+    }
+    h3 {
+        color: #7f8c8d;
+        font-size: 16px;
+    }
+    ul {
+        margin-left: 20px;
+    }
+    li {
+        margin-bottom: 5px;
+    }
+    p {
+        margin-bottom: 10px;
+    }
+    strong {
+        color: #2c3e50;
+    }
+"""
+
+# Professional CV on A4 (app3.py)
+CV_A4_STYLESHEET = """
+    @page {
+        size: A4;
+        margin: 1in;
+    }
+    body {
+        font-family: 'Calibri', 'Arial', sans-serif;
+        line-height: 1.5;
+        color: #333333;
+        max-width: 100%;
+        font-size: 11pt;
+    }
+    h1 {
+        color: #2c3e50;
+        font-size: 24pt;
+        margin-bottom: 5px;
+        border-bottom: 2px solid #3498db;
+        padding-bottom: 5px;
+    }
+    h2 {
+        color: #34495e;
+        font-size: 14pt;
+        margin-top: 20px;
+        margin-bottom: 10px;
+        text-transform: uppercase;
+        font-weight: bold;
+    }
+    h3 {
+        color: #2c3e50;
+        font-size: 12pt;
+        margin-bottom: 5px;
+        font-weight: bold;
+    }
+    h4 {
+        color: #7f8c8d;
+        font-size: 10pt;
+        margin-bottom: 5px;
+        font-style: italic;
+    }
+    ul {
+        margin-left: 20px;
+        margin-bottom: 10px;
+    }
+    li {
+        margin-bottom: 3px;
+    }
+    p {
+        margin-bottom: 8px;
+        text-align: justify;
+    }
+    strong {
+        color: #2c3e50;
+    }
+    .contact-info {
+        text-align: center;
+        margin-bottom: 20px;
+        color: #7f8c8d;
+    }
+"""
+
+# LinkedIn-style formatting (app4.py)
+LINKEDIN_BLUE_STYLESHEET = """
+    @page {
+        size: A4;
+        margin: 1in;
+    }
+    body {
+        font-family: 'Arial', sans-serif;
+        line-height: 1.6;
+        color: #333333;
+        max-width: 100%;
+        font-size: 11pt;
+    }
+    h1 {
+        color: #0077b5;
+        font-size: 24pt;
+        margin-bottom: 10px;
+        text-align: center;
+        border-bottom: 2px solid #0077b5;
+        padding-bottom: 10px;
+    }
+    h2 {
+        color: #0077b5;
+        font-size: 16pt;
+        margin-top: 25px;
+        margin-bottom: 10px;
+        font-weight: bold;
+    }
+    h3 {
+        color: #2c3e50;
+        font-size: 14pt;
+        margin-bottom: 8px;
+    }
+    ul {
+        margin-left: 20px;
+        margin-bottom: 15px;
+    }
+    li {
+        margin-bottom: 5px;
+    }
+    p {
+        margin-bottom: 10px;
+        text-align: justify;
+    }
+    strong {
+        color: #0077b5;
+    }
+    .linkedin-section {
+        background-color: #f8f9fa;
+        padding: 15px;
+        border-radius: 8px;
+        margin-bottom: 20px;
+        border-left: 4px solid #0077b5;
+    }
+"""
+
+THEMES = {
+    'resume': RESUME_STYLESHEET,
+    'cv-a4': CV_A4_STYLESHEET,
+    'linkedin-blue': LINKEDIN_BLUE_STYLESHEET,
+}
+
+# Page geometry of each theme in CSS px (96 per inch), for the HTML print
+# preview and pdf_render.estimate_pages. Keep in sync with the stylesheets:
+# margin is the @page margin (WeasyPrint's default is 75px) plus any body margin.
+A4_WIDTH, A4_HEIGHT = 794, 1123
+PAGE_LAYOUTS = {
+    'resume': {
+        'width': A4_WIDTH, 'height': A4_HEIGHT, 'margin': 75 + 40,
+        'font_size': 16, 'line_height': 1.6, 'headings': {1: 28, 2: 20, 3: 16},
+    },
+    'cv-a4': {
+        'width': A4_WIDTH, 'height': A4_HEIGHT, 'margin': 96,
+        'font_size': 14.7, 'line_height': 1.5, 'headings': {1: 32, 2: 18.7, 3: 16, 4: 13.3},
+    },
+    'linkedin-blue': {
+        'width': A4_WIDTH, 'height': A4_HEIGHT, 'margin': 96,
+        'font_size': 14.7, 'line_height': 1.6, 'headings': {1: 32, 2: 21.3, 3: 18.7},
+    },
+}
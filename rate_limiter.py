@@ -0,0 +1,241 @@
+# rate_limiter.py - Shared requests/tokens-per-minute scheduler for LLM calls
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+
+# Priority lanes, highest first; a lane is served only while the ones above it are empty
+PRIORITIES = ('interactive', 'batch')
+
+# Quotas per API key. Set slightly below the real quota; 0 disables a limit
+REQUESTS_PER_MINUTE = int(os.environ.get('LLM_RPM', 15))
+TOKENS_PER_MINUTE = int(os.environ.get('LLM_TPM', 1000000))
+QUEUE_TIMEOUT = float(os.environ.get('LLM_QUEUE_TIMEOUT', 300))
+# Pause after a 429 when no bucket is configured to absorb it
+THROTTLE_SECONDS = 5.0
+# Quotas of API keys unused this long are forgotten
+IDLE_SECONDS = 3600
+
+
+class RateLimitTimeout(Exception):
+    """Raised when a request waited longer than the queue timeout for quota"""
+
+
+class TokenBucket:
+    """Refills at per_minute/60 units per second up to capacity (not thread-safe)"""
+
+    def __init__(self, per_minute, capacity=None):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity or per_minute
+        self.level = float(self.capacity)
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount, now):
+        """Seconds until amount units are available"""
+        self._refill(now)
+        # Oversized requests only need a full bucket, or they would wait forever
+        amount = min(amount, self.capacity)
+        return max(0.0, (amount - self.level) / self.rate)
+
+    def take(self, amount, now):
+        self._refill(now)
+        self.level -= min(amount, self.capacity)
+
+    def adjust(self, amount):
+        """Charge (positive) or refund (negative) units after the fact"""
+        self.level = min(self.capacity, self.level - amount)
+
+    def drain(self, now):
+        self._refill(now)
+        self.level = min(self.level, 0.0)
+
+
+class _Quota:
+    """Buckets and waiting requests for one API key"""
+
+    def __init__(self, rpm, tpm):
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+        # lane -> session -> its waiting tickets, sessions in round-robin order
+        self.lanes = {priority: OrderedDict() for priority in PRIORITIES}
+        self.paused_until = 0.0
+        self.last_used = time.monotonic()
+
+    def order(self):
+        """Waiting tickets in dispatch order: by lane, then round-robin over sessions"""
+        order = []
+        for lane in self.lanes.values():
+            queues = list(lane.values())
+            depth = max((len(queue) for queue in queues), default=0)
+            for k in range(depth):
+                order.extend(queue[k] for queue in queues if k < len(queue))
+        return order
+
+    def wait_time(self, tokens, now):
+        wait = max(0.0, self.paused_until - now)
+        if self.requests:
+            wait = max(wait, self.requests.wait_time(1, now))
+        if self.tokens:
+            wait = max(wait, self.tokens.wait_time(tokens, now))
+        return wait
+
+    def take(self, tokens, now):
+        if self.requests:
+            self.requests.take(1, now)
+        if self.tokens:
+            self.tokens.take(tokens, now)
+        self.last_used = now
+
+
+class Reservation:
+    """Quota held by one dispatched request; see RateLimiter.reserve"""
+
+    def __init__(self, limiter, scope, tokens):
+        self.limiter = limiter
+        self.scope = scope
+        self.tokens = tokens
+        self.actual_tokens = None
+
+    def used(self, tokens):
+        """Record the tokens the request really used so the estimate can be settled"""
+        self.actual_tokens = tokens
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc is not None and getattr(exc, 'code', None) == 429:
+            # The provider says the window is full: stop every session from piling on
+            self.limiter.throttle(self.scope)
+        elif self.actual_tokens is not None:
+            self.limiter.settle(self.scope, self.actual_tokens - self.tokens)
+        return False
+
+
+class RateLimiter:
+    """Token-bucket RPM/TPM limits per API key with a fair, prioritized queue.
+
+    Requests wait in priority lanes; within a lane, sessions take turns so one
+    session's burst (e.g. parallel section requests) cannot starve another.
+    Only the request at the head of the queue draws from the buckets, so the
+    queue drains at the quota ceiling instead of racing into 429 errors.
+    """
+
+    def __init__(self, rpm=REQUESTS_PER_MINUTE, tpm=TOKENS_PER_MINUTE, queue_timeout=QUEUE_TIMEOUT):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.queue_timeout = queue_timeout
+        self._cond = threading.Condition()
+        self._quotas = {}
+        self._granted = 0
+        self._queued = 0
+        self._wait_seconds = 0.0
+        self._timeouts = 0
+        self._throttled = 0
+
+    def _quota(self, scope, now):
+        quota = self._quotas.get(scope)
+        if quota is None:
+            for key, idle in list(self._quotas.items()):
+                if now - idle.last_used > IDLE_SECONDS and not idle.order():
+                    del self._quotas[key]
+            quota = self._quotas[scope] = _Quota(self.rpm, self.tpm)
+        return quota
+
+    def reserve(self, scope, session, tokens, priority='interactive', on_queue=None):
+        """Wait for a turn and quota, then return a Reservation to use as a context manager.
+
+        on_queue, if given, is called on this thread with the number of
+        requests ahead whenever it changes while waiting (0 means next, waiting
+        for quota), and with None once the request is dispatched.
+        """
+        ticket = object()
+        queued = False
+        started = time.monotonic()
+        deadline = started + self.queue_timeout
+        reported = None
+        with self._cond:
+            quota = self._quota(scope, started)
+            lane = quota.lanes[priority]
+            lane.setdefault(session, deque()).append(ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    ahead = quota.order().index(ticket)
+                    wait = quota.wait_time(tokens, now) if ahead == 0 else None
+                    if wait == 0:
+                        quota.take(tokens, now)
+                        break
+                    queued = True
+                    if on_queue is not None and ahead != reported:
+                        reported = ahead
+                        # Released while the callback draws, then re-checked
+                        self._cond.release()
+                        try:
+                            on_queue(ahead)
+                        finally:
+                            self._cond.acquire()
+                        continue
+                    if now >= deadline:
+                        self._timeouts += 1
+                        raise RateLimitTimeout(
+                            f"The AI model is busy: no quota freed up within {self.queue_timeout:.0f} s. Please try again shortly."
+                        )
+                    self._cond.wait(min(wait, deadline - now) if wait is not None else deadline - now)
+            finally:
+                tickets = lane[session]
+                tickets.remove(ticket)
+                if tickets:
+                    # Served sessions go to the back of the round-robin
+                    lane.move_to_end(session)
+                else:
+                    del lane[session]
+                self._cond.notify_all()
+
+            self._granted += 1
+            if queued:
+                self._queued += 1
+                self._wait_seconds += time.monotonic() - started
+
+        if reported is not None:
+            on_queue(None)
+        return Reservation(self, scope, tokens)
+
+    def settle(self, scope, extra_tokens):
+        """Charge or refund the difference between estimated and actual tokens"""
+        with self._cond:
+            quota = self._quotas.get(scope)
+            if quota and quota.tokens:
+                quota.tokens.adjust(extra_tokens)
+            self._cond.notify_all()
+
+    def throttle(self, scope):
+        """Back off a key after a 429: empty its buckets so waiting requests hold off"""
+        with self._cond:
+            now = time.monotonic()
+            quota = self._quota(scope, now)
+            self._throttled += 1
+            if quota.requests:
+                quota.requests.drain(now)
+            if quota.tokens:
+                quota.tokens.drain(now)
+            if not (quota.requests or quota.tokens):
+                quota.paused_until = now + THROTTLE_SECONDS
+            self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            return {
+                'rpm': self.rpm,
+                'tpm': self.tpm,
+                'waiting': sum(len(quota.order()) for quota in self._quotas.values()),
+                'granted': self._granted,
+                'queued': self._queued,
+                'avg_wait_seconds': self._wait_seconds / self._queued if self._queued else 0.0,
+                'timeouts': self._timeouts,
+                'throttled': self._throttled,
+            }
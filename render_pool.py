@@ -0,0 +1,125 @@
+# render_pool.py - Bounded process pool for CPU-bound PDF rendering
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+
+class RenderQueueFull(Exception):
+    """Raised when the pool is saturated and a render could not be queued in time"""
+
+
+class RenderPool:
+    """Process pool with a bounded queue, per-render timeouts and queue metrics.
+
+    WeasyPrint layout is pure Python and holds the GIL, so rendering in worker
+    processes keeps one session's export from stalling every other session.
+    At most max_pending renders may be queued or running; further submissions
+    wait up to queue_timeout for a slot and then fail with RenderQueueFull.
+    """
+
+    # Keys of stats() that only ever grow
+    COUNTERS = ('submitted', 'completed', 'failed', 'rejected', 'timed_out')
+
+    def __init__(self, worker_fn, initializer=None, initargs=(), workers=None,
+                 max_pending=None, timeout=60, queue_timeout=10):
+        self.worker_fn = worker_fn
+        self.initializer = initializer
+        self.initargs = initargs
+        self.workers = workers or max(1, (os.cpu_count() or 2) - 1)
+        self.max_pending = max_pending or self.workers * 4
+        self.timeout = timeout
+        self.queue_timeout = queue_timeout
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._executor = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.latency_seconds = 0.0
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                # spawn rather than fork: the Streamlit server is multi-threaded
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=self.initializer,
+                    initargs=self.initargs,
+                )
+            return self._executor
+
+    def submit(self, *args):
+        """Queue a render and return its future, applying backpressure when full"""
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            with self._lock:
+                self.rejected += 1
+            raise RenderQueueFull(
+                f"PDF renderer is busy ({self.max_pending} renders pending), please try again"
+            )
+        started = time.perf_counter()
+        try:
+            future = self._get_executor().submit(self.worker_fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        with self._lock:
+            self._pending += 1
+            self.submitted += 1
+
+        def _done(f):
+            # The slot is only freed once the worker is really done, so a timed
+            # out render still counts against the queue until it finishes
+            with self._lock:
+                self._pending -= 1
+                if not f.cancelled() and f.exception() is None:
+                    self.completed += 1
+                    self.latency_seconds += time.perf_counter() - started
+                else:
+                    self.failed += 1
+            self._slots.release()
+
+        future.add_done_callback(_done)
+        return future
+
+    def run(self, *args):
+        """Render synchronously in a worker, raising TimeoutError after self.timeout"""
+        future = self.submit(*args)
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            with self._lock:
+                self.timed_out += 1
+            raise TimeoutError(f"PDF render took longer than {self.timeout:.0f} s") from None
+        except BrokenProcessPool:
+            # A worker died (e.g. out of memory); start a fresh pool next time
+            self.shutdown()
+            raise
+
+    def stats(self):
+        """Return a snapshot of queue depth and throughput counters"""
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'pending': self._pending,
+                'max_pending': self.max_pending,
+                'submitted': self.submitted,
+                'completed': self.completed,
+                'failed': self.failed,
+                'rejected': self.rejected,
+                'timed_out': self.timed_out,
+                # Queue wait plus render time, from submit to completion
+                'avg_latency_seconds': self.latency_seconds / self.completed if self.completed else 0.0,
+            }
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
@@ -0,0 +1,234 @@
+# resilience.py - Retries with jittered backoff and hedged requests for LLM calls
+import os
+import queue
+import random
+import threading
+import time
+from collections import deque
+
+# HTTP statuses worth another try: timeouts, quota, transient server errors
+RETRYABLE_CODES = {408, 429, 500, 502, 503, 504}
+
+MAX_ATTEMPTS = int(os.environ.get('LLM_MAX_ATTEMPTS', 3))
+BACKOFF_BASE = float(os.environ.get('LLM_BACKOFF_BASE', 1.0))
+BACKOFF_CAP = float(os.environ.get('LLM_BACKOFF_CAP', 20.0))
+# Seconds without any output before a duplicate request is sent: a number,
+# 'auto' for the observed p95, or 0 to never hedge
+HEDGE_AFTER = os.environ.get('LLM_HEDGE_AFTER', '0')
+# 'auto' hedging starts once this many latencies have been observed
+MIN_SAMPLES = 20
+
+
+def is_retryable(exc):
+    """True for errors a repeat of the same request can fix"""
+    code = getattr(exc, 'code', None)
+    if code is not None:
+        try:
+            # API errors carry the HTTP status (google.api_core, FakeBackendError)
+            return int(code) in RETRYABLE_CODES
+        except (TypeError, ValueError):
+            return False
+    return isinstance(exc, (TimeoutError, ConnectionError))
+
+
+def backoff_delay(attempt, base=BACKOFF_BASE, cap=BACKOFF_CAP, rng=random):
+    """Full-jitter exponential backoff: uniform in [0, min(cap, base * 2**attempt)]"""
+    return rng.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class LatencyTracker:
+    """Rolling window of seconds-to-first-output for picking the hedge deadline"""
+
+    def __init__(self, window=200):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, fraction):
+        with self._lock:
+            samples = sorted(self._samples)
+        if len(samples) < MIN_SAMPLES:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+class ResilientCaller:
+    """Run an LLM request with retries and, optionally, a hedged duplicate.
+
+    attempt_fn(on_chunk, on_queue, cancelled) performs one request and returns
+    its text. Retryable failures are retried up to max_attempts times with
+    full-jitter backoff. When hedging, the request runs on a worker thread and
+    a second copy is started if it produces no output within hedge_after
+    seconds of leaving the rate-limit queue; whichever finishes first wins.
+    cancelled is then a threading.Event set once the other copy has won, and
+    the attempt should stop generating (it is None for unhedged calls). Chunks
+    and queue updates are relayed back to the calling thread, so Streamlit
+    callbacks still run on the session's own thread.
+    """
+
+    def __init__(self, max_attempts=MAX_ATTEMPTS, backoff_base=BACKOFF_BASE,
+                 backoff_cap=BACKOFF_CAP, hedge_after=HEDGE_AFTER):
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.hedge_after = hedge_after
+        # Streaming and non-streaming calls have very different time to first output
+        self.latency = {True: LatencyTracker(), False: LatencyTracker()}
+        self._lock = threading.Lock()
+        self._retries = 0
+        self._hedges = 0
+        self._hedge_wins = 0
+        self._failures = 0
+
+    def _count(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def hedge_deadline(self, streaming):
+        """Seconds to wait for output before hedging, or None to not hedge"""
+        if str(self.hedge_after).lower() == 'auto':
+            return self.latency[streaming].percentile(0.95)
+        seconds = float(self.hedge_after or 0)
+        return seconds if seconds > 0 else None
+
+    def call(self, attempt_fn, on_chunk=None, on_queue=None):
+        for attempt in range(self.max_attempts):
+            try:
+                return self._call_once(attempt_fn, on_chunk, on_queue)
+            except Exception as e:
+                if attempt + 1 >= self.max_attempts or not is_retryable(e):
+                    self._count('_failures')
+                    raise
+                self._count('_retries')
+                time.sleep(backoff_delay(attempt, self.backoff_base, self.backoff_cap))
+
+    def _call_once(self, attempt_fn, on_chunk, on_queue):
+        streaming = on_chunk is not None
+        hedge_after = self.hedge_deadline(streaming)
+        if hedge_after is None:
+            return self._call_direct(attempt_fn, on_chunk, on_queue)
+        return self._call_hedged(attempt_fn, on_chunk, on_queue, hedge_after)
+
+    def _call_direct(self, attempt_fn, on_chunk, on_queue):
+        """Run on the calling thread, only recording latency"""
+        streaming = on_chunk is not None
+        state = {'dispatched': time.monotonic(), 'first_output': None}
+
+        def queued(ahead):
+            if ahead is None:
+                state['dispatched'] = time.monotonic()
+            if on_queue is not None:
+                on_queue(ahead)
+
+        def chunk(text):
+            if state['first_output'] is None:
+                state['first_output'] = time.monotonic() - state['dispatched']
+            on_chunk(text)
+
+        text = attempt_fn(chunk if streaming else None, queued, None)
+        first_output = state['first_output']
+        if first_output is None:
+            first_output = time.monotonic() - state['dispatched']
+        self.latency[streaming].record(first_output)
+        return text
+
+    def _call_hedged(self, attempt_fn, on_chunk, on_queue, hedge_after):
+        streaming = on_chunk is not None
+        events = queue.Queue()
+        cancel_events = []
+
+        def cancel_others(winner):
+            # Losers stop streaming and give their quota back instead of
+            # running to completion on a daemon thread
+            for index, cancelled in enumerate(cancel_events):
+                if index != winner:
+                    cancelled.set()
+
+        def launch(index):
+            cancelled = threading.Event()
+            cancel_events.append(cancelled)
+
+            def chunk(text):
+                events.put(('chunk', index, text))
+
+            def queued(ahead):
+                events.put(('queue', index, ahead))
+
+            def run():
+                try:
+                    events.put(('done', index, attempt_fn(chunk if streaming else None, queued, cancelled)))
+                except BaseException as e:
+                    events.put(('error', index, e))
+
+            # Daemon: a losing request is abandoned, not awaited
+            threading.Thread(target=run, name=f'llm-attempt-{index}', daemon=True).start()
+
+        launch(0)
+        launched = 1
+        dispatched = time.monotonic()
+        deadline = dispatched + hedge_after
+        leader = None
+        failed = {}
+        while True:
+            timeout = None
+            if launched == 1 and leader is None and deadline is not None:
+                timeout = max(0.0, deadline - time.monotonic())
+            try:
+                kind, index, value = events.get(timeout=timeout)
+            except queue.Empty:
+                self._count('_hedges')
+                launch(1)
+                launched = 2
+                continue
+
+            if kind == 'queue':
+                if index == 0:
+                    # Time spent waiting for quota doesn't count towards the deadline
+                    if value is None:
+                        dispatched = time.monotonic()
+                        deadline = dispatched + hedge_after
+                    else:
+                        deadline = None
+                    if on_queue is not None:
+                        on_queue(value)
+                continue
+
+            if kind == 'chunk':
+                if leader is None:
+                    leader = index
+                    if index == 0:
+                        self.latency[streaming].record(time.monotonic() - dispatched)
+                if index == leader:
+                    on_chunk(value)
+                continue
+
+            if kind == 'done':
+                if index == 0 and leader is None:
+                    self.latency[streaming].record(time.monotonic() - dispatched)
+                if index == 1:
+                    self._count('_hedge_wins')
+                if streaming and index != leader:
+                    on_chunk(value)
+                cancel_others(index)
+                return value
+
+            # kind == 'error'
+            failed[index] = value
+            if len(failed) == launched:
+                raise failed[0] if 0 in failed else value
+            if index == leader:
+                # Stream the surviving request instead
+                leader = None
+
+    def stats(self):
+        with self._lock:
+            return {
+                'retries': self._retries,
+                'hedges': self._hedges,
+                'hedge_wins': self._hedge_wins,
+                'failures': self._failures,
+                'hedge_after_seconds': self.hedge_deadline(True),
+            }
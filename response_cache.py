@@ -0,0 +1,115 @@
+# response_cache.py - Persistent on-disk cache of LLM responses
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from caching import content_digest
+
+DEFAULT_PATH = os.environ.get(
+    'LLM_CACHE_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'llm_responses.sqlite3')
+)
+
+
+class ResponseCache:
+    """SQLite-backed response cache with TTL and total-size eviction"""
+
+    def __init__(self, path=DEFAULT_PATH, ttl_seconds=7 * 24 * 3600, max_bytes=50 * 1024 * 1024):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._initialized = False
+
+    @staticmethod
+    def make_key(model_name, prompt, generation_config):
+        """Key a response by model, full prompt and generation settings"""
+        config = json.dumps(generation_config, sort_keys=True)
+        return content_digest(model_name, prompt, config)
+
+    def _connect(self):
+        # One short-lived connection per operation keeps this safe across
+        # Streamlit's per-session threads
+        conn = sqlite3.connect(self.path, timeout=10)
+        if not self._initialized:
+            with self._lock:
+                if not self._initialized:
+                    conn.execute(
+                        """
+                        CREATE TABLE IF NOT EXISTS responses (
+                            key TEXT PRIMARY KEY,
+                            text TEXT NOT NULL,
+                            size INTEGER NOT NULL,
+                            created_at REAL NOT NULL,
+                            last_used REAL NOT NULL
+                        )
+                        """
+                    )
+                    conn.execute("CREATE INDEX IF NOT EXISTS idx_last_used ON responses(last_used)")
+                    conn.commit()
+                    self._initialized = True
+        return conn
+
+    def get(self, key):
+        """Return the cached text for key, or None if missing or expired"""
+        now = time.time()
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT text, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            text, created_at = row
+            if now - created_at > self.ttl_seconds:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                conn.commit()
+                return None
+            conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+            conn.commit()
+            return text
+        finally:
+            conn.close()
+
+    def put(self, key, text):
+        """Store a response and evict expired / least recently used entries"""
+        now = time.time()
+        size = len(text.encode('utf-8'))
+        conn = self._connect()
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, text, size, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, text, size, now, now),
+            )
+            self._evict(conn, now)
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _evict(self, conn, now):
+        conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,))
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in conn.execute(
+            "SELECT key, size FROM responses ORDER BY last_used ASC"
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+            conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+
+
+def open_default_cache():
+    """Create the default cache, making sure its directory exists"""
+    directory = os.path.dirname(DEFAULT_PATH)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    return ResponseCache(DEFAULT_PATH)
+
+
+# Shared by all apps in this process
+response_cache = open_default_cache()
@@ -0,0 +1,103 @@
+# singleflight.py - Share one in-flight call between concurrent identical requests
+import threading
+
+
+class _Call:
+    """One in-flight call: its latest partial output and, once done, the outcome"""
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.partial = None
+        self.done = False
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesce concurrent calls with the same key into one execution.
+
+    The first caller for a key (the leader) runs the function; callers that
+    arrive while it is running (followers) wait for it and get the same result
+    or exception. Partial output the leader streams is replayed to each
+    follower's own on_chunk from the follower's thread, so Streamlit
+    placeholders are only ever touched by the session that owns them.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._leaders = 0
+        self._coalesced = 0
+
+    def do(self, key, fn, on_chunk=None):
+        """Return fn(on_chunk) for key, sharing a call already in flight.
+
+        fn gets a chunk callback only when the leader asked for streaming;
+        followers of a non-streaming leader see just the final result.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self._leaders += 1
+            else:
+                self._coalesced += 1
+
+        if leader:
+            return self._lead(key, call, fn, on_chunk)
+        return self._follow(call, on_chunk)
+
+    def _lead(self, key, call, fn, on_chunk):
+        def publish(text):
+            with call.condition:
+                call.partial = text
+                call.condition.notify_all()
+            if on_chunk is not None:
+                on_chunk(text)
+
+        try:
+            call.result = fn(publish if on_chunk is not None else None)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            # Later identical requests start a new call (or hit the response cache)
+            with self._lock:
+                del self._calls[key]
+            with call.condition:
+                call.done = True
+                call.condition.notify_all()
+
+    @staticmethod
+    def _follow(call, on_chunk):
+        seen = None
+        with call.condition:
+            while True:
+                partial = call.partial
+                if on_chunk is not None and partial is not None and partial is not seen:
+                    seen = partial
+                    # Released while the follower's callback renders
+                    call.condition.release()
+                    try:
+                        on_chunk(partial)
+                    finally:
+                        call.condition.acquire()
+                    continue
+                if call.done:
+                    break
+                call.condition.wait()
+        if call.error is not None:
+            raise call.error
+        if on_chunk is not None and seen is None and call.result:
+            on_chunk(call.result)
+        return call.result
+
+    def stats(self):
+        with self._lock:
+            return {
+                'in_flight': len(self._calls),
+                'leaders': self._leaders,
+                'coalesced': self._coalesced,
+            }
@@ -0,0 +1,53 @@
+# streaming_preview.py - Live feedback (partial text, queue position) for background generation jobs, and previews
+import base64
+import time
+
+import streamlit as st
+import streamlit.components.v1 as components
+
+# How often a session re-checks its running job
+POLL_SECONDS = 0.75
+
+
+def rerun():
+    """st.rerun on current Streamlit, st.experimental_rerun on older releases"""
+    (getattr(st, 'rerun', None) or st.experimental_rerun)()
+
+
+def show_job_progress(job, message, show_partial=True):
+    """Render a running job: its place in the LLM queue or progress message, and partial output"""
+    if job.queue_position:
+        st.info(f"⏳ {job.queue_position} request(s) ahead of yours for the AI model. Yours will start automatically.")
+    elif job.queue_position == 0:
+        st.info("⏳ You're next - waiting for the AI model's per-minute quota to free up...")
+    else:
+        st.info(f"{message} ({time.time() - job.created_at:.0f} s)")
+    if show_partial and job.partial:
+        # Cursor marks the preview as still in progress
+        st.markdown(job.partial + " ▌")
+
+
+def wait_and_rerun():
+    """Sleep one poll interval, then rerun the script to check on running jobs or renders.
+
+    Called at the end of the script, after the whole page has rendered. The
+    job runs on a worker thread, so the page stays interactive; any widget
+    change simply starts the next check early.
+    """
+    time.sleep(POLL_SECONDS)
+    rerun()
+
+
+def show_html_preview(html, height=800):
+    """Show a standalone HTML document (e.g. pdf_render.render_html) in an iframe.
+
+    The document is loaded from a data: URL, so it runs in an opaque origin
+    without access to the app page even if something in it were active.
+    """
+    src = "data:text/html;base64," + base64.b64encode(html.encode('utf-8')).decode('ascii')
+    iframe = getattr(st, 'iframe', None)
+    if iframe is not None:
+        iframe(src, height=height)
+    else:
+        # Older Streamlit releases
+        components.iframe(src, height=height, scrolling=True)
@@ -0,0 +1,79 @@
+# tests/test_compaction.py - Resume and job-description compaction
+import time
+
+from compaction import PAGE_BREAK, compact_job_description, compact_resume_text, rejoin_hyphenated
+
+
+def test_insurance_and_benefits_requirements_survive():
+    jd = (
+        "Requirements:\n"
+        "- Experience designing health insurance claims platforms\n"
+        "- Build benefits enrollment flows covering 401(k) and dental plans\n"
+        "- 5+ years Python"
+    )
+    assert compact_job_description(jd) == jd
+
+
+def test_unheaded_domain_paragraph_survives():
+    jd = "We offer insurance products to millions of families.\nYou will build claims APIs."
+    assert compact_job_description(jd) == jd
+
+
+def test_benefits_and_eeo_blurbs_are_dropped():
+    jd = (
+        "Responsibilities:\n- Ship code\n"
+        "Benefits:\n- Medical, dental and vision insurance\n- 401(k) match\n\n"
+        "What we offer\n- Unlimited PTO\n\n"
+        "- Gym stipend\n- Paid parental leave and vision coverage\n\n"
+        "We are an Equal Opportunity Employer.\nWe participate in E-Verify."
+    )
+    assert compact_job_description(jd) == "Responsibilities:\n- Ship code"
+
+
+def test_repeated_paragraphs_are_dropped():
+    assert compact_job_description("Build APIs.\n\nBuild APIs.") == "Build APIs."
+
+
+def test_line_break_hyphenation_is_undone():
+    assert rejoin_hyphenated("Led the manage-\nment of releases") == "Led the management of releases"
+
+
+def test_date_ranges_keep_their_hyphen():
+    assert rejoin_hyphenated("Senior Engineer 2019-\n2021 Lead") == "Senior Engineer 2019-2021 Lead"
+
+
+def test_compounds_and_acronyms_keep_their_hyphen():
+    assert rejoin_hyphenated("self-\nservice") == "self-service"
+    assert rejoin_hyphenated("state-of-the-\nart") == "state-of-the-art"
+    assert rejoin_hyphenated("CI-\nCD") == "CI-CD"
+    # Seen hyphenated elsewhere, so it is a compound
+    assert rejoin_hyphenated("data-\ndriven and data-driven") == "data-driven and data-driven"
+
+
+def test_running_headers_and_page_numbers_are_dropped():
+    pages = [
+        "Jane Doe | jane@example.com\nExperience\n- Python 3\nPage 1 of 3",
+        "Jane Doe | jane@example.com\n- Led migrations\nPage 2 of 3",
+        "Jane Doe | jane@example.com\nEducation\nBSc 2015\nPage 3 of 3",
+    ]
+    text = compact_resume_text(PAGE_BREAK.join(pages))
+    assert text.count("Jane Doe | jane@example.com") == 1
+    assert "Page" not in text
+    assert "Led migrations" in text and "BSc 2015" in text
+
+
+def test_repeated_content_lines_are_kept():
+    pages = [
+        "Jane Doe\nEngineer, Acme 2019-2021\n- Python 3\n- Built billing\nSkills summary",
+        "Engineer, Initech 2016-2019\n- Python 3\n- Built search\nReferences available",
+    ]
+    text = compact_resume_text(PAGE_BREAK.join(pages))
+    assert text.count("- Python 3") == 2
+
+
+def test_long_unbroken_runs_are_scanned_in_linear_time():
+    text = "a" * 50_000 + "-\nb " + "x" * 50_000
+    start = time.perf_counter()
+    assert rejoin_hyphenated(text) == "a" * 50_000 + "b " + "x" * 50_000
+    assert compact_resume_text("y" * 50_000).startswith("y")
+    assert time.perf_counter() - start < 0.5
@@ -0,0 +1,26 @@
+# tests/test_early_stop.py - Early stop on the cleaner's end patterns
+import early_stop
+from compaction import estimate_tokens
+from early_stop import EndPatternWatcher, TailTracker
+
+PATTERNS = [r'\n#+\s*Additional Suggestions.*']
+
+
+def test_no_savings_are_reported_before_a_tail_was_measured(monkeypatch):
+    monkeypatch.setattr(early_stop, 'tail_tracker', TailTracker())
+    watcher = EndPatternWatcher(PATTERNS)
+    assert not watcher("# Resume\n- Python")
+    assert watcher("# Resume\n- Python\n## Additional Suggestions")
+    assert watcher.report() == {'tokens_saved': None, 'seconds_saved': None}
+
+
+def test_savings_use_measured_tails(monkeypatch):
+    monkeypatch.setattr(early_stop, 'tail_tracker', TailTracker())
+    full = EndPatternWatcher(PATTERNS, mode='off')
+    full("# Resume")
+    full.served('generated')
+    tail = "\n## Additional Suggestions\n" + "x" * 396
+    full.finish("# Resume" + tail)
+    watcher = EndPatternWatcher(PATTERNS)
+    watcher("# Resume\n## Additional Suggestions")
+    assert watcher.report()['tokens_saved'] == estimate_tokens(tail)
@@ -0,0 +1,22 @@
+# tests/test_jobs.py - Background job bookkeeping
+import time
+
+from jobs import Job, JobManager
+
+
+def test_finished_jobs_already_carry_their_finish_time():
+    manager = JobManager(workers=1)
+    job = manager.get(manager.submit(lambda job: "ok"))
+    while not job.finished:
+        time.sleep(0.001)
+    assert job.finished_at is not None and job.queue_position is None
+    assert job.result == "ok"
+
+
+def test_prune_skips_jobs_still_being_finished():
+    manager = JobManager(workers=1, ttl_seconds=0)
+    job = Job()
+    job.status = 'done'
+    manager._jobs[job.id] = job
+    manager.submit(lambda job: None)
+    assert manager.get(job.id) is job
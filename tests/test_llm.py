@@ -0,0 +1,89 @@
+# tests/test_llm.py - generate_text plumbing around the backend
+import threading
+import time
+
+import pytest
+
+import early_stop
+import llm
+from early_stop import EndPatternWatcher, TailTracker
+from llm_backends import FakeBackend
+from response_cache import ResponseCache
+
+
+def test_no_session_outside_a_script_run():
+    # batch_optimize imports the apps, so Streamlit is loaded but no script runs
+    pytest.importorskip('streamlit')
+    assert llm.current_session_id() is None
+
+
+def test_cached_answers_do_not_count_as_measured_tails(monkeypatch, tmp_path):
+    monkeypatch.setattr(early_stop, 'tail_tracker', TailTracker())
+    monkeypatch.setattr(llm, 'response_cache', ResponseCache(str(tmp_path / 'responses.sqlite3')))
+    monkeypatch.setattr(llm, 'backend', FakeBackend(ttft_ms=0, tokens_per_second=None))
+
+    sources = []
+    for _ in range(3):
+        watcher = EndPatternWatcher([r'\n## Experience.*'], mode='off')
+        text = llm.generate_text('test-key', "Rewrite this resume", stop_when=watcher, on_source=watcher.served)
+        watcher.finish(text)
+        sources.append(watcher.source)
+    assert sources == ['generated', 'cache', 'cache']
+    assert len(early_stop.tail_tracker._samples) == 1
+
+
+class SlowBackend:
+    """Answers after a pause so concurrent calls overlap; rejects the key 'bad'"""
+
+    model_name = 'slow-test'
+
+    def __init__(self):
+        self.calls = 0
+
+    def generate(self, api_key, prompt, on_chunk=None, on_usage=None, stop_when=None):
+        self.calls += 1
+        time.sleep(0.2)
+        if api_key == 'bad':
+            raise PermissionError("API key not valid")
+        return f"answer for {prompt}"
+
+
+def run_concurrently(*calls):
+    """Start each call 50 ms after the previous one; return results or exceptions"""
+    results = [None] * len(calls)
+
+    def run(index, call):
+        try:
+            results[index] = call()
+        except Exception as e:
+            results[index] = e
+
+    threads = []
+    for index, call in enumerate(calls):
+        threads.append(threading.Thread(target=run, args=(index, call)))
+        threads[-1].start()
+        time.sleep(0.05)
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_identical_requests_only_share_a_call_with_the_same_key(monkeypatch, tmp_path):
+    monkeypatch.setattr(llm, 'response_cache', ResponseCache(str(tmp_path / 'responses.sqlite3')))
+    monkeypatch.setattr(llm, 'backend', SlowBackend())
+    bad, good = run_concurrently(
+        lambda: llm.generate_text('bad', "Shared prompt"),
+        lambda: llm.generate_text('good', "Shared prompt"),
+    )
+    assert isinstance(bad, PermissionError)
+    assert good == "answer for Shared prompt"
+
+
+def test_uncached_requests_never_join_a_running_call(monkeypatch, tmp_path):
+    monkeypatch.setattr(llm, 'response_cache', ResponseCache(str(tmp_path / 'responses.sqlite3')))
+    monkeypatch.setattr(llm, 'backend', SlowBackend())
+    run_concurrently(
+        lambda: llm.generate_text('good', "Fresh prompt"),
+        lambda: llm.generate_text('good', "Fresh prompt", use_cache=False),
+    )
+    assert llm.backend.calls == 2
@@ -0,0 +1,21 @@
+# tests/test_llm_backends.py - Prompt routing in the fake backend
+from llm_backends import LINKEDIN_TASK_HEADER, FakeBackend
+
+CV_PROMPT = """
+You are an expert CV writer. Create a professional CV from the details below.
+
+PERSONAL INFORMATION:
+- Name: Jordan Example
+- LinkedIn: linkedin.com/in/jordan
+"""
+
+
+def test_cv_prompt_with_linkedin_contact_gets_a_document():
+    text = FakeBackend().compose(CV_PROMPT)
+    assert text.startswith("# Jordan Example")
+    assert "LINKEDIN PROFILE" not in text
+
+
+def test_linkedin_prompt_gets_a_profile():
+    prompt = f"\n{LINKEDIN_TASK_HEADER} Create an optimized LinkedIn profile.\n"
+    assert FakeBackend().compose(prompt).startswith("# OPTIMIZED LINKEDIN PROFILE")
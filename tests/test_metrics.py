@@ -0,0 +1,14 @@
+# tests/test_metrics.py - Prometheus export
+from metrics import StageMetrics
+from render_pool import RenderPool
+
+
+def test_render_pool_stats_are_exported():
+    metrics = StageMetrics()
+    pool = RenderPool(print, workers=1, max_pending=2)
+    pool.rejected = 3
+    metrics.register('render_pool', pool.stats, counters=RenderPool.COUNTERS)
+    text = metrics.render()
+    assert "# TYPE resume_app_render_pool_pending gauge\nresume_app_render_pool_pending 0\n" in text
+    assert "# TYPE resume_app_render_pool_rejected_total counter\nresume_app_render_pool_rejected_total 3\n" in text
+    assert "resume_app_render_pool_max_pending 2\n" in text
@@ -0,0 +1,38 @@
+# tests/test_pdf_render.py - Background PDF renders and the HTML export
+import re
+from concurrent.futures import wait
+
+import pdf_render
+from pdf_render import find_pdf_render, render_html, render_pdf_async
+
+
+def test_failed_render_is_reported_once_then_retried(monkeypatch):
+    def failing(markdown_content, theme):
+        raise RuntimeError("render pool timed out")
+
+    monkeypatch.setattr(pdf_render, 'render_pdf', failing)
+    future = render_pdf_async("# Retry me", 'resume')
+    wait([future])
+    assert find_pdf_render("# Retry me", 'resume') is future
+    assert find_pdf_render("# Retry me", 'resume') is None
+
+    monkeypatch.setattr(pdf_render, 'render_pdf', lambda markdown_content, theme: b'%PDF')
+    assert render_pdf_async("# Retry me", 'resume').result(timeout=5) == b'%PDF'
+    assert find_pdf_render("# Retry me", 'resume').result() == b'%PDF'
+
+
+def test_raw_html_in_generated_markdown_does_not_reach_the_preview():
+    html = render_html(
+        "# Jane\n\n<script>alert(1)</script>\n\n"
+        "Skills <img src=x onerror=alert(1)> <b onclick=\"alert(1)\">Go</b>",
+        'resume',
+    )
+    assert "<script" not in html
+    assert not re.search(r"<[^>]*\son\w+\s*=", html)
+    assert "&lt;script&gt;" in html
+
+
+def test_unsafe_link_targets_are_dropped():
+    html = render_html("[site](https://example.com) [x](javascript:alert(1)) [y](JaVa\tScript:alert(1))", 'resume')
+    assert 'href="https://example.com"' in html
+    assert "javascript" not in html.lower()
@@ -0,0 +1,36 @@
+# tests/test_resilience.py - Hedged requests
+import threading
+
+from resilience import ResilientCaller
+
+
+def test_losing_hedge_is_cancelled():
+    caller = ResilientCaller(max_attempts=1, hedge_after=0.05)
+    cancels = []
+    loser_stopped = threading.Event()
+
+    def attempt(on_chunk, on_queue, cancelled):
+        cancels.append(cancelled)
+        if len(cancels) == 1:
+            # Stuck until told to give up
+            cancelled.wait(5)
+            loser_stopped.set()
+            return "slow"
+        return "fast"
+
+    assert caller.call(attempt) == "fast"
+    assert loser_stopped.wait(1)
+    assert cancels[0].is_set() and not cancels[1].is_set()
+    assert caller.stats()['hedge_wins'] == 1
+
+
+def test_unhedged_calls_get_no_cancel_event():
+    caller = ResilientCaller(max_attempts=1, hedge_after=0)
+    seen = []
+
+    def attempt(on_chunk, on_queue, cancelled):
+        seen.append(cancelled)
+        return "ok"
+
+    assert caller.call(attempt) == "ok"
+    assert seen == [None]
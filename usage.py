@@ -0,0 +1,177 @@
+# usage.py - Token usage and cost ledger for LLM calls
+"""Record prompt/output token counts of every LLM call and report them per
+app, per session and per day with estimated cost.
+
+Usage:
+    python usage.py [--by day|app|session|model] [--days 30] [--csv usage.csv]
+"""
+import argparse
+import csv
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+DEFAULT_PATH = os.environ.get(
+    'LLM_USAGE_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'llm_usage.sqlite3')
+)
+
+# USD per million tokens as (input, output); prompts under 128k tokens
+PRICES_PER_MILLION = {
+    'gemini-1.5-flash': (0.075, 0.30),
+    'gemini-1.5-pro': (1.25, 5.00),
+    # Priced like the model it stands in for, so load tests estimate real spend
+    'fake-gemini': (0.075, 0.30),
+}
+
+GROUP_COLUMNS = {'day': 'day', 'app': 'app', 'session': 'session', 'model': 'model'}
+
+
+def estimate_cost(model_name, prompt_tokens, output_tokens):
+    """Estimated USD cost of one call; 0.0 for models without a known price"""
+    input_price, output_price = PRICES_PER_MILLION.get(model_name, (0.0, 0.0))
+    return (prompt_tokens * input_price + output_tokens * output_price) / 1_000_000
+
+
+class UsageLedger:
+    """Append-only SQLite log of LLM calls with grouped summaries"""
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._initialized = False
+
+    def _connect(self):
+        # One short-lived connection per operation, as in ResponseCache
+        conn = sqlite3.connect(self.path, timeout=10)
+        if not self._initialized:
+            with self._lock:
+                if not self._initialized:
+                    conn.execute(
+                        """
+                        CREATE TABLE IF NOT EXISTS usage (
+                            ts REAL NOT NULL,
+                            day TEXT NOT NULL,
+                            app TEXT NOT NULL,
+                            session TEXT NOT NULL,
+                            model TEXT NOT NULL,
+                            prompt_tokens INTEGER NOT NULL,
+                            output_tokens INTEGER NOT NULL,
+                            cached INTEGER NOT NULL,
+                            cost REAL NOT NULL
+                        )
+                        """
+                    )
+                    conn.execute("CREATE INDEX IF NOT EXISTS idx_usage_day ON usage(day)")
+                    conn.execute("CREATE INDEX IF NOT EXISTS idx_usage_session ON usage(session)")
+                    conn.commit()
+                    self._initialized = True
+        return conn
+
+    def record(self, app, session, model_name, prompt_tokens=0, output_tokens=0, cached=False):
+        """Log one call; cache hits are logged with zero tokens so hit rates show up"""
+        now = time.time()
+        cost = 0.0 if cached else estimate_cost(model_name, prompt_tokens, output_tokens)
+        conn = self._connect()
+        try:
+            conn.execute(
+                "INSERT INTO usage (ts, day, app, session, model, prompt_tokens, output_tokens, cached, cost) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (now, time.strftime('%Y-%m-%d', time.localtime(now)), app or 'unknown', session or 'unknown',
+                 model_name, int(prompt_tokens), int(output_tokens), int(cached), cost),
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    def summary(self, by='day', days=None, session=None, app=None):
+        """Totals grouped by day, app, session or model, newest/largest first"""
+        column = GROUP_COLUMNS[by]
+        clauses, params = [], []
+        if days:
+            clauses.append("ts >= ?")
+            params.append(time.time() - days * 86400)
+        if session:
+            clauses.append("session = ?")
+            params.append(session)
+        if app:
+            clauses.append("app = ?")
+            params.append(app)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        order = "day DESC" if by == 'day' else "cost DESC"
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                f"SELECT {column} AS {by}, COUNT(*), SUM(cached), SUM(prompt_tokens), "
+                f"SUM(output_tokens), MAX(output_tokens), SUM(cost) "
+                f"FROM usage {where} GROUP BY {column} ORDER BY {order}",
+                params,
+            ).fetchall()
+        finally:
+            conn.close()
+        return [
+            {
+                by: key,
+                'calls': calls,
+                'cache_hits': cache_hits,
+                'prompt_tokens': prompt_tokens,
+                'output_tokens': output_tokens,
+                'max_output_tokens': max_output,
+                'cost_usd': cost,
+            }
+            for key, calls, cache_hits, prompt_tokens, output_tokens, max_output, cost in rows
+        ]
+
+    def totals(self, session=None, days=None):
+        """Single summary row over everything matching the filters"""
+        rows = self.summary(by='model', session=session, days=days)
+        total = {'calls': 0, 'cache_hits': 0, 'prompt_tokens': 0, 'output_tokens': 0, 'cost_usd': 0.0}
+        for row in rows:
+            for field in total:
+                total[field] += row[field]
+        return total
+
+    def export_csv(self, path, by='day', days=None):
+        rows = self.summary(by=by, days=days)
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=[by, 'calls', 'cache_hits', 'prompt_tokens',
+                                                   'output_tokens', 'max_output_tokens', 'cost_usd'])
+            writer.writeheader()
+            writer.writerows(rows)
+        return len(rows)
+
+
+def open_default_ledger():
+    """Create the default ledger, making sure its directory exists"""
+    directory = os.path.dirname(DEFAULT_PATH)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    return UsageLedger(DEFAULT_PATH)
+
+
+# Shared by all apps in this process
+usage_ledger = open_default_ledger()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarize LLM token usage and estimated cost")
+    parser.add_argument('--by', choices=sorted(GROUP_COLUMNS), default='day')
+    parser.add_argument('--days', type=int, help="Only calls from the last N days")
+    parser.add_argument('--csv', help="Also write the summary to this CSV file")
+    args = parser.parse_args(argv)
+
+    rows = usage_ledger.summary(by=args.by, days=args.days)
+    print(f"{args.by:<24} {'calls':>7} {'cached':>7} {'prompt tok':>11} {'output tok':>11} {'max out':>8} {'cost $':>9}")
+    for row in rows:
+        print(f"{str(row[args.by]):<24} {row['calls']:>7} {row['cache_hits']:>7} {row['prompt_tokens']:>11} "
+              f"{row['output_tokens']:>11} {row['max_output_tokens']:>8} {row['cost_usd']:>9.4f}")
+    if args.csv:
+        usage_ledger.export_csv(args.csv, by=args.by, days=args.days)
+        print(f"Wrote {args.csv}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())